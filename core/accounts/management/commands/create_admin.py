@@ -9,7 +9,7 @@ class Command(BaseCommand):
     help = 'Creates an admin user from environment variables'
 
     def handle(self, *args, **options):
-        from accounts.models import Role
+        from accounts.models import Role, warm_role_cache
         
         username = os.environ.get('ADMIN_USERNAME', 'admin')
         email = os.environ.get('ADMIN_EMAIL', 'admin@example.com')
@@ -99,6 +99,8 @@ class Command(BaseCommand):
                     self.style.SUCCESS(f'Created {role.get_name_display()} role')
                 )
 
+        warm_role_cache()
+
         if User.objects.filter(username=username).exists():
             user = User.objects.get(username=username)
             if user.role != system_admin_role:
@@ -1,11 +1,11 @@
 from django.core.management.base import BaseCommand
 
-from accounts.models import Role
+from accounts.models import Role, warm_role_cache
 
 
 ROLE_DEFAULTS = [
     {
-        "name": Role.SUPERUSER,
+        "name": Role.SYSTEM_ADMINISTRATOR,
         "description": "Full system access. Bypasses all rules.",
         "can_create_users": True,
         "can_manage_projects": True,
@@ -43,32 +43,6 @@ ROLE_DEFAULTS = [
         "can_view_assigned_only": False,
         "can_manage_organizations": False,
     },
-    {
-        "name": Role.STAKEHOLDER,
-        "description": "View only tasks they are responsible for.",
-        "can_create_users": False,
-        "can_manage_projects": False,
-        "can_manage_tasks": False,
-        "can_move_task_stages": False,
-        "can_move_task_categories": False,
-        "can_reject_testing": False,
-        "can_add_project_notes": False,
-        "can_view_assigned_only": True,
-        "can_manage_organizations": False,
-    },
-    {
-        "name": Role.KEY_STAKEHOLDER,
-        "description": "View assigned tasks + add project-level notes.",
-        "can_create_users": False,
-        "can_manage_projects": False,
-        "can_manage_tasks": False,
-        "can_move_task_stages": False,
-        "can_move_task_categories": False,
-        "can_reject_testing": False,
-        "can_add_project_notes": True,
-        "can_view_assigned_only": True,
-        "can_manage_organizations": False,
-    },
 ]
 
 
@@ -84,4 +58,5 @@ class Command(BaseCommand):
             status = "Created" if created else "Updated"
             self.stdout.write(f"  {status}: {role.get_name_display()}")
 
+        warm_role_cache()
         self.stdout.write(self.style.SUCCESS("Default roles seeded."))
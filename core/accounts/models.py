@@ -3,6 +3,12 @@ import string
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
+
+from core.invalidation import local_cache
+from core.replicas import primary
+
+ROLE_CACHE = "roles"
 
 
 class Role(models.Model):
@@ -40,10 +46,55 @@ class Role(models.Model):
         return self.get_name_display()
 
 
+# ── Role cache ──
+# There are a handful of roles and they rarely change, so each process keeps
+# all of them by id. accounts.signals invalidates the cache (in every worker,
+# see core.invalidation) whenever a role is saved or deleted.
+
+def warm_role_cache():
+    """Load every role into this process's cache."""
+    roles = local_cache(ROLE_CACHE)
+    roles.clear()
+    # A lagging replica's roles would be cached as current
+    with primary():
+        for role in Role.objects.all():
+            roles.set(role.pk, role)
+
+
+def cached_role(pk):
+    """The ``Role`` with ``pk``, shared by the whole process. Do not modify it."""
+    from logs import metrics
+
+    roles = local_cache(ROLE_CACHE)
+    role = roles.get(pk)
+    if role is None:
+        metrics.inc("pms_cache_requests_total", cache="roles", result="miss")
+        if not len(roles):
+            warm_role_cache()
+        role = roles.get(pk)
+    else:
+        metrics.inc("pms_cache_requests_total", cache="roles", result="hit")
+    if role is None:
+        role = Role.objects.get(pk=pk)
+        roles.set(pk, role)
+    return role
+
+
+class CachedRoleDescriptor(ForwardManyToOneDescriptor):
+    """``user.role`` served from the role cache instead of a query."""
+
+    def get_object(self, instance):
+        return cached_role(getattr(instance, self.field.attname))
+
+
+class RoleForeignKey(models.ForeignKey):
+    forward_related_accessor_class = CachedRoleDescriptor
+
+
 class User(AbstractUser):
     """Custom user model for PMS."""
 
-    role = models.ForeignKey(
+    role = RoleForeignKey(
         Role, on_delete=models.SET_NULL, null=True, blank=True, related_name="users"
     )
     admin_organization = models.ForeignKey(
@@ -0,0 +1,14 @@
+"""Keep the process-wide role cache (``accounts.models.cached_role``) current."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.invalidation import invalidate
+
+from .models import ROLE_CACHE, Role
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def role_changed(sender, **kwargs):
+    invalidate(ROLE_CACHE)
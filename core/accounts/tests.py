@@ -1,3 +1,41 @@
-from django.test import TestCase
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from core.invalidation import local_cache
+from core.models import CacheGeneration
+
+from .models import ROLE_CACHE, Role, User
+
+
+# Pages are rendered without running collectstatic first
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class RoleCacheTests(TestCase):
+    """Requests see a role's permission flags as of their start, through the role cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(name=Role.COORDINATOR)
+        cls.user = User.objects.create_user("coordinator", role=cls.role)
+
+    def setUp(self):
+        local_cache(ROLE_CACHE).clear()
+        self.client.force_login(self.user)
+
+    def can_create_projects(self):
+        return self.client.get(reverse("projects:project_create")).status_code == 200
+
+    def test_saving_a_role_reaches_the_next_request(self):
+        self.assertFalse(self.can_create_projects())
+        self.role.can_manage_projects = True
+        self.role.save()
+        self.assertTrue(self.can_create_projects())
+
+    def test_invalidation_from_another_worker(self):
+        self.assertFalse(self.can_create_projects())
+        # Another worker changes the flag and invalidates; this worker's copy
+        # stays until its next request reads the new generation
+        Role.objects.filter(pk=self.role.pk).update(can_manage_projects=True)
+        self.assertFalse(self.can_create_projects())
+        CacheGeneration.objects.filter(name=ROLE_CACHE).update(value=F("value") + 1)
+        self.assertTrue(self.can_create_projects())
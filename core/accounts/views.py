@@ -41,7 +41,7 @@ def user_list(request):
     if not request.user.is_system_admin():
         messages.error(request, "Permission denied.")
         return redirect("dashboard")
-    users = User.objects.select_related("role").all()
+    users = User.objects.all()
     return render(request, "accounts/user_list.html", {"users": users})
 
 
@@ -0,0 +1,45 @@
+"""Optimistic concurrency for models carrying a ``version`` column."""
+
+from django.db import router
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+
+def save_if_unchanged(instance, expected_version, fields):
+    """Write ``fields`` of ``instance`` only if its row is still at ``expected_version``.
+
+    Runs a single ``UPDATE ... WHERE id = %s AND version = %s`` that also bumps
+    the version, so a stale edit is rejected without taking any locks.
+    Returns False, writing nothing, when someone else saved the row first.
+    Sends ``post_save`` after a successful write.
+    A missing ``expected_version`` falls back to the version ``instance`` was
+    loaded with.
+    """
+    if expected_version is None:
+        expected_version = instance.version
+
+    opts = instance._meta
+    values = {}
+    for name in fields:
+        field = opts.get_field(name)
+        values[field.attname] = getattr(instance, field.attname)
+    if any(f.name == "updated_at" for f in opts.concrete_fields):
+        instance.updated_at = values["updated_at"] = timezone.now()
+
+    updated = type(instance)._default_manager.filter(
+        pk=instance.pk, version=expected_version
+    ).update(version=F("version") + 1, **values)
+    if not updated:
+        return False
+    instance.version = expected_version + 1
+    # Receivers (see tasks.signals) must see versioned edits like any other save
+    post_save.send(
+        sender=type(instance),
+        instance=instance,
+        created=False,
+        update_fields=frozenset(fields),
+        raw=False,
+        using=router.db_for_write(type(instance), instance=instance),
+    )
+    return True
@@ -0,0 +1,33 @@
+"""Database functions Django does not ship with."""
+
+from django.db.models import Func, IntegerField
+
+
+class DateDiff(Func):
+    """Whole days from the second date expression to the first (``lhs - rhs``).
+
+    Negative when ``lhs`` is earlier, NULL when either side is NULL.
+    """
+
+    arity = 2
+    output_field = IntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL (and Oracle): subtracting two dates already yields days.
+        return super().as_sql(
+            compiler, connection, template="(%(expressions)s)", arg_joiner=" - ", **extra_context
+        )
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler,
+            connection,
+            template="CAST(julianday(%(expressions)s) AS INTEGER)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function="DATEDIFF", arg_joiner=", ", **extra_context
+        )
@@ -0,0 +1,162 @@
+"""PostgreSQL with a per-process pool of psycopg2 connections.
+
+Django 4.2 has no connection pool; ``OPTIONS["pool"]`` arrives in 5.1. Under
+the ASGI server each request runs in a new thread, and Django keeps
+connections per thread, so ``CONN_MAX_AGE`` cannot carry a connection from
+one request to the next. This backend keeps them in a process-wide
+``psycopg2.pool.ThreadedConnectionPool`` instead. ``close()`` at the end of a
+request hands the connection back, rolled back if needed, and the next
+``connect()`` in any thread takes it out again. It is configured like the
+5.1 pool, so upgrading only means switching ``ENGINE`` back::
+
+    "ENGINE": "core.db_pool",
+    "CONN_MAX_AGE": 0,
+    "OPTIONS": {"pool": {"min_size": 2, "max_size": 10}},
+
+Up to ``max_size`` connections are kept open for reuse; when all of them
+are checked out, further ones are opened outside the pool and closed when
+released. With ``CONN_HEALTH_CHECKS`` a connection that was idle in the
+pool is checked with ``SELECT 1`` before it is handed out, and replaced if
+the server dropped it.
+"""
+
+import os
+import threading
+
+import psycopg2
+import psycopg2.extras
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from logs import metrics
+
+_lock = threading.Lock()
+_pools = {}
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    """Counts the connections it opens and hands out in the metrics."""
+
+    def __init__(self, alias, min_size, max_size, **conn_params):
+        self.alias = alias
+        self.database = conn_params.get("dbname")
+        self._opening = threading.local()
+        super().__init__(min_size, max_size, **conn_params)
+
+    def _connect(self, key=None):
+        self._opening.opened = True
+        metrics.inc("pms_db_connections_total", database=self.alias, result="opened")
+        return super()._connect(key)
+
+    def checkout(self):
+        """A connection, and whether it was idle in the pool rather than new."""
+        self._opening.opened = False
+        connection = self.getconn()
+        idle = not self._opening.opened
+        if idle:
+            metrics.inc("pms_db_connections_total", database=self.alias, result="reused")
+        return connection, idle
+
+    def _putconn(self, conn, key=None, close=False):
+        # psycopg2 closes a returned connection once minconn are idle; like
+        # the 5.1 pool, keep up to max_size. Called under the pool's lock.
+        minconn, self.minconn = self.minconn, self.maxconn
+        try:
+            super()._putconn(conn, key, close)
+        finally:
+            self.minconn = minconn
+
+
+def _pool(alias, options, conn_params):
+    """This process's pool for ``alias``; a forked child starts its own.
+
+    Pools are also keyed on the connection parameters, so the test runner's
+    switch to the test database gets a new pool.
+    """
+    key = (os.getpid(), alias, repr(sorted(conn_params.items())))
+    with _lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(
+                alias,
+                options.get("min_size", 0),
+                options.get("max_size", 10),
+                **conn_params,
+            )
+        return pool
+
+
+def close_pools(database):
+    """Close every connection this process pooled to ``database``, in use or not."""
+    with _lock:
+        for key, pool in list(_pools.items()):
+            if pool.database == database:
+                del _pools[key]
+                pool.closeall()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would keep the database from being dropped
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Connections are counted by the pool; see logs.metrics
+    pools_connections = True
+    creation_class = DatabaseCreation
+
+    def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS):
+        super().__init__(settings_dict, alias)
+        if settings_dict.get("CONN_MAX_AGE"):
+            raise ImproperlyConfigured("Pooled connections need CONN_MAX_AGE = 0.")
+        self._checked_out_of = None
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = _pool(self.alias, self.settings_dict["OPTIONS"].get("pool") or {}, conn_params)
+        try:
+            connection = self._checkout(pool)
+        except PoolError:
+            # Every pooled connection is in use
+            metrics.inc("pms_db_connections_total", database=self.alias, result="overflow")
+            self._checked_out_of = None
+            return super().get_new_connection(conn_params)
+        self._checked_out_of = pool
+
+        # As in the parent's get_new_connection()
+        options = self.settings_dict["OPTIONS"]
+        self.isolation_level = IsolationLevel(options.get("isolation_level", IsolationLevel.READ_COMMITTED))
+        if "isolation_level" in options:
+            connection.isolation_level = self.isolation_level
+        psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def _checkout(self, pool):
+        connection, idle = pool.checkout()
+        if idle and self.settings_dict["CONN_HEALTH_CHECKS"]:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                connection.rollback()
+            except psycopg2.Error:
+                pool.putconn(connection, close=True)
+                connection, _idle = pool.checkout()
+        return connection
+
+    def _close(self):
+        pool, self._checked_out_of = self._checked_out_of, None
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            # Rolls back an open transaction; drops a broken connection
+            pool.putconn(self.connection)
@@ -0,0 +1,110 @@
+"""In-process caches that every worker drops when one of them invalidates.
+
+gunicorn runs several workers, and a plain module-level dict would go stale
+in all but the worker that changed the data. Instead each namespace of
+cached data has a generation number in ``CacheGeneration``:
+
+* ``invalidate(namespace)`` bumps the row (and clears this worker's copy);
+* ``InvalidationMiddleware`` reads the generations of every namespace this
+  worker holds, in one primary-key query per request, and clears the ones
+  that moved.
+
+So a change committed before a request starts is seen by that request in
+every worker, with no broker. Usage::
+
+    roles = local_cache("roles")
+    role = roles.get_or_load(pk, lambda: Role.objects.get(pk=pk))
+    ...
+    invalidate("roles")
+"""
+
+import threading
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import CacheGeneration
+from .replicas import primary
+
+_namespaces = {}
+_lock = threading.Lock()
+
+
+class LocalCache:
+    """A dict of one namespace, valid for the generation it was filled at."""
+
+    def __init__(self, name):
+        self.name = name
+        self.generation = None
+        self._data = {}
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def set(self, key, value):
+        self._data[key] = value
+
+    def get_or_load(self, key, load):
+        try:
+            return self._data[key]
+        except KeyError:
+            with primary():
+                value = self._data[key] = load()
+            return value
+
+    def clear(self):
+        self._data = {}
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+def local_cache(name):
+    """The process-wide ``LocalCache`` for ``name``, created on first use."""
+    with _lock:
+        if name not in _namespaces:
+            _namespaces[name] = LocalCache(name)
+        return _namespaces[name]
+
+
+def invalidate(name):
+    """Make every worker drop its copy of namespace ``name``.
+
+    Other workers notice on their next request after the current
+    transaction commits. This worker clears now and again on commit, so
+    nothing read before the commit survives it.
+    """
+    if not CacheGeneration.objects.filter(name=name).update(value=F("value") + 1):
+        CacheGeneration.objects.get_or_create(name=name)
+        CacheGeneration.objects.filter(name=name).update(value=F("value") + 1)
+    cache = local_cache(name)
+    cache.clear()
+    transaction.on_commit(cache.clear)
+
+
+def sync():
+    """Clear the namespaces whose generation moved since they were filled."""
+    if not _namespaces:
+        return
+    generations = dict(
+        CacheGeneration.objects.filter(name__in=list(_namespaces)).values_list("name", "value")
+    )
+    for name, cache in list(_namespaces.items()):
+        generation = generations.get(name, 0)
+        if cache.generation != generation:
+            cache.clear()
+            cache.generation = generation
+
+
+class InvalidationMiddleware:
+    """Run ``sync()`` before each request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sync()
+        return self.get_response(request)
@@ -0,0 +1,355 @@
+import http.cookiejar
+import itertools
+import json
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Q
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import Role
+from logs.instrumentation import RequestStats
+from projects.models import Project
+from tasks.models import TaskInstance
+
+VIEWS = [
+    "task_board",
+    "task_move",
+    "task_api_detail",
+    "project_detail",
+    "project_list",
+    "dashboard",
+    "search_users",
+    "audit_log_list",
+]
+SEARCH_TERMS = ["user-00", "bench", "a", "example.com", "user-01", "admin"]
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the hot views with concurrent requests and report latency percentiles, "
+        "throughput and queries per request as JSON, optionally failing on regressions "
+        "against a baseline report. task_move really moves tasks (between TODO and "
+        "IN_PROGRESS), so run it against a benchmark database (see seed_benchmark_data)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--views", nargs="+", choices=VIEWS, default=VIEWS)
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per view.")
+        parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per view first.")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--username", help="User to sign in as (default: the first system administrator).")
+        parser.add_argument("--project", type=int, help="Project id for the project and board views (default: the largest).")
+        parser.add_argument(
+            "--server",
+            help="Base URL of a running server, e.g. http://127.0.0.1:8000. Without it requests "
+            "go through Django's test client in this process.",
+        )
+        parser.add_argument("--password", help="Password for --username (only with --server).")
+        parser.add_argument("--output", default="benchmark-report.json")
+        parser.add_argument("--baseline", help="Earlier report to compare against.")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Fail when a view's p95 grows by more than this fraction over the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        user = self._user(options["username"])
+        project = self._project(options["project"])
+        tasks = list(
+            TaskInstance.objects.filter(
+                project=project, is_closed=False, stage__in=[TaskInstance.TODO, TaskInstance.IN_PROGRESS]
+            ).values_list("pk", "stage")[:500]
+        )
+        if not tasks:
+            raise CommandError(f"Project {project.pk} has no open TODO or IN_PROGRESS tasks to move.")
+
+        if options["server"]:
+            if not options["password"]:
+                raise CommandError("--server needs --password to sign in.")
+            transport = ServerTransport(options["server"], user.username, options["password"])
+        else:
+            transport = ClientTransport(user)
+
+        targets = Targets(project, tasks, options["concurrency"])
+        report = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "transport": options["server"] or "test-client",
+            "concurrency": options["concurrency"],
+            "user": user.username,
+            "project": project.pk,
+            "views": {},
+        }
+        for view in options["views"]:
+            report["views"][view] = self._run(view, transport, targets, options)
+            self._print_row(view, report["views"][view])
+
+        with open(options["output"], "w") as file:
+            json.dump(report, file, indent=2)
+        self.stdout.write(f"Report written to {options['output']}")
+
+        if options["baseline"]:
+            self._compare(report, options["baseline"], options["threshold"])
+
+    # ── Setup ──
+
+    def _user(self, username):
+        User = get_user_model()
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f"User {username!r} does not exist.")
+        user = User.objects.filter(role__name=Role.SYSTEM_ADMINISTRATOR, is_active=True).order_by("pk").first()
+        if user is None:
+            raise CommandError("No system administrator exists; pass --username.")
+        return user
+
+    def _project(self, pk):
+        if pk is not None:
+            try:
+                return Project.objects.get(pk=pk)
+            except Project.DoesNotExist:
+                raise CommandError(f"Project {pk} does not exist.")
+        project = (
+            Project.objects.annotate(open_tasks=Count("tasks", filter=Q(tasks__is_closed=False)))
+            .order_by("-open_tasks", "pk")
+            .first()
+        )
+        if project is None:
+            raise CommandError("No projects exist; run seed_benchmark_data first.")
+        return project
+
+    # ── Measuring ──
+
+    def _run(self, view, transport, targets, options):
+        concurrency = options["concurrency"]
+        latencies, queries, errors, failures = [], [], [], []
+        lock = threading.Lock()
+        ready = threading.Barrier(concurrency + 1)
+
+        def worker(index, count):
+            try:
+                session = transport.session()
+                for _ in range(options["warmup"] // concurrency + 1):
+                    transport.request(session, *targets.request(view, index))
+                ready.wait()
+                for _ in range(count):
+                    started = time.perf_counter()
+                    status, query_count = transport.request(session, *targets.request(view, index))
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed * 1000)
+                        if status >= 400:
+                            errors.append(status)
+                        elif query_count is not None:
+                            queries.append(query_count)
+            except Exception as exc:
+                failures.append(exc)
+                ready.abort()
+            finally:
+                connections.close_all()
+
+        share, extra = divmod(options["requests"], concurrency)
+        threads = [
+            threading.Thread(target=worker, args=(i, share + (i < extra)), daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            ready.wait()
+        except threading.BrokenBarrierError:
+            pass
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+        if failures:
+            raise CommandError(f"{view}: {failures[0]!r}")
+
+        if len(latencies) < 2:
+            raise CommandError(f"{view}: too few requests completed to compute percentiles.")
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        return {
+            "requests": len(latencies),
+            "errors": len(errors),
+            "p50_ms": round(cuts[49], 2),
+            "p95_ms": round(cuts[94], 2),
+            "p99_ms": round(cuts[98], 2),
+            "mean_ms": round(statistics.fmean(latencies), 2),
+            "max_ms": round(max(latencies), 2),
+            "throughput_rps": round(len(latencies) / duration, 1),
+            "queries_per_request": round(statistics.fmean(queries), 1) if queries else None,
+        }
+
+    def _print_row(self, view, result):
+        queries = result["queries_per_request"]
+        self.stdout.write(
+            f"  {view:<16} p50 {result['p50_ms']:8.1f}  p95 {result['p95_ms']:8.1f}  "
+            f"p99 {result['p99_ms']:8.1f} ms  {result['throughput_rps']:7.1f} req/s  "
+            f"{'-' if queries is None else queries:>6} queries  {result['errors']} errors"
+        )
+
+    def _compare(self, report, path, threshold):
+        try:
+            with open(path) as file:
+                baseline = json.load(file)["views"]
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f"Cannot read baseline {path}: {exc}")
+
+        regressions = []
+        for view, result in report["views"].items():
+            before = baseline.get(view)
+            if before is None:
+                continue
+            limit = before["p95_ms"] * (1 + threshold)
+            if result["p95_ms"] > limit:
+                regressions.append(f"{view}: p95 {result['p95_ms']} ms > {limit:.1f} ms (baseline {before['p95_ms']} ms)")
+            # Query counts barely fluctuate: a whole extra query per request is a regression
+            if (result["queries_per_request"] or 0) >= (before.get("queries_per_request") or float("inf")) + 1:
+                regressions.append(
+                    f"{view}: {result['queries_per_request']} queries per request (baseline {before['queries_per_request']})"
+                )
+            if result["errors"] > before.get("errors", 0):
+                regressions.append(f"{view}: {result['errors']} errors (baseline {before.get('errors', 0)})")
+
+        if regressions:
+            raise CommandError("Regressions against " + path + ":\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path} (threshold {threshold:.0%})."))
+
+
+class Targets:
+    """The request each view is benchmarked with.
+
+    task_move hands every worker its own slice of the project's open tasks
+    and toggles them between TODO and IN_PROGRESS, so concurrent workers
+    never fight over a row and no clone is ever created.
+    """
+
+    def __init__(self, project, tasks, concurrency):
+        self.project = project
+        self.task_pk = tasks[0][0]
+        self.stages = dict(tasks)
+        self.slices = [itertools.cycle(tasks[i::concurrency] or tasks) for i in range(concurrency)]
+        self.counter = itertools.count()
+
+    def request(self, view, worker):
+        """``(method, path, json_body)`` of the next request of ``view``."""
+        n = next(self.counter)
+        if view == "task_move":
+            pk, _ = next(self.slices[worker])
+            stage = TaskInstance.IN_PROGRESS if self.stages[pk] == TaskInstance.TODO else TaskInstance.TODO
+            self.stages[pk] = stage
+            return "POST", reverse("tasks:task_move", args=[pk]), {"stage": stage}
+        if view == "task_board":
+            return "GET", reverse("tasks:task_board", args=[self.project.pk]), None
+        if view == "task_api_detail":
+            return "GET", reverse("tasks:task_api_detail", args=[self.task_pk]), None
+        if view == "project_detail":
+            return "GET", reverse("projects:project_detail", args=[self.project.pk]), None
+        if view == "project_list":
+            return "GET", reverse("projects:project_list"), None
+        if view == "dashboard":
+            return "GET", reverse("dashboard"), None
+        if view == "search_users":
+            query = urllib.parse.urlencode({"q": SEARCH_TERMS[n % len(SEARCH_TERMS)]})
+            return "GET", f"{reverse('accounts:search_users')}?{query}", None
+        if view == "audit_log_list":
+            return "GET", f"{reverse('logs:audit_log_list')}?page={n % 5 + 1}", None
+        raise ValueError(view)
+
+
+class ClientTransport:
+    """Requests through Django's test client, in this process.
+
+    Queries are counted with ``execute_wrapper`` on the worker thread's
+    connections.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def session(self):
+        # Server errors are counted like any other error status, not raised
+        client = Client(raise_request_exception=False)
+        client.force_login(self.user)
+        return client
+
+    def request(self, client, method, path, body):
+        stats = RequestStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            if method == "POST":
+                response = client.post(path, json.dumps(body), content_type="application/json")
+            else:
+                response = client.get(path)
+        return response.status_code, stats.query_count
+
+
+class ServerTransport:
+    """Requests over HTTP to a running server, signed in through the login form.
+
+    Query counts are read from the ``Server-Timing`` header
+    (``logs.instrumentation``) when the server sends it.
+    """
+
+    def __init__(self, base_url, username, password):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+
+    def session(self):
+        cookies = http.cookiejar.CookieJar()
+        opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(cookies))
+        login = self.base_url + reverse("accounts:login")
+        opener.open(login).read()
+        form = urllib.parse.urlencode({
+            "username": self.username,
+            "password": self.password,
+            "csrfmiddlewaretoken": self._csrf_token(cookies),
+        }).encode()
+        opener.open(urllib.request.Request(login, data=form, headers={"Referer": login})).read()
+        if not any(cookie.name == "sessionid" for cookie in cookies):
+            raise CommandError(f"Could not sign in to {self.base_url} as {self.username}.")
+        return opener, cookies
+
+    def request(self, session, method, path, body):
+        opener, cookies = session
+        headers = {}
+        data = None
+        if method == "POST":
+            data = json.dumps(body).encode()
+            headers = {
+                "Content-Type": "application/json",
+                "X-CSRFToken": self._csrf_token(cookies),
+                "Referer": self.base_url + path,
+            }
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with opener.open(request) as response:
+                response.read()
+                status, timing = response.status, response.headers.get("Server-Timing", "")
+        except urllib.error.HTTPError as exc:
+            status, timing = exc.code, exc.headers.get("Server-Timing", "")
+        match = SERVER_TIMING_QUERIES.search(timing)
+        return status, int(match.group(1)) if match else None
+
+    @staticmethod
+    def _csrf_token(cookies):
+        return next((cookie.value for cookie in cookies if cookie.name == "csrftoken"), "")
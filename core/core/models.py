@@ -0,0 +1,15 @@
+from django.db import models
+
+
+class CacheGeneration(models.Model):
+    """Generation number of one in-process cache namespace.
+
+    Bumped by ``core.invalidation.invalidate``; every worker compares it with
+    the generation its local copy was filled at, once per request.
+    """
+
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
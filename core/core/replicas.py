@@ -0,0 +1,140 @@
+"""Read replicas for read-only views.
+
+Views marked with ``read_from_replica`` read from one of
+``settings.DATABASE_REPLICAS``, picked at random for each request; every
+other read, and every write, goes to ``default``::
+
+    @login_required
+    @read_from_replica
+    def project_list(request):
+        ...
+
+Replicas lag behind the primary, so a user who just changed something must
+not be sent to one. ``ReplicaMiddleware`` sets a short-lived cookie on the
+response to every request that wrote to the database or used an unsafe
+method (e.g. ``task_move``). For ``settings.REPLICA_STICKY_SECONDS``
+afterwards that user's requests read from the primary. Within one request,
+reads go back to the primary as soon as anything is written, and reads
+inside a transaction on the primary stay on it. Data that outlives the request, such
+as the per-process caches of ``core.invalidation``, must be loaded inside
+``primary()`` so a stale copy is never cached as current.
+
+Without replicas the middleware removes itself and the router sends
+everything to ``default``.
+"""
+
+import contextvars
+import random
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = "pms_primary"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+# Read lazily inside the view, e.g. by login_required, but must never lag:
+# a session created on the primary may not have reached the replica yet.
+PRIMARY_APPS = {"sessions"}
+
+
+class _RequestState:
+    def __init__(self, sticky):
+        self.sticky = sticky
+        self.replica = None
+        self.wrote = False
+
+
+_state = contextvars.ContextVar("replica_state", default=None)
+
+
+def read_from_replica(view):
+    """Mark ``view`` as safe to serve from a replica."""
+    view.read_from_replica = True
+    return view
+
+
+@contextmanager
+def primary():
+    """Read from ``default`` inside the block, even in a replica view."""
+    state = _state.get()
+    if state is None:
+        yield
+        return
+    replica, state.replica = state.replica, None
+    try:
+        yield
+    finally:
+        if not state.wrote:
+            state.replica = replica
+
+
+class ReplicaRouter:
+    """Send reads of replica views to their replica and everything else to ``default``."""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None or model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+            state.replica = None
+        # Explicitly: an instance read from a replica would otherwise be
+        # saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Route reads of replica views, and keep recent writers on the primary."""
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = _RequestState(sticky=STICKY_COOKIE in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+
+        if state.wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if (
+            getattr(view_func, "read_from_replica", False)
+            and request.method in SAFE_METHODS
+            and not (state.sticky or state.wrote)
+        ):
+            state.replica = random.choice(settings.DATABASE_REPLICAS)
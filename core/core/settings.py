@@ -2,7 +2,9 @@
 Django settings for core project — Project Management System (PMS).
 """
 
+import copy
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -26,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     # PMS apps
+    'core',
     'accounts',
     'dashboard',
     'organizations',
@@ -38,12 +41,20 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'logs.tracing.TracingMiddleware',
+    'logs.slow_queries.SlowQueryMiddleware',
+    'logs.instrumentation.RequestInstrumentationMiddleware',
+    'logs.metrics.MetricsMiddleware',
+    'core.invalidation.InvalidationMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'logs.profiling.ProfilingMiddleware',
+    'logs.tracing.ViewSpanMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -74,9 +85,68 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', ''),
         'PORT': os.environ.get('DB_PORT', ''),
+        # Seconds a connection is kept for later requests of the same thread
+        # (0 closes it after each request). Reused connections are checked
+        # first when CONN_HEALTH_CHECKS is on. The ASGI server runs every
+        # request in a new thread, so there only DB_POOL reuses connections.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('true', '1', 'yes'),
     }
 }
 
+# Tests with several request threads need the SQLite test database in a
+# file: threads sharing an in-memory database fail on each other's locks
+# instead of waiting for them.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # One file per test run, so concurrent runs do not share it.
+    DATABASES['default']['TEST'] = {
+        'NAME': os.environ.get(
+            'DB_TEST_NAME', os.path.join(tempfile.gettempdir(), f'pms-test-{os.getpid()}.sqlite3')
+        ),
+    }
+
+# A per-process pool of PostgreSQL connections shared by all threads (see
+# core.db_pool), on unless DB_POOL=False: under the ASGI server it is the
+# only way connections are reused. Needs CONN_MAX_AGE = 0; connections
+# opened, reused and over the pool size are counted in
+# pms_db_connections_total. Turn it off behind an external pooler such as
+# PgBouncer in transaction mode.
+if (
+    os.environ.get('DB_POOL', 'True').lower() in ('true', '1', 'yes')
+    and DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+):
+    DATABASES['default'].update({
+        'ENGINE': 'core.db_pool',
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            },
+        },
+    })
+
+# Read replicas for views marked with core.replicas.read_from_replica, as a
+# comma-separated DB_REPLICAS: host[:port] entries sharing the primary's
+# name and credentials, or database file paths with SQLite. They become the
+# aliases replica1, replica2, ... After a write a user reads from the
+# primary for REPLICA_STICKY_SECONDS, which should exceed the replication lag.
+DATABASE_REPLICAS = []
+for number, replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{number}'
+    DATABASES[alias] = copy.deepcopy(DATABASES['default'])
+    if DATABASES[alias]['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES[alias]['NAME'] = replica.strip()
+    else:
+        host, _, port = replica.strip().partition(':')
+        DATABASES[alias].update({'HOST': host, 'PORT': port or DATABASES['default']['PORT']})
+    # Tests read their own writes through the replica alias
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))
+
 # ── Auth ──────────────────────────────────────────────
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -131,6 +201,104 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ── Cache ─────────────────────────────────────────────
+# Local memory (one cache per worker) by default. Set CACHE_DIR to share a
+# file-based cache between the workers of a host.
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds a rendered template fragment is kept (see projects.fragments).
+# Fragments are keyed on their project's change version, so this bounds
+# memory use, not staleness.
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT', 24 * 60 * 60))
+
+# ── Tasks ─────────────────────────────────────────────
+# Seconds a task move idempotency key is remembered; retries within this
+# window replay the original response instead of moving the task again.
+TASK_MOVE_IDEMPOTENCY_TTL = int(os.environ.get('TASK_MOVE_IDEMPOTENCY_TTL', 300))
+
+# DONE task instances untouched for this many days are moved to the archive
+# tables by `manage.py archive_tasks`; closed instances are always eligible.
+TASK_ARCHIVE_AFTER_DAYS = int(os.environ.get('TASK_ARCHIVE_AFTER_DAYS', 90))
+
+# Live board feed (Server-Sent Events). "db" delivers events written by any
+# worker process by polling the event table once per interval per process;
+# "local" skips the polling and only reaches browsers connected to the
+# process that made the change (single-process deployments).
+TASK_EVENTS_BACKEND = os.environ.get('TASK_EVENTS_BACKEND', 'db')
+TASK_EVENTS_POLL_INTERVAL = float(os.environ.get('TASK_EVENTS_POLL_INTERVAL', 1.0))
+# Seconds events are kept for clients resuming with Last-Event-ID.
+TASK_EVENTS_RETENTION = int(os.environ.get('TASK_EVENTS_RETENTION', 3600))
+# Each process deletes a batch of expired board events or move receipts
+# after adding one at most this often; 0 leaves it to a scheduled
+# `manage.py prune_expired` (see tasks.pruning).
+TASK_PRUNE_INTERVAL = int(os.environ.get('TASK_PRUNE_INTERVAL', 60))
+
+# ── Instrumentation ───────────────────────────────────
+# Query count, database and template time of every request, sent in a
+# Server-Timing header (see logs.instrumentation). Requests over either
+# threshold are logged with their most repeated SQL statements. Off by
+# default, like SLOW_QUERY_CAPTURE: turn it on where the log is read.
+REQUEST_INSTRUMENTATION = os.environ.get('REQUEST_INSTRUMENTATION', 'False').lower() in ('true', '1', 'yes')
+SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_QUERIES = int(os.environ.get('SLOW_REQUEST_QUERIES', 50))
+SLOW_REQUEST_TOP_QUERIES = int(os.environ.get('SLOW_REQUEST_TOP_QUERIES', 5))
+# Optional file for slow request entries. WatchedFileHandler reopens it after
+# logrotate moves it, so every gunicorn worker can append to the same file.
+SLOW_REQUEST_LOG = os.environ.get('SLOW_REQUEST_LOG', '')
+
+# With SLOW_QUERY_CAPTURE, statements slower than SLOW_QUERY_MS are explained
+# and saved, one row per normalized statement, to logs.SlowQuery (see
+# logs.slow_queries). Only the SLOW_QUERY_MAX_ENTRIES most recently seen
+# statements are kept. Off by default: it times every statement.
+SLOW_QUERY_CAPTURE = os.environ.get('SLOW_QUERY_CAPTURE', 'False').lower() in ('true', '1', 'yes')
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+SLOW_QUERY_MAX_ENTRIES = int(os.environ.get('SLOW_QUERY_MAX_ENTRIES', 500))
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', 300))
+
+# Prometheus metrics at /metrics (see logs.metrics). Each worker writes its
+# numbers to a file in METRICS_DIR so a scrape of any worker adds up all of
+# them; leave it empty to report the serving process only. Scrapers
+# authenticate with "Authorization: Bearer <METRICS_TOKEN>"; signed-in
+# system administrators can always read the page.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5.0))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# cProfile runs of single requests, asked for by system administrators with
+# ?_profile=1 or an "X-Profile: 1" header (see logs.profiling). The newest
+# PROFILING_KEEP profiles are kept in PROFILING_DIR (a directory under the
+# system temp dir by default); at most PROFILING_RATE_LIMIT are taken per
+# minute by the workers sharing it.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'True').lower() in ('true', '1', 'yes')
+PROFILING_DIR = os.environ.get('PROFILING_DIR', '')
+PROFILING_KEEP = int(os.environ.get('PROFILING_KEEP', 50))
+PROFILING_RATE_LIMIT = int(os.environ.get('PROFILING_RATE_LIMIT', 6))
+PROFILING_TOP = int(os.environ.get('PROFILING_TOP', 40))
+
+# Traces of a TRACING_SAMPLE_RATE fraction of requests (0 to 1) as OTLP/JSON
+# spans in one rotating file per worker in TRACING_DIR (see logs.tracing).
+# With TRACING_TRUST_TRACEPARENT, requests sent with a sampled W3C traceparent
+# header are traced too; only turn it on when clients cannot set the header.
+TRACING_ENABLED = os.environ.get('TRACING_ENABLED', 'True').lower() in ('true', '1', 'yes')
+TRACING_SAMPLE_RATE = float(os.environ.get('TRACING_SAMPLE_RATE', 0.0))
+TRACING_TRUST_TRACEPARENT = os.environ.get('TRACING_TRUST_TRACEPARENT', 'False').lower() in ('true', '1', 'yes')
+TRACING_DIR = os.environ.get('TRACING_DIR', '')
+TRACING_MAX_BYTES = int(os.environ.get('TRACING_MAX_BYTES', 10 * 1024 * 1024))
+TRACING_BACKUP_COUNT = int(os.environ.get('TRACING_BACKUP_COUNT', 5))
+
 # ── Logging ───────────────────────────────────────────
 LOGGING = {
     'version': 1,
@@ -152,3 +320,14 @@ LOGGING = {
         },
     },
 }
+
+if SLOW_REQUEST_LOG:
+    LOGGING['handlers']['slow_requests'] = {
+        'class': 'logging.handlers.WatchedFileHandler',
+        'filename': SLOW_REQUEST_LOG,
+    }
+    LOGGING['loggers']['logs.instrumentation'] = {
+        'handlers': ['console', 'slow_requests'],
+        'level': 'WARNING',
+        'propagate': False,
+    }
@@ -0,0 +1,96 @@
+"""Query budgets for view tests.
+
+An N+1 loop shows up as a page whose query count grows with the rows it
+shows. ``QueryBudgetMixin.assertQueriesDoNotGrow`` requests a page, lets the
+test add data, requests it again and fails if the second request ran more
+queries, printing the statements that ran more often. Queries are counted
+through ``execute_wrapper``, so this works on SQLite in a plain
+``manage.py test``.
+
+``seed_project`` builds a project with categories, tasks, assignees, notes
+and audit log entries for the tests to grow.
+"""
+
+import itertools
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.db import connections
+
+from logs.instrumentation import RequestStats
+
+_serial = itertools.count()
+
+
+class QueryBudgetMixin:
+    """For ``TestCase`` subclasses that request pages with ``self.client``."""
+
+    def capture_queries(self, url):
+        """``RequestStats`` of one GET of ``url``.
+
+        A first request warms per-process caches (roles); the shared cache is
+        then cleared so cached fragments are rendered from the database.
+        """
+        self.client.get(url)
+        cache.clear()
+        stats = RequestStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return stats
+
+    def assertQueriesDoNotGrow(self, url, grow):
+        """Fail if ``url`` runs more queries after ``grow()`` adds data."""
+        before = self.capture_queries(url)
+        grow()
+        after = self.capture_queries(url)
+        if after.query_count > before.query_count:
+            lines = [
+                f"{url} ran {before.query_count} queries, then {after.query_count} "
+                f"with more data. Statements that ran more often:"
+            ]
+            for sql, count in (after.statements - before.statements).most_common(5):
+                lines.append(f"  +{count} ({after.statements[sql]}x) {sql}")
+            self.fail("\n".join(lines))
+
+    def assertQueryBudget(self, url, budget):
+        """Fail if one request of ``url`` runs more than ``budget`` queries."""
+        stats = self.capture_queries(url)
+        if stats.query_count > budget:
+            lines = [f"{url} ran {stats.query_count} queries, over its budget of {budget}. Repeated statements:"]
+            for sql, count in stats.top_repeated(5):
+                lines.append(f"  {count}x {sql}")
+            self.fail("\n".join(lines))
+
+
+def seed_project(organization, users, categories=2, tasks_per_category=3, notes=2):
+    """A project of ``organization`` whose members are ``users``, with data in every section."""
+    from logs.utils import log_action
+    from projects.models import Project, ProjectCategory, ProjectNote
+    from tasks.models import TaskInstance
+
+    serial = next(_serial)
+    project = Project.objects.create(name=f"Project {serial}", organization=organization)
+    project.members.set(users)
+    project.commenters.set(users[:1])
+    project.viewers.set(users[:1])
+
+    stages = itertools.cycle([TaskInstance.TODO, TaskInstance.IN_PROGRESS, TaskInstance.DONE])
+    for c in range(categories):
+        category = ProjectCategory.objects.create(project=project, name=f"Category {serial}.{c}", weight=10, order=c)
+        for t in range(tasks_per_category + 1):
+            task = TaskInstance.objects.create(
+                project=project,
+                # One task per category stays uncategorized
+                project_category=category if t else None,
+                title=f"Task {serial}.{c}.{t}",
+                stage=next(stages),
+                story_points=t,
+            )
+            task.assignees.set(users)
+    for n in range(notes):
+        ProjectNote.objects.create(project=project, author=users[0], content=f"Note {n}")
+        log_action(actor=users[0], action="NOTE", target_type="Project", target_id=project.pk, project=project)
+    return project
@@ -0,0 +1,354 @@
+import copy
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase
+
+MANAGE = str(Path(settings.BASE_DIR) / "manage.py")
+
+# One worker: fill the "demo" namespace, then serve a request per line read
+# from stdin, printing what the cache holds as the view sees it.
+WORKER = """
+import sys
+from django.http import HttpResponse
+from django.test import RequestFactory
+from core.invalidation import InvalidationMiddleware, local_cache
+
+cache = local_cache("demo")
+handler = InvalidationMiddleware(lambda request: HttpResponse(cache.get("answer", "dropped")))
+handler(RequestFactory().get("/"))
+cache.set("answer", "cached")
+print("ready", flush=True)
+for _ in sys.stdin:
+    print(handler(RequestFactory().get("/")).content.decode(), flush=True)
+"""
+
+INVALIDATE = "from core.invalidation import invalidate; invalidate('demo')"
+
+REPLICATED = """
+from accounts.models import Role, User
+from core.testing import seed_project
+from organizations.models import Organization
+
+admin = User.objects.create_user("admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR))
+organization = Organization.objects.create(name="Org")
+organization.members.add(admin)
+project = seed_project(organization, [admin], categories=1, tasks_per_category=1)
+project.name = "Replicated"
+project.save()
+"""
+
+# Runs with the replica configured: adds a project the replica has not
+# seen, then reports which projects each request listed.
+READER = """
+import json
+from django.test import Client, override_settings
+from accounts.models import User
+from organizations.models import Organization
+from projects.models import Project
+from tasks.models import TaskInstance
+
+Project.objects.create(name="Unreplicated", organization=Organization.objects.get())
+task = TaskInstance.objects.filter(project__name="Replicated", stage=TaskInstance.TODO).first()
+client = Client()
+client.force_login(User.objects.get(username="admin"))
+
+def listed(url="/projects/"):
+    content = client.get(url).content.decode()
+    return [name for name in ("Replicated", "Unreplicated") if name in content]
+
+results = {}
+with override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"):
+    results["replica"] = listed()
+    results["unmarked"] = client.get(f"/projects/{Project.objects.get(name='Unreplicated').pk}/").status_code
+    moved = client.post(f"/tasks/{task.pk}/move/", {"stage": TaskInstance.IN_PROGRESS})
+    results["sticky_cookie"] = moved.cookies.get("pms_primary", {}).get("max-age")
+    results["after_write"] = listed()
+    client.cookies.pop("pms_primary", None)
+    results["after_expiry"] = listed()
+print(json.dumps(results))
+"""
+
+
+def sqlite_env(path):
+    """Settings for a subprocess on its own SQLite file, whatever the tests run on."""
+    return {"DB_ENGINE": "django.db.backends.sqlite3", "DB_NAME": path}
+
+
+class InvalidationBusTests(SimpleTestCase):
+    """Workers are separate processes sharing one SQLite file, as under gunicorn."""
+
+    WORKERS = 3
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.env = {**os.environ, **sqlite_env(os.path.join(directory.name, "bus.sqlite3"))}
+        self.manage("migrate", "-v0")
+
+    def manage(self, *args, **kwargs):
+        return subprocess.run(
+            [sys.executable, MANAGE, *args], env=self.env, check=True, capture_output=True, text=True, **kwargs
+        )
+
+    def start_workers(self):
+        workers = []
+        for _ in range(self.WORKERS):
+            worker = subprocess.Popen(
+                [sys.executable, MANAGE, "shell", "-c", WORKER],
+                env=self.env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            self.addCleanup(worker.wait, timeout=30)
+            self.addCleanup(worker.stdin.close)
+            workers.append(worker)
+        for worker in workers:
+            self.assertEqual(worker.stdout.readline().strip(), "ready")
+        return workers
+
+    def serve_one_request(self, workers):
+        for worker in workers:
+            worker.stdin.write("\n")
+            worker.stdin.flush()
+        return [worker.stdout.readline().strip() for worker in workers]
+
+    def test_every_worker_drops_its_copy_on_the_next_request(self):
+        workers = self.start_workers()
+        self.assertEqual(self.serve_one_request(workers), ["cached"] * self.WORKERS)
+
+        self.manage("shell", "-c", INVALIDATE)
+        self.assertEqual(self.serve_one_request(workers), ["dropped"] * self.WORKERS)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    """Two SQLite files: the replica is a copy taken before the primary moved on."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        primary = os.path.join(directory.name, "primary.sqlite3")
+        replica = os.path.join(directory.name, "replica.sqlite3")
+        env = {**os.environ, **sqlite_env(primary)}
+        for args in (["migrate", "-v0"], ["shell", "-c", REPLICATED]):
+            subprocess.run([sys.executable, MANAGE, *args], env=env, check=True, capture_output=True)
+        shutil.copy(primary, replica)
+        self.env = {**env, "DB_REPLICAS": replica, "REPLICA_STICKY_SECONDS": "7"}
+
+    def test_marked_views_read_from_the_replica_until_the_user_writes(self):
+        output = subprocess.run(
+            [sys.executable, MANAGE, "shell", "-c", READER],
+            env=self.env, check=True, capture_output=True, text=True,
+        ).stdout
+        results = json.loads(output.splitlines()[-1])
+        self.assertEqual(results["replica"], ["Replicated"])
+        # Unmarked views and sessions read from the primary
+        self.assertEqual(results["unmarked"], 200)
+        self.assertEqual(results["sticky_cookie"], 7)
+        self.assertEqual(results["after_write"], ["Replicated", "Unreplicated"])
+        self.assertEqual(results["after_expiry"], ["Replicated"])
+
+
+@skipUnless(connection.vendor == "postgresql", "the connection pool is for PostgreSQL")
+class ConnectionPoolTests(SimpleTestCase):
+    """``core.db_pool`` against the test database, one pool per test."""
+
+    databases = {"default"}
+
+    def pooled(self, health_checks=True, **pool):
+        from core.db_pool.base import DatabaseWrapper
+
+        settings_dict = copy.deepcopy(connection.settings_dict)
+        settings_dict.update(ENGINE="core.db_pool", CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=health_checks)
+        settings_dict["OPTIONS"]["pool"] = {"min_size": 0, "max_size": 2, **pool}
+        wrapper = DatabaseWrapper(settings_dict, alias=self._testMethodName)
+        wrapper.ensure_connection()
+        self.addCleanup(self.close_pool, wrapper.alias)
+        return wrapper
+
+    def close_pool(self, alias):
+        from core.db_pool.base import _pools
+
+        for key in [key for key in _pools if key[1] == alias]:
+            _pools.pop(key).closeall()
+
+    def pid(self, wrapper):
+        with wrapper.cursor() as cursor:
+            cursor.execute("SELECT pg_backend_pid()")
+            return cursor.fetchone()[0]
+
+    def terminate(self, pid):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_terminate_backend(%s)", [pid])
+
+    def test_connections_are_borrowed_and_returned(self):
+        first, second = self.pooled(), self.pooled()
+        pids = {self.pid(first), self.pid(second)}
+        self.assertEqual(len(pids), 2)
+        first.close()
+        second.close()
+
+        # Both come back from the pool, not just min_size of them
+        again = [self.pooled(), self.pooled()]
+        self.assertEqual({self.pid(wrapper) for wrapper in again}, pids)
+
+    def test_past_max_size_connections_are_not_pooled(self):
+        pooled = self.pooled(max_size=1)
+        overflow = self.pooled(max_size=1)
+        raw = overflow.connection
+        overflow.close()
+        self.assertTrue(raw.closed)
+        pooled.close()
+        self.assertFalse(pooled.connection)
+
+    def test_connection_broken_in_use_is_discarded(self):
+        wrapper = self.pooled(health_checks=False)
+        pid = self.pid(wrapper)
+        raw = wrapper.connection
+        self.terminate(pid)
+        with self.assertRaises(OperationalError):
+            self.pid(wrapper)
+        wrapper.close()
+        self.assertTrue(raw.closed)
+        self.assertNotEqual(self.pid(self.pooled(health_checks=False)), pid)
+
+    def test_connection_dropped_while_idle_is_replaced(self):
+        wrapper = self.pooled()
+        pid = self.pid(wrapper)
+        wrapper.close()
+        self.terminate(pid)
+        self.assertNotEqual(self.pid(self.pooled()), pid)
+
+
+class FakeConnection:
+    """Stands in for a psycopg2 connection in ``ConnectionPoolBookkeepingTests``."""
+
+    def __init__(self, *args, **kwargs):
+        from psycopg2 import extensions
+
+        self.closed = 0
+        self.rolled_back = False
+        self.info = SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+
+    def rollback(self):
+        from psycopg2 import extensions
+
+        self.rolled_back = True
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@mock.patch("psycopg2.connect", FakeConnection)
+class ConnectionPoolBookkeepingTests(SimpleTestCase):
+    """Checkout and return in ``core.db_pool``, without a server."""
+
+    def pool(self, min_size=0, max_size=2):
+        from core.db_pool.base import ConnectionPool
+
+        return ConnectionPool("bookkeeping", min_size, max_size, dbname="unused")
+
+    def test_returned_connection_is_reused(self):
+        pool = self.pool()
+        first, idle = pool.checkout()
+        self.assertFalse(idle)
+        pool.putconn(first)
+        again, idle = pool.checkout()
+        self.assertIs(again, first)
+        self.assertTrue(idle)
+
+    def test_keeps_up_to_max_size_idle(self):
+        pool = self.pool(min_size=0, max_size=2)
+        connections = [pool.checkout()[0] for _ in range(2)]
+        for conn in connections:
+            pool.putconn(conn)
+        self.assertEqual(pool._pool, connections)
+        self.assertFalse(any(conn.closed for conn in connections))
+        self.assertEqual(pool.minconn, 0)
+
+    def test_exhausted_pool_refuses_checkout(self):
+        from psycopg2.pool import PoolError
+
+        pool = self.pool(max_size=1)
+        pool.checkout()
+        with self.assertRaises(PoolError):
+            pool.checkout()
+
+    def test_connection_returned_in_a_transaction_is_rolled_back(self):
+        from psycopg2 import extensions
+
+        pool = self.pool()
+        conn, _idle = pool.checkout()
+        conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        pool.putconn(conn)
+        self.assertTrue(conn.rolled_back)
+        self.assertIs(pool.checkout()[0], conn)
+
+    def test_lost_connection_is_discarded(self):
+        from psycopg2 import extensions
+
+        pool = self.pool()
+        lost, _idle = pool.checkout()
+        lost.info.transaction_status = extensions.TRANSACTION_STATUS_UNKNOWN
+        pool.putconn(lost)
+        self.assertTrue(lost.closed)
+        replacement, idle = pool.checkout()
+        self.assertIsNot(replacement, lost)
+        self.assertFalse(idle)
+
+
+class BenchmarkBaselineTests(SimpleTestCase):
+    """``benchmark_views --baseline`` fails on regressions against a saved report."""
+
+    BASELINE = {
+        "task_board": {"p95_ms": 100.0, "queries_per_request": 12.0, "errors": 0},
+        "task_move": {"p95_ms": 50.0, "queries_per_request": 17.0, "errors": 0},
+    }
+
+    def compare(self, views, threshold=0.2):
+        from core.management.commands.benchmark_views import Command
+
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as file:
+            json.dump({"views": self.BASELINE}, file)
+        self.addCleanup(os.unlink, file.name)
+        command = Command(stdout=StringIO())
+        command._compare({"views": views}, file.name, threshold)
+        return command.stdout.getvalue()
+
+    def test_within_threshold(self):
+        output = self.compare({
+            "task_board": {"p95_ms": 115.0, "queries_per_request": 12.4, "errors": 0},
+            "task_move": {"p95_ms": 40.0, "queries_per_request": 17.0, "errors": 0},
+            "dashboard": {"p95_ms": 999.0, "queries_per_request": 99.0, "errors": 0},
+        })
+        self.assertIn("No regressions", output)
+
+    def test_regressions_are_reported(self):
+        with self.assertRaises(CommandError) as raised:
+            self.compare({
+                "task_board": {"p95_ms": 130.0, "queries_per_request": 12.0, "errors": 0},
+                "task_move": {"p95_ms": 50.0, "queries_per_request": 18.0, "errors": 2},
+            })
+        message = str(raised.exception)
+        self.assertIn("task_board: p95 130.0 ms > 120.0 ms", message)
+        self.assertIn("task_move: 18.0 queries per request (baseline 17.0)", message)
+        self.assertIn("task_move: 2 errors", message)
+
+    def test_unreadable_baseline(self):
+        from core.management.commands.benchmark_views import Command
+
+        with self.assertRaisesMessage(CommandError, "Cannot read baseline"):
+            Command()._compare({"views": {}}, "/nonexistent/baseline.json", 0.2)
@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.urls import include, path
 
 from dashboard.views import dashboard
+from logs.views import metrics
 
 urlpatterns = [
     # path("admin/", admin.site.urls),
@@ -13,4 +14,5 @@ urlpatterns = [
     path("tasks/", include("tasks.urls")),
     path("general-tasks/", include("general_tasks.urls")),
     path("logs/", include("logs.urls")),
+    path("metrics", metrics, name="metrics"),
 ]
@@ -1,33 +1,72 @@
 from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Max
 from django.shortcuts import render
+from django.utils import timezone
 
+from core.conditional import conditional_page, private_etag
+from core.replicas import read_from_replica
 from projects.models import Project
+from tasks.cards import task_cards
 from tasks.models import TaskInstance
 
 
+def _dashboard_etag(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    projects = Project.objects.all()
+    tasks = TaskInstance.objects.none()
+    if not user.is_system_admin():
+        projects = projects.filter(organization__members=user).distinct()
+        # Assigned tasks can sit in projects the user no longer sees
+        tasks = TaskInstance.objects.filter(assignees=user)
+    # The project cards show progress over every task of the project, not
+    # just the user's. A project's sequence advances on every write to it
+    # (tasks, assignees, the project itself), so listing it per project
+    # catches any change and which projects are listed at all.
+    projects = projects.order_by("pk").values_list(
+        "pk", "change_sequence__value", "change_sequence__reset_below"
+    )
+    # change_seq only grows within a project, so its maximum moves on every
+    # save of these tasks; the count catches assignments and archiving
+    tasks = (
+        tasks.order_by("project_id")
+        .values("project_id")
+        .annotate(changes=Max("change_seq"), count=Count("pk"))
+        .values_list("project_id", "changes", "count")
+    )
+    return private_etag(request, "dashboard", list(projects), list(tasks), timezone.now().date())
+
+
+@read_from_replica
 @login_required
+@conditional_page(_dashboard_etag)
 def dashboard(request):
     user = request.user
 
+    # Card stats and progress come with the list, not from a query per card
+    projects = Project.objects.with_task_stats().with_progress().select_related("organization")
     if user.is_system_admin():
-        projects = Project.objects.select_related("organization").all()[:10]
+        projects = projects.all()[:10]
     else:
         # User can see projects in their member organizations
         user_orgs = user.member_organizations.values_list('id', flat=True)
-        projects = Project.objects.filter(
+        projects = projects.filter(
             organization_id__in=user_orgs
-        ).distinct().select_related("organization")[:10]
+        ).distinct()[:10]
 
     # Project count
     total_projects = projects.count()
 
     # Recent tasks for this user (active only) - only show assigned tasks
     if user.is_system_admin():
-        recent_tasks = TaskInstance.objects.filter(is_closed=False).select_related("project").all()[:10]
+        recent_tasks = task_cards(
+            TaskInstance.objects.filter(is_closed=False), with_project=True, limit=10
+        )
     else:
-        recent_tasks = TaskInstance.objects.filter(
-            assignees=user, is_closed=False
-        ).select_related("project")[:10]
+        recent_tasks = task_cards(
+            TaskInstance.objects.filter(assignees=user, is_closed=False), with_project=True, limit=10
+        )
 
     # Stats (active tasks only) - only count assigned tasks
     if user.is_system_admin():
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class LogsConfig(AppConfig):
     name = 'logs'
+
+    def ready(self):
+        from . import metrics  # noqa: F401
@@ -0,0 +1,155 @@
+"""Per-request database and template timings.
+
+``RequestInstrumentationMiddleware`` wraps every database connection with
+``execute_wrapper`` for the duration of a request and records each query's
+SQL and time, plus the time spent rendering templates. The totals go out in
+a ``Server-Timing`` header, which browser developer tools show next to the
+request. Requests slower than ``settings.SLOW_REQUEST_MS`` or running more
+than ``settings.SLOW_REQUEST_QUERIES`` queries are logged together with the
+statements they repeated most, the usual sign of an N+1 loop.
+
+Everything is kept per request in the worker that serves it, so it behaves
+the same under any number of gunicorn workers. Each query goes through one
+more ``execute_wrapper`` call, which costs about 1 µs. A query round trip to
+PostgreSQL takes at least a few hundred, so even the board's dozen queries
+pay well under 0.1 ms per request. ``settings.REQUEST_INSTRUMENTATION`` is
+off by default; then the middleware removes itself at startup and costs
+nothing.
+"""
+
+import contextvars
+import functools
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+class RequestStats:
+    """Queries and template time of one request.
+
+    An instance is also the ``execute_wrapper`` installed on each connection.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.duration = None
+        self.statements = Counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self._rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - started
+            self.query_count += 1
+            self.statements[sql] += 1
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    @property
+    def repeated(self):
+        """Queries whose SQL (parameters aside) already ran in this request."""
+        return self.query_count - len(self.statements)
+
+    def top_repeated(self, limit):
+        return [(sql, count) for sql, count in self.statements.most_common(limit) if count > 1]
+
+    def server_timing(self):
+        return ", ".join([
+            f'db;dur={self.query_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'db-repeated;desc="{self.repeated} repeated"',
+            f"tpl;dur={self.template_time * 1000:.1f}",
+            f"total;dur={self.duration * 1000:.1f}",
+        ])
+
+
+def current_stats():
+    """The ``RequestStats`` of the request being served, or None."""
+    return _current.get()
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        if stats is None or stats._rendering:
+            # Templates rendered inside another render are already counted
+            return render(self, *args, **kwargs)
+        stats._rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.template_time += time.perf_counter() - started
+            stats._rendering = False
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def _instrument_templates():
+    if not getattr(Template.render, "instrumented", False):
+        Template.render = _timed_render(Template.render)
+
+
+class RequestInstrumentationMiddleware:
+    """Add ``Server-Timing`` to every response and log slow requests."""
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        _instrument_templates()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        stats.finish()
+
+        response["Server-Timing"] = stats.server_timing()
+        if (
+            stats.duration * 1000 >= settings.SLOW_REQUEST_MS
+            or stats.query_count >= settings.SLOW_REQUEST_QUERIES
+        ):
+            _log_slow_request(request, response, stats)
+        return response
+
+
+def _log_slow_request(request, response, stats):
+    lines = [
+        "Slow request %s %s %s: %.0f ms, %d queries in %.0f ms (%d repeated), templates %.0f ms" % (
+            request.method,
+            request.get_full_path(),
+            response.status_code,
+            stats.duration * 1000,
+            stats.query_count,
+            stats.query_time * 1000,
+            stats.repeated,
+            stats.template_time * 1000,
+        )
+    ]
+    for sql, count in stats.top_repeated(settings.SLOW_REQUEST_TOP_QUERIES):
+        lines.append(f"  {count:>4}x {sql[:500]}")
+    logger.warning("\n".join(lines))
@@ -0,0 +1,231 @@
+"""Prometheus metrics, added up over every worker process.
+
+Code records events with ``inc()`` and ``observe()``; ``MetricsMiddleware``
+records the latency, status and query count of each request, and
+``views.metrics`` serves everything in the Prometheus text format.
+
+Each process keeps its numbers in memory. With ``settings.METRICS_DIR`` set,
+each process also writes them to its own JSON file there, at most once per
+``settings.METRICS_FLUSH_INTERVAL`` seconds and whenever it answers a scrape.
+A scrape adds up every file in the directory, including those of workers
+that have exited, so counters never go backwards when gunicorn replaces a
+worker. Empty the directory when the service starts. Without
+``METRICS_DIR`` only the process answering the scrape is reported, which is
+what runserver and the tests need.
+
+Database connections are counted when Django opens one and when a request
+finds one still open from an earlier request; ``core.db_pool`` counts its
+own. Their ratio shows whether ``CONN_MAX_AGE`` or the pool is working.
+
+Hit ratios are left to the query side, e.g.
+``rate(pms_cache_requests_total{result="hit"}[5m]) / rate(pms_cache_requests_total[5m])``.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .instrumentation import current_stats
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+# Upper bounds in seconds, as used by the official Prometheus clients
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "pms_http_requests_total": (COUNTER, "Requests served, by view, method and status."),
+    "pms_http_request_duration_seconds": (HISTOGRAM, "Time taken to produce a response, by view."),
+    "pms_db_queries_total": (COUNTER, "Database queries run while serving requests, by view."),
+    "pms_db_query_seconds_total": (COUNTER, "Time spent in database queries, by view."),
+    "pms_audit_log_writes_total": (COUNTER, "Audit log entries written, by action."),
+    "pms_task_moves_total": (COUNTER, "Tasks moved on the board, by target stage."),
+    "pms_task_clones_total": (COUNTER, "Tasks cloned by stage transitions, by category of the clone."),
+    "pms_cache_requests_total": (COUNTER, "Cache lookups, by cache and result (hit or miss)."),
+    "pms_db_connections_total": (
+        COUNTER,
+        "Database connections, by database and result: opened, reused, or overflow (opened past the pool size).",
+    ),
+}
+
+_lock = threading.Lock()
+_values = {}
+_pid = None
+_filename = None
+_flushed = 0.0
+
+
+def inc(name, amount=1, **labels):
+    """Add ``amount`` to counter ``name``."""
+    key = _key(name, COUNTER, labels)
+    with _lock:
+        values = _own_values()
+        values[key] = values.get(key, 0) + amount
+
+
+def observe(name, value, **labels):
+    """Record ``value`` in histogram ``name``."""
+    key = _key(name, HISTOGRAM, labels)
+    with _lock:
+        values = _own_values()
+        histogram = values.get(key)
+        if histogram is None:
+            # One count per bucket (not cumulative), then +Inf, sum, count
+            histogram = values[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        histogram[i] += 1
+        histogram[-2] += value
+        histogram[-1] += 1
+
+
+def flush(force=False):
+    """Write this process's numbers to its file in ``METRICS_DIR``, if set."""
+    global _flushed
+    directory = settings.METRICS_DIR
+    now = time.monotonic()
+    if not directory or (not force and now - _flushed < settings.METRICS_FLUSH_INTERVAL):
+        return
+    with _lock:
+        values = _own_values()
+        data = json.dumps([[name, list(labels), value] for (name, labels), value in values.items()])
+        filename = _filename
+        _flushed = now
+    os.makedirs(directory, exist_ok=True)
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(handle, "w") as file:
+        file.write(data)
+    os.replace(temporary, os.path.join(directory, filename))
+
+
+def collect():
+    """``{(name, labels): value}`` added up over every process."""
+    directory = settings.METRICS_DIR
+    if not directory:
+        with _lock:
+            return {key: _copy(value) for key, value in _own_values().items()}
+
+    flush(force=True)
+    totals = {}
+    for path in Path(directory).glob("*.json"):
+        try:
+            entries = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in entries:
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if key not in totals:
+                totals[key] = _copy(value)
+            elif isinstance(value, list):
+                totals[key] = [a + b for a, b in zip(totals[key], value)]
+            else:
+                totals[key] += value
+    return totals
+
+
+def render():
+    """Every metric in the Prometheus text exposition format."""
+    samples = {}
+    for (name, labels), value in collect().items():
+        samples.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(samples.get(name, ())):
+            if kind == HISTOGRAM:
+                cumulative = 0
+                for bound, count in zip([*BUCKETS, "+Inf"], value):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels, le=bound)} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {value[-2]}")
+                lines.append(f"{name}_count{_labels(labels)} {value[-1]}")
+            else:
+                lines.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def _key(name, kind, labels):
+    if METRICS.get(name, (None,))[0] != kind:
+        raise ValueError(f"{name!r} is not a known {kind}.")
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _own_values():
+    """This process's values; a forked child starts from zero in a new file."""
+    global _pid, _filename, _values
+    pid = os.getpid()
+    if pid != _pid:
+        _pid = pid
+        _values = {}
+        _filename = f"{pid}-{uuid.uuid4().hex[:8]}.json"
+    return _values
+
+
+def _copy(value):
+    return list(value) if isinstance(value, list) else value
+
+
+def _labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsMiddleware:
+    """Count each request and time it, by the name of the view that served it.
+
+    Query counts come from ``RequestInstrumentationMiddleware``, which must
+    come earlier in ``MIDDLEWARE``; they are skipped when it is disabled.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        for connection in connections.all(initialized_only=True):
+            # Still open from an earlier request of this thread (CONN_MAX_AGE)
+            if connection.connection is not None:
+                inc("pms_db_connections_total", database=connection.alias, result="reused")
+        response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        view = match.view_name if match else "unresolved"
+        inc("pms_http_requests_total", view=view, method=request.method, status=response.status_code)
+        observe("pms_http_request_duration_seconds", duration, view=view)
+        stats = current_stats()
+        if stats is not None:
+            inc("pms_db_queries_total", stats.query_count, view=view)
+            inc("pms_db_query_seconds_total", stats.query_time, view=view)
+        flush()
+        return response
+
+
+@receiver(connection_created)
+def _count_connection(sender, connection, **kwargs):
+    # A pooling backend counts its own connections
+    if not getattr(connection, "pools_connections", False):
+        inc("pms_db_connections_total", database=connection.alias, result="opened")
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('database', models.CharField(max_length=100)),
+                ('normalized_sql', models.TextField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0)),
+                ('worst_ms', models.FloatField(default=0)),
+                ('sql', models.TextField(blank=True)),
+                ('params', models.TextField(blank=True)),
+                ('plan', models.TextField(blank=True)),
+                ('path', models.CharField(blank=True, max_length=500)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'slow queries',
+                'ordering': ['-worst_ms'],
+            },
+        ),
+    ]
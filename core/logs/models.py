@@ -39,3 +39,36 @@ class AuditLog(models.Model):
     def delete(self, *args, **kwargs):
         # Immutable: block deletion (except superuser hard delete via raw SQL)
         return
+
+
+class SlowQuery(models.Model):
+    """A statement that ran over ``settings.SLOW_QUERY_MS``, one row per fingerprint.
+
+    Written by ``logs.slow_queries``, which keeps at most
+    ``settings.SLOW_QUERY_MAX_ENTRIES`` rows.
+    """
+
+    fingerprint = models.CharField(max_length=40, unique=True)
+    database = models.CharField(max_length=100)
+    normalized_sql = models.TextField()
+    count = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    # The slowest run: its statement, parameters, plan and page
+    worst_ms = models.FloatField(default=0)
+    sql = models.TextField(blank=True)
+    params = models.TextField(blank=True)
+    plan = models.TextField(blank=True)
+    path = models.CharField(max_length=500, blank=True)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-worst_ms"]
+        verbose_name_plural = "slow queries"
+
+    def __str__(self):
+        return f"{self.worst_ms:.0f} ms x{self.count}: {self.normalized_sql[:80]}"
+
+    @property
+    def average_ms(self):
+        return self.total_ms / self.count if self.count else 0
@@ -0,0 +1,210 @@
+"""On-demand cProfile runs of single requests.
+
+A system administrator adds ``?_profile=1`` to a URL, or sends an
+``X-Profile: 1`` header, and ``ProfilingMiddleware`` runs that request under
+``cProfile``. The ``pstats`` dump and a summary with the most expensive
+functions are written to ``settings.PROFILING_DIR``, which keeps the newest
+``settings.PROFILING_KEEP`` profiles and deletes older ones. The response
+carries the profile's id in an ``X-Profile-Id`` header, and the profiles are
+listed, shown and downloaded at ``logs:profile_list``.
+
+Profiling slows a request down several times, so at most
+``settings.PROFILING_RATE_LIMIT`` profiles are taken per minute, counted
+from the files in the directory so the limit holds across every worker
+sharing it, and each process profiles one request at a time. Requests over
+the limit are served normally with ``X-Profile: rate-limited``.
+
+The middleware sits after ``AuthenticationMiddleware``, so the profile
+covers the view and the middleware below it, not sessions or
+authentication.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentation import current_stats
+
+QUERY_PARAMETER = "_profile"
+HEADER = "X-Profile"
+
+_ID = re.compile(r"^\d{8}T\d{12}-\d+-[0-9a-f]{8}$")
+_lock = threading.Lock()
+
+
+def directory():
+    return Path(settings.PROFILING_DIR or Path(tempfile.gettempdir()) / "pms-profiles")
+
+
+def profile_ids():
+    """Ids of the stored profiles, newest first."""
+    try:
+        names = [path.stem for path in directory().glob("*.json")]
+    except OSError:
+        return []
+    return sorted((name for name in names if _ID.match(name)), reverse=True)
+
+
+def summary(profile_id):
+    """The stored summary of ``profile_id``, or None."""
+    if not _ID.match(profile_id):
+        return None
+    try:
+        return json.loads((directory() / f"{profile_id}.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def stats_path(profile_id):
+    """Path of the ``pstats`` dump of ``profile_id``, or None."""
+    path = directory() / f"{profile_id}.prof"
+    if not _ID.match(profile_id) or not path.is_file():
+        return None
+    return path
+
+
+def _requested(request):
+    return request.GET.get(QUERY_PARAMETER) == "1" or request.headers.get(HEADER) == "1"
+
+
+def _allowed():
+    """Whether another profile fits in the per-minute limit."""
+    since = time.time() - 60
+    recent = 0
+    for profile_id in profile_ids():
+        try:
+            if (directory() / f"{profile_id}.json").stat().st_mtime >= since:
+                recent += 1
+        except OSError:
+            continue
+    return recent < settings.PROFILING_RATE_LIMIT
+
+
+class ProfilingMiddleware:
+    """Profile requests of system administrators that ask for it."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (_requested(request) and request.user.is_authenticated and request.user.is_system_admin()):
+            return self.get_response(request)
+        if not _allowed() or not _lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response[HEADER] = "rate-limited"
+            return response
+
+        try:
+            started = datetime.now(timezone.utc)
+            profiler = cProfile.Profile()
+            queries_before = _query_count()
+            began = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+            duration = time.perf_counter() - began
+            profile_id = _save(profiler, {
+                "method": request.method,
+                "path": request.get_full_path(),
+                "user": request.user.username,
+                "status": response.status_code,
+                "started": started.isoformat(),
+                "duration_ms": round(duration * 1000, 1),
+                "queries": _query_count() - queries_before,
+            }, started)
+        finally:
+            _lock.release()
+        response["X-Profile-Id"] = profile_id
+        return response
+
+
+def _query_count():
+    stats = current_stats()
+    return stats.query_count if stats is not None else 0
+
+
+def _save(profiler, details, started):
+    """Write the dump and summary of ``profiler``, drop the oldest, return the id."""
+    folder = directory()
+    folder.mkdir(parents=True, exist_ok=True)
+    profile_id = f"{started:%Y%m%dT%H%M%S%f}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+    stats = pstats.Stats(profiler)
+    details.update(
+        id=profile_id,
+        total_calls=stats.total_calls,
+        primitive_calls=stats.prim_calls,
+        functions=_top_functions(stats, settings.PROFILING_TOP),
+    )
+    # The dump goes first: a profile is listed once its summary exists
+    _write(folder / f"{profile_id}.prof", profiler.dump_stats)
+    _write(folder / f"{profile_id}.json", lambda path: Path(path).write_text(json.dumps(details)))
+
+    for old in profile_ids()[settings.PROFILING_KEEP:]:
+        for suffix in (".json", ".prof"):
+            try:
+                (folder / f"{old}{suffix}").unlink()
+            except FileNotFoundError:
+                pass
+    return profile_id
+
+
+def _write(path, write):
+    handle, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(handle)
+    try:
+        write(temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _top_functions(stats, limit):
+    """The ``limit`` functions with the most cumulative time."""
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            "function": _describe(function),
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "own_ms": round(own * 1000, 2),
+            "cumulative_ms": round(cumulative * 1000, 2),
+        }
+        for function, (primitive_calls, calls, own, cumulative, _callers) in rows
+    ]
+
+
+def _describe(function):
+    filename, line, name = function
+    if filename == "~":
+        # Built-in functions have no file
+        return name
+    filename = _short_path(filename)
+    return f"{filename}:{line}({name})"
+
+
+def _short_path(filename):
+    base = str(settings.BASE_DIR) + os.sep
+    if filename.startswith(base):
+        return filename[len(base):]
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
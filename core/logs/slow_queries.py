@@ -0,0 +1,211 @@
+"""Slow statements with their query plans.
+
+``SlowQueryMiddleware`` wraps every database connection with
+``execute_wrapper`` for the duration of a request. A statement that takes
+longer than ``settings.SLOW_QUERY_MS`` is explained on the spot, on the same
+connection and with the same parameters (``EXPLAIN`` on PostgreSQL,
+``EXPLAIN QUERY PLAN`` on SQLite), so the plan is the one the database
+actually chose. After the response is produced the captures are saved to
+``SlowQuery``, one row per fingerprint: the SQL with literals, parameters
+and ``IN`` lists of any length folded together. Each row counts the runs
+and keeps the statement, parameters and plan of the slowest one. Only the
+``settings.SLOW_QUERY_MAX_ENTRIES`` most recently seen fingerprints are
+kept.
+
+A fingerprint is explained at most once per
+``settings.SLOW_QUERY_EXPLAIN_INTERVAL`` seconds in each process, so a
+statement that is slow on every request does not double its cost. The
+``EXPLAIN`` runs on a driver cursor of its own and skips the other execute
+wrappers, so it is not counted as a query of the request.
+
+Capture is off by default. It adds a timer around every statement (see
+``logs.instrumentation`` for what a wrapper costs) and an EXPLAIN of each
+new slow statement on the request's own time, so turn it on with
+``settings.SLOW_QUERY_CAPTURE`` while looking for slow queries.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|\?")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACE = re.compile(r"\s+")
+
+# Fingerprint -> monotonic time of its last EXPLAIN in this process
+_explained = {}
+
+
+def normalize(sql):
+    """``sql`` with its literals and parameters replaced by ``?``."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+class Capture:
+    """One statement over the threshold."""
+
+    def __init__(self, database, sql, params, duration_ms):
+        self.database = database
+        self.sql = sql
+        self.params = params
+        self.duration_ms = duration_ms
+        self.normalized_sql = normalize(sql)
+        self.fingerprint = fingerprint(self.normalized_sql)
+        self.plan = ""
+
+
+class SlowQueryCollector:
+    """The ``execute_wrapper`` that captures slow statements of one request."""
+
+    def __init__(self):
+        self.captures = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - started) * 1000
+        if duration_ms >= settings.SLOW_QUERY_MS:
+            connection = context["connection"]
+            capture = Capture(connection.alias, sql, None if many else params, duration_ms)
+            if not many and _should_explain(capture.fingerprint, sql):
+                capture.plan = explain(connection, sql, params)
+            self.captures.append(capture)
+        return result
+
+
+def _should_explain(key, sql):
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return False
+    now = time.monotonic()
+    if now - _explained.get(key, float("-inf")) < settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+        return False
+    _explained[key] = now
+    return True
+
+
+def explain(connection, sql, params):
+    """The plan of ``sql``, or an empty string if the database refused."""
+    try:
+        prefix = connection.ops.explain_query_prefix()
+    except DatabaseError:
+        return ""
+    # Inside a transaction a failed EXPLAIN must not abort the request's
+    # own work, so it runs in a savepoint. The driver's errors are caught
+    # as they are raised, before Django would translate them.
+    savepoint = connection.in_atomic_block and connection.features.uses_savepoints
+    cursor = connection.create_cursor()
+    try:
+        if savepoint:
+            cursor.execute("SAVEPOINT pms_explain")
+        try:
+            cursor.execute(f"{prefix} {sql}", params)
+            rows = cursor.fetchall()
+        except connection.Database.Error:
+            if savepoint:
+                cursor.execute("ROLLBACK TO SAVEPOINT pms_explain")
+            raise
+        finally:
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT pms_explain")
+    except connection.Database.Error:
+        logger.warning("Could not explain slow query: %s", sql[:500], exc_info=True)
+        return ""
+    finally:
+        cursor.close()
+    return "\n".join(row[0] if len(row) == 1 else " ".join(str(column) for column in row) for row in rows)
+
+
+def save(captures, path=""):
+    """Add ``captures`` to their ``SlowQuery`` rows and drop the oldest rows."""
+    from .models import SlowQuery
+
+    now = timezone.now()
+    created = False
+    for capture in captures:
+        rows = SlowQuery.objects.filter(fingerprint=capture.fingerprint)
+        updated = rows.update(
+            count=F("count") + 1,
+            total_ms=F("total_ms") + capture.duration_ms,
+            last_seen=now,
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    SlowQuery.objects.create(
+                        fingerprint=capture.fingerprint,
+                        database=capture.database,
+                        normalized_sql=capture.normalized_sql,
+                        count=1,
+                        total_ms=capture.duration_ms,
+                        last_seen=now,
+                    )
+                created = True
+            except IntegrityError:
+                # Another worker saved the same fingerprint first
+                rows.update(count=F("count") + 1, total_ms=F("total_ms") + capture.duration_ms, last_seen=now)
+
+        worst = {
+            "worst_ms": capture.duration_ms,
+            "sql": capture.sql,
+            "params": "" if capture.params is None else repr(tuple(capture.params))[:10000],
+            "path": path[:500],
+        }
+        if capture.plan:
+            worst["plan"] = capture.plan
+        rows.filter(worst_ms__lt=capture.duration_ms).update(**worst)
+        if capture.plan:
+            # A plan may only be taken for a run that was not the slowest
+            rows.filter(plan="").update(plan=capture.plan)
+
+    if created:
+        keep = SlowQuery.objects.order_by("-last_seen").values_list("pk", flat=True)[: settings.SLOW_QUERY_MAX_ENTRIES]
+        SlowQuery.objects.exclude(pk__in=list(keep)).delete()
+
+
+class SlowQueryMiddleware:
+    """Capture slow statements of each request and save them afterwards.
+
+    Comes before ``RequestInstrumentationMiddleware`` in ``MIDDLEWARE`` so the
+    writes to ``SlowQuery`` are not counted as queries of the request.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_CAPTURE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = SlowQueryCollector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+
+        if collector.captures:
+            try:
+                save(collector.captures, request.get_full_path())
+            except DatabaseError:
+                logger.exception("Could not save %d slow queries", len(collector.captures))
+        return response
@@ -1,3 +1,316 @@
-from django.test import TestCase
+import json
+import os
+import pstats
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import Role, User
+from core.testing import seed_project
+from organizations.models import Organization
+from tasks.models import TaskInstance
+
+from . import metrics, profiling, slow_queries, tracing
+from .models import SlowQuery
+
+MANAGE = str(Path(settings.BASE_DIR) / "manage.py")
+
+WORKER = (
+    "from logs import metrics; "
+    "metrics.inc('pms_task_moves_total', stage='DONE'); "
+    "metrics.observe('pms_http_request_duration_seconds', 0.3, view='worker'); "
+    "metrics.flush(force=True)"
+)
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsEndpointTests(TestCase):
+    def test_requires_token_or_system_administrator(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer wrong").status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+        role = Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR)
+        self.client.force_login(User.objects.create_user("admin", role=role))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_exposes_request_metrics(self):
+        self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+        body = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret").content.decode()
+        self.assertIn("# TYPE pms_http_request_duration_seconds histogram", body)
+        self.assertIn('pms_http_requests_total{method="GET",status="200",view="metrics"}', body)
+        self.assertIn('pms_http_request_duration_seconds_bucket{view="metrics",le="+Inf"}', body)
+        # The test client keeps the connection open between requests
+        self.assertIn('pms_db_connections_total{database="default",result="reused"}', body)
+
+
+class MetricsAggregationTests(TestCase):
+    """Worker processes write their own files; a scrape adds them up."""
+
+    def test_adds_up_every_process(self):
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, "METRICS_DIR": directory}
+            for _ in range(2):
+                subprocess.run([sys.executable, MANAGE, "shell", "-c", WORKER], env=env, check=True)
+
+            with override_settings(METRICS_DIR=directory):
+                before = metrics.collect().get(("pms_task_moves_total", (("stage", "DONE"),)), 0)
+                metrics.inc("pms_task_moves_total", stage="DONE")
+                samples = metrics.collect()
+                body = metrics.render()
+
+        own = samples[("pms_task_moves_total", (("stage", "DONE"),))] - before
+        self.assertEqual(own, 1)
+        self.assertGreaterEqual(before, 2)
+        histogram = samples[("pms_http_request_duration_seconds", (("view", "worker"),))]
+        self.assertEqual(histogram[-1], 2)
+        self.assertIn('pms_http_request_duration_seconds_bucket{view="worker",le="0.25"} 0', body)
+        self.assertIn('pms_http_request_duration_seconds_bucket{view="worker",le="0.5"} 2', body)
+
+
+# Pages are rendered without running collectstatic first
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR))
+        cls.developer = User.objects.create_user("developer", role=Role.objects.create(name=Role.DEVELOPER))
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(PROFILING_DIR=self.directory, PROFILING_KEEP=3, PROFILING_RATE_LIMIT=10)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_profiles_system_administrators_only(self):
+        url = reverse("logs:audit_log_list")
+        self.client.force_login(self.developer)
+        self.assertNotIn("X-Profile-Id", self.client.get(url, {"_profile": "1"}))
+
+        self.client.force_login(self.admin)
+        self.assertNotIn("X-Profile-Id", self.client.get(url))
+        profile_id = self.client.get(url, HTTP_X_PROFILE="1")["X-Profile-Id"]
+
+        summary = profiling.summary(profile_id)
+        self.assertEqual(summary["path"], url)
+        self.assertEqual(summary["status"], 200)
+        self.assertTrue(any("audit_log_list" in row["function"] for row in summary["functions"]))
+
+        page = self.client.get(reverse("logs:profile_detail", args=[profile_id]))
+        self.assertContains(page, "audit_log_list")
+        download = self.client.get(reverse("logs:profile_download", args=[profile_id]))
+        path = Path(self.directory) / "download.prof"
+        path.write_bytes(b"".join(download.streaming_content))
+        self.assertGreater(pstats.Stats(str(path)).total_calls, 0)
+
+    def test_keeps_the_newest_profiles(self):
+        self.client.force_login(self.admin)
+        url = reverse("logs:profile_list")
+        ids = [self.client.get(url, {"_profile": "1"})["X-Profile-Id"] for _ in range(5)]
+        self.assertEqual(profiling.profile_ids(), ids[:1:-1])
+        self.assertEqual(len(list(Path(self.directory).iterdir())), 6)
+        self.assertContains(self.client.get(url), ids[-1])
+
+    @override_settings(PROFILING_RATE_LIMIT=2)
+    def test_rate_limited(self):
+        self.client.force_login(self.admin)
+        url = reverse("logs:profile_list")
+        responses = [self.client.get(url, {"_profile": "1"}) for _ in range(3)]
+        self.assertEqual(["X-Profile-Id" in response for response in responses], [True, True, False])
+        self.assertEqual(responses[-1]["X-Profile"], "rate-limited")
+        self.assertEqual(responses[-1].status_code, 200)
+
+    def test_pages_need_a_system_administrator(self):
+        self.client.force_login(self.developer)
+        self.assertRedirects(self.client.get(reverse("logs:profile_list")), reverse("dashboard"), fetch_redirect_response=False)
+        self.assertEqual(self.client.get(reverse("logs:profile_download", args=["x"])).status_code, 403)
+
+
+# Pages are rendered without running collectstatic first
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class RequestInstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR))
+
+    def get(self, **settings):
+        with self.settings(**settings):
+            # A new client loads the middleware under these settings
+            client = Client()
+            client.force_login(self.admin)
+            return client.get(reverse("logs:audit_log_list"))
+
+    def test_off_by_default(self):
+        self.assertNotIn("Server-Timing", self.get())
+
+    @override_settings(SLOW_REQUEST_QUERIES=1)
+    def test_slow_request_is_logged_when_on(self):
+        with self.assertLogs("logs.instrumentation", "WARNING") as logs:
+            response = self.get(REQUEST_INSTRUMENTATION=True)
+        self.assertRegex(response["Server-Timing"], r'desc="\d+ queries"')
+        self.assertIn("/logs/", logs.output[0])
+
+
+# Pages are rendered without running collectstatic first
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+    SLOW_QUERY_CAPTURE=True,
+)
+class SlowQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR))
+
+    def setUp(self):
+        slow_queries._explained.clear()
+
+    def test_normalize(self):
+        self.assertEqual(
+            slow_queries.normalize('SELECT "t"."id" FROM "t" U0 WHERE "t"."a" IN (%s, %s,\n %s) AND "t"."b" = \'x\' LIMIT 21'),
+            'SELECT "t"."id" FROM "t" U0 WHERE "t"."a" IN (...) AND "t"."b" = ? LIMIT ?',
+        )
+        self.assertEqual(
+            slow_queries.fingerprint(slow_queries.normalize("SELECT 1 FROM t WHERE a IN (%s)")),
+            slow_queries.fingerprint(slow_queries.normalize("SELECT 1 FROM t WHERE a IN (%s, %s, %s)")),
+        )
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_captures_statements_with_their_plans(self):
+        self.client.force_login(self.admin)
+        url = reverse("logs:audit_log_list")
+        counts = []
+        for _ in range(2):
+            self.client.get(url)
+            query = SlowQuery.objects.get(normalized_sql__contains='FROM "logs_auditlog"', normalized_sql__startswith="SELECT COUNT")
+            counts.append(query.count)
+        self.assertEqual(counts[1], 2 * counts[0])
+        self.assertEqual(query.path, url)
+        self.assertGreaterEqual(query.worst_ms, query.average_ms)
+        self.assertIn("logs_auditlog", query.plan)
+
+        page = self.client.get(reverse("logs:slow_query_list"), {"order": "count"})
+        self.assertContains(page, "logs_auditlog")
+
+    @override_settings(SLOW_QUERY_MS=0, SLOW_QUERY_MAX_ENTRIES=3)
+    def test_keeps_a_bounded_number_of_statements(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse("logs:audit_log_list"))
+        self.assertEqual(SlowQuery.objects.count(), 3)
+
+    def test_explains_are_not_queries_of_the_request(self):
+        url = reverse("logs:audit_log_list")
+        counts = []
+        for capture in (False, True):
+            with self.settings(REQUEST_INSTRUMENTATION=True, SLOW_QUERY_CAPTURE=capture, SLOW_QUERY_MS=0):
+                # A new client loads the middleware under these settings
+                client = Client()
+                client.force_login(self.admin)
+                client.get(url)
+                slow_queries._explained.clear()
+                server_timing = client.get(url)["Server-Timing"]
+            counts.append(re.search(r'desc="(\d+) queries"', server_timing).group(1))
+        self.assertTrue(SlowQuery.objects.exclude(plan="").exists())
+        self.assertEqual(counts[0], counts[1])
+
+    def test_explain_inside_a_transaction(self):
+        from django.db import connection, transaction
+
+        with transaction.atomic():
+            User.objects.create_user("inside")
+            with self.assertLogs("logs.slow_queries", "WARNING"):
+                self.assertEqual(slow_queries.explain(connection, "SELECT * FROM missing_table", ()), "")
+            self.assertIn("accounts_user", slow_queries.explain(connection, "SELECT * FROM accounts_user WHERE id = %s", (1,)))
+            self.assertTrue(User.objects.filter(username="inside").exists())
+
+
+# Pages are rendered without running collectstatic first
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class TracingTests(TestCase):
+    TRACEPARENT = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user("admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR))
+        organization = Organization.objects.create(name="Org")
+        organization.members.add(cls.admin)
+        cls.project = seed_project(organization, [cls.admin], categories=1, tasks_per_category=1)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings_override = override_settings(TRACING_DIR=self.directory, TRACING_SAMPLE_RATE=0)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.admin)
+
+    def spans(self):
+        [path] = Path(self.directory).glob("traces-*.jsonl")
+        [line] = path.read_text().splitlines()
+        [resource] = json.loads(line)["resourceSpans"]
+        [scope] = resource["scopeSpans"]
+        return scope["spans"]
+
+    def test_unsampled_requests_are_not_traced(self):
+        response = self.client.get(reverse("projects:project_list"))
+        self.assertNotIn("X-Trace-Id", response)
+        self.assertEqual(list(Path(self.directory).iterdir()), [])
+
+    def test_ignores_an_untrusted_traceparent(self):
+        response = self.client.get(reverse("projects:project_list"), HTTP_TRACEPARENT=self.TRACEPARENT)
+        self.assertNotIn("X-Trace-Id", response)
+        self.assertEqual(list(Path(self.directory).iterdir()), [])
+
+    @override_settings(TRACING_SAMPLE_RATE=1)
+    def test_sampled_request_continues_an_untrusted_traceparent(self):
+        response = self.client.get(reverse("projects:project_list"), HTTP_TRACEPARENT=self.TRACEPARENT)
+        self.assertEqual(response["X-Trace-Id"], "0af7651916cd43dd8448eb211c80319c")
+        [server] = [span for span in self.spans() if span["kind"] == tracing.SERVER]
+        self.assertEqual(server["parentSpanId"], "b7ad6b7169203331")
+
+    @override_settings(TRACING_TRUST_TRACEPARENT=True)
+    def test_continues_a_sampled_traceparent(self):
+        response = self.client.get(reverse("projects:project_list"), HTTP_TRACEPARENT=self.TRACEPARENT)
+        self.assertEqual(response["X-Trace-Id"], "0af7651916cd43dd8448eb211c80319c")
+
+        spans = self.spans()
+        by_id = {span["spanId"]: span for span in spans}
+        [server] = [span for span in spans if span["kind"] == tracing.SERVER]
+        self.assertEqual(server["name"], "GET /projects/")
+        self.assertEqual(server["parentSpanId"], "b7ad6b7169203331")
+        self.assertTrue(all(span["traceId"] == response["X-Trace-Id"] for span in spans))
+
+        [view] = [span for span in spans if span["name"] == "view projects:project_list"]
+        self.assertEqual(view["parentSpanId"], server["spanId"])
+        [render] = [span for span in spans if span["name"] == "render projects/project_list.html"]
+        self.assertEqual(render["parentSpanId"], view["spanId"])
+        queries = [span for span in spans if span["kind"] == tracing.CLIENT]
+        self.assertTrue(queries)
+        self.assertTrue(all(span["parentSpanId"] in by_id for span in queries))
+        self.assertIn({"key": "db.system", "value": {"stringValue": connection.vendor}}, queries[0]["attributes"])
+
+    @override_settings(TRACING_TRUST_TRACEPARENT=True)
+    def test_task_move_spans(self):
+        task = self.project.tasks.filter(category=TaskInstance.DEVELOPMENT).first()
+        self.client.post(
+            reverse("tasks:task_move", args=[task.pk]),
+            {"stage": TaskInstance.DONE},
+            HTTP_TRACEPARENT=self.TRACEPARENT,
+        )
+        spans = self.spans()
+        names = {span["name"] for span in spans}
+        for name in ("task.save", "log_action", "task.build_done", "task.clone", "task.copy_assignees"):
+            self.assertIn(name, names)
+        [clone] = [span for span in spans if span["name"] == "task.clone"]
+        [transition] = [span for span in spans if span["name"] == "task.build_done"]
+        self.assertEqual(clone["parentSpanId"], transition["spanId"])
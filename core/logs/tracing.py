@@ -0,0 +1,303 @@
+"""Request traces, written as OpenTelemetry (OTLP/JSON) spans to local files.
+
+``TracingMiddleware`` traces a fraction ``settings.TRACING_SAMPLE_RATE`` of
+requests. A sampled request carrying a W3C ``traceparent`` header continues
+that trace. The header's sampled flag is only obeyed with
+``settings.TRACING_TRUST_TRACEPARENT``, for deployments whose callers are
+all trusted (e.g. behind a gateway that sets or strips the header);
+otherwise any client could have every request it sends traced. A traced
+request gets a server span
+for the whole request, a ``view`` span from ``ViewSpanMiddleware`` around
+URL resolution and the view, a client span per database query and a span
+per template render. Code adds its own spans with ``span()``::
+
+    with tracing.span("task.clone", category=category):
+        ...
+
+When the trace ends its spans are appended to ``traces-<pid>.jsonl`` in
+``settings.TRACING_DIR`` as one ``ExportTraceServiceRequest`` per line, the
+shape the OpenTelemetry Collector's ``otlpjsonfile`` receiver and its file
+exporter use, so the files can be loaded into Jaeger or any OTLP viewer
+through a collector. Each process writes its own file, rotated at
+``settings.TRACING_MAX_BYTES`` with ``settings.TRACING_BACKUP_COUNT``
+backups.
+
+A request that is not sampled costs one random number in the middleware
+and one context variable lookup per ``span()``; queries and templates are
+not wrapped at all.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, nullcontext
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+SERVICE_NAME = "pms"
+
+# SpanKind and StatusCode values of the OTLP protocol
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+STATUS_ERROR = 2
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_NOOP = nullcontext()
+
+_current = contextvars.ContextVar("trace_span", default=None)
+
+_lock = threading.Lock()
+_handler_key = None
+_handler = None
+
+
+class Span:
+    """One timed operation of a trace."""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attributes", "start", "end", "error")
+
+    def __init__(self, trace, parent_id, name, kind, attributes):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.start = time.time_ns()
+        self.end = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def as_otlp(self):
+        data = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": [_attribute(key, value) for key, value in self.attributes.items()],
+        }
+        if self.parent_id:
+            data["parentSpanId"] = self.parent_id
+        if self.error:
+            data["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return data
+
+
+class Trace:
+    """The finished spans of one traced request."""
+
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans = []
+
+
+class _SpanContext:
+    def __init__(self, trace, parent_id, name, kind, attributes):
+        self.args = (trace, parent_id, name, kind, attributes)
+
+    def __enter__(self):
+        self.span = Span(*self.args)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self.span
+        span.end = time.time_ns()
+        if exc_type is not None:
+            span.error = f"{exc_type.__name__}: {exc}"
+        _current.reset(self.token)
+        span.trace.spans.append(span)
+        return False
+
+
+def span(name, kind=INTERNAL, **attributes):
+    """A context manager timing ``name`` as a child of the current span.
+
+    Does nothing outside a traced request.
+    """
+    parent = _current.get()
+    if parent is None:
+        return _NOOP
+    return _SpanContext(parent.trace, parent.span_id, name, kind, attributes)
+
+
+def traced(name):
+    """Decorate a function to run in a span called ``name``."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _query_span(execute, sql, params, many, context):
+    connection = context["connection"]
+    operation = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "QUERY"
+    attributes = {
+        "db.system": connection.vendor,
+        "db.name": str(connection.settings_dict["NAME"]),
+        "db.statement": sql[:2000],
+    }
+    if many:
+        attributes["db.executemany"] = True
+    with span(operation, kind=CLIENT, **attributes):
+        return execute(sql, params, many, context)
+
+
+def _traced_render(render):
+    @functools.wraps(render)
+    def wrapper(self, *args, **kwargs):
+        if _current.get() is None:
+            return render(self, *args, **kwargs)
+        with span(f"render {self.origin.template_name}", **{"template.name": str(self.origin.template_name)}):
+            return render(self, *args, **kwargs)
+
+    wrapper.traced = True
+    return wrapper
+
+
+def _trace_templates():
+    if not getattr(Template.render, "traced", False):
+        Template.render = _traced_render(Template.render)
+
+
+def _sampled(request):
+    """The (trace id, parent span id) to record the request under, or None."""
+    match = _TRACEPARENT.match(request.headers.get("traceparent", ""))
+    if match:
+        trace_id, parent_id, flags = match.groups()
+        if settings.TRACING_TRUST_TRACEPARENT and int(flags, 16) & 1:
+            return trace_id, parent_id
+    else:
+        trace_id = parent_id = None
+    rate = settings.TRACING_SAMPLE_RATE
+    if rate > 0 and random.random() < rate:
+        return trace_id, parent_id
+    return None
+
+
+class TracingMiddleware:
+    """Record sampled requests as traces."""
+
+    def __init__(self, get_response):
+        if not settings.TRACING_ENABLED:
+            raise MiddlewareNotUsed
+        _trace_templates()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = _sampled(request)
+        if sampled is None:
+            return self.get_response(request)
+
+        trace_id, parent_id = sampled
+        trace = Trace(trace_id)
+        root = _SpanContext(trace, parent_id, request.method, SERVER, {
+            "http.method": request.method,
+            "http.target": request.get_full_path()[:2000],
+        })
+        with root as server_span:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_query_span))
+                response = self.get_response(request)
+
+            match = request.resolver_match
+            if match is not None:
+                server_span.name = f"{request.method} /{match.route}"
+                server_span.set(**{"http.route": f"/{match.route}"})
+            server_span.set(**{"http.status_code": response.status_code})
+            if response.status_code >= 500:
+                server_span.error = f"HTTP {response.status_code}"
+
+        response["X-Trace-Id"] = trace.trace_id
+        export(trace)
+        return response
+
+
+class ViewSpanMiddleware:
+    """A ``view`` span around URL resolution and the view; last in ``MIDDLEWARE``."""
+
+    def __init__(self, get_response):
+        if not settings.TRACING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if _current.get() is None:
+            return self.get_response(request)
+        with span("view") as view:
+            response = self.get_response(request)
+            match = request.resolver_match
+            if match is not None:
+                view.name = f"view {match.view_name}"
+                view.set(**{"code.function": match._func_path})
+        return response
+
+
+def export(trace):
+    """Append ``trace`` to this process's trace file."""
+    spans = sorted(trace.spans, key=lambda s: s.start)
+    line = json.dumps({
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                _attribute("service.name", SERVICE_NAME),
+                _attribute("process.pid", os.getpid()),
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [s.as_otlp() for s in spans],
+            }],
+        }],
+    }, separators=(",", ":"))
+    _own_handler().handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+
+def _own_handler():
+    """This process's rotating file; a forked child opens its own."""
+    global _handler_key, _handler
+    with _lock:
+        pid = os.getpid()
+        directory = Path(settings.TRACING_DIR or Path(tempfile.gettempdir()) / "pms-traces")
+        if (pid, directory) != _handler_key:
+            if _handler is not None and _handler_key[0] == pid:
+                _handler.close()
+            directory.mkdir(parents=True, exist_ok=True)
+            _handler_key = (pid, directory)
+            _handler = logging.handlers.RotatingFileHandler(
+                directory / f"traces-{pid}.jsonl",
+                maxBytes=settings.TRACING_MAX_BYTES,
+                backupCount=settings.TRACING_BACKUP_COUNT,
+                delay=True,
+            )
+        return _handler
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        # 64-bit integers are strings in OTLP/JSON
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
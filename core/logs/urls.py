@@ -6,4 +6,8 @@ app_name = "logs"
 
 urlpatterns = [
     path("", views.audit_log_list, name="audit_log_list"),
+    path("slow-queries/", views.slow_query_list, name="slow_query_list"),
+    path("profiles/", views.profile_list, name="profile_list"),
+    path("profiles/<str:profile_id>/", views.profile_detail, name="profile_detail"),
+    path("profiles/<str:profile_id>/download/", views.profile_download, name="profile_download"),
 ]
@@ -1,13 +1,16 @@
+from . import metrics, tracing
 from .models import AuditLog
 
 
 def log_action(*, actor, action, target_type="", target_id=None, detail="", project=None):
     """Create an immutable audit log entry."""
-    AuditLog.objects.create(
-        actor=actor,
-        action=action,
-        target_type=target_type,
-        target_id=target_id,
-        detail=detail,
-        project=project,
-    )
+    with tracing.span("log_action", **{"pms.action": action}):
+        AuditLog.objects.create(
+            actor=actor,
+            action=action,
+            target_type=target_type,
+            target_id=target_id,
+            detail=detail,
+            project=project,
+        )
+    metrics.inc("pms_audit_log_writes_total", action=action)
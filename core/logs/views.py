@@ -1,10 +1,18 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
 from django.shortcuts import redirect, render
+from django.utils.crypto import constant_time_compare
 
-from .models import AuditLog
+from core.replicas import read_from_replica
 
+from . import metrics as pms_metrics
+from . import profiling
+from .models import AuditLog, SlowQuery
 
+
+@read_from_replica
 @login_required
 def audit_log_list(request):
     if not request.user.is_system_admin():
@@ -29,3 +37,89 @@ def audit_log_list(request):
         "page_size": page_size,
         "total_count": total_count,
     })
+
+
+@login_required
+def profile_list(request):
+    if not request.user.is_system_admin():
+        from django.contrib import messages
+        messages.error(request, "Permission denied.")
+        return redirect("dashboard")
+
+    profiles = [profiling.summary(profile_id) for profile_id in profiling.profile_ids()]
+    return render(request, "logs/profile_list.html", {
+        "profiles": [profile for profile in profiles if profile is not None],
+        "keep": settings.PROFILING_KEEP,
+        "rate_limit": settings.PROFILING_RATE_LIMIT,
+    })
+
+
+@login_required
+def profile_detail(request, profile_id):
+    if not request.user.is_system_admin():
+        from django.contrib import messages
+        messages.error(request, "Permission denied.")
+        return redirect("dashboard")
+
+    profile = profiling.summary(profile_id)
+    if profile is None:
+        raise Http404("Profile not found.")
+    return render(request, "logs/profile_detail.html", {"profile": profile})
+
+
+@login_required
+def profile_download(request, profile_id):
+    """The ``pstats`` dump, for ``python -m pstats`` or snakeviz."""
+    if not request.user.is_system_admin():
+        return HttpResponseForbidden("Permission denied.")
+
+    path = profiling.stats_path(profile_id)
+    if path is None:
+        raise Http404("Profile not found.")
+    return FileResponse(path.open("rb"), as_attachment=True, filename=f"{profile_id}.prof")
+
+
+SLOW_QUERY_ORDERINGS = {
+    "worst": "-worst_ms",
+    "total": "-total_ms",
+    "count": "-count",
+    "recent": "-last_seen",
+}
+
+
+@login_required
+def slow_query_list(request):
+    if not request.user.is_system_admin():
+        from django.contrib import messages
+        messages.error(request, "Permission denied.")
+        return redirect("dashboard")
+
+    if request.method == "POST":
+        SlowQuery.objects.all().delete()
+        return redirect("logs:slow_query_list")
+
+    order = request.GET.get("order", "worst")
+    if order not in SLOW_QUERY_ORDERINGS:
+        order = "worst"
+    return render(request, "logs/slow_query_list.html", {
+        "slow_queries": SlowQuery.objects.order_by(SLOW_QUERY_ORDERINGS[order], "pk"),
+        "order": order,
+        "orderings": SLOW_QUERY_ORDERINGS,
+        "threshold_ms": settings.SLOW_QUERY_MS,
+        "max_entries": settings.SLOW_QUERY_MAX_ENTRIES,
+        "capturing": settings.SLOW_QUERY_CAPTURE,
+    })
+
+
+def metrics(request):
+    """Prometheus scrape target. Needs the bearer token or a system administrator."""
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    allowed = (
+        token and constant_time_compare(authorization, f"Bearer {token}")
+    ) or (
+        request.user.is_authenticated and request.user.is_system_admin()
+    )
+    if not allowed:
+        return HttpResponseForbidden("Permission denied.")
+    return HttpResponse(pms_metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,5 +1,8 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from core.concurrency import save_if_unchanged
 
 from .models import Project, ProjectCategory, ProjectNote
 
@@ -84,6 +87,9 @@ class ProjectForm(forms.ModelForm):
         }),
     )
 
+    # Version the form was rendered from; see save_versioned()
+    version = forms.IntegerField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = Project
         fields = ["name", "description", "organization", "planned_start_date", "planned_end_date"]
@@ -103,6 +109,11 @@ class ProjectForm(forms.ModelForm):
             ),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields["version"].initial = self.instance.version
+
     def clean_members_search(self):
         return self._process_user_search("members_search", "members")
     
@@ -165,6 +176,21 @@ class ProjectForm(forms.ModelForm):
                 instance.viewers.clear()
         return instance
 
+    def save_versioned(self):
+        """Save an edit unless the project changed since this form was rendered.
+
+        Returns False, leaving the project untouched, on a conflicting edit.
+        """
+        instance = super().save(commit=False)
+        # The fields and the memberships commit together or not at all
+        with transaction.atomic():
+            if not save_if_unchanged(instance, self.cleaned_data.get("version"), self._meta.fields):
+                return False
+            instance.members.set(self.cleaned_data.get("members", []))
+            instance.commenters.set(self.cleaned_data.get("commenters", []))
+            instance.viewers.set(self.cleaned_data.get("viewers", []))
+        return True
+
 
 class ProjectNoteForm(forms.ModelForm):
     class Meta:
@@ -182,6 +208,9 @@ class ProjectNoteForm(forms.ModelForm):
 
 
 class ProjectCategoryForm(forms.ModelForm):
+    # Version the form was rendered from; see save_versioned()
+    version = forms.IntegerField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = ProjectCategory
         fields = ["name", "description", "weight"]
@@ -196,3 +225,16 @@ class ProjectCategoryForm(forms.ModelForm):
                 attrs={"class": GLASS_INPUT, "placeholder": "Weight (1-100)", "min": "1", "max": "100"}
             ),
         }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields["version"].initial = self.instance.version
+
+    def save_versioned(self):
+        """Save an edit unless the category changed since this form was rendered.
+
+        Returns False, leaving the category untouched, on a conflicting edit.
+        """
+        instance = super().save(commit=False)
+        return save_if_unchanged(instance, self.cleaned_data.get("version"), self._meta.fields)
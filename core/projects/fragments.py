@@ -0,0 +1,89 @@
+"""Rendered template fragments of project pages, cached per change version.
+
+A fragment is stored under its name, the project and the project's change
+sequence value (``tasks.ProjectChangeSequence``). Task writes advance that
+sequence themselves, and ``tasks.signals`` advances it when notes,
+categories, memberships or the project change. A fragment that shows
+other rows, such as the activity feed, adds their own version to its key.
+A fragment rendered from older data is therefore never looked up again; it
+just ages out of the cache. The version lives in the database, so this holds with a
+per-worker local-memory cache as well as a shared file-based one.
+
+Hits and misses are counted per fragment in the cache (per worker with
+local memory; approximate with the file backend, whose ``incr`` is not
+atomic) and shown by ``views.fragment_cache_stats``.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from logs import metrics
+
+FRAGMENTS = (
+    "project_card",
+    "project_members",
+    "project_categories",
+    "project_activity",
+)
+
+
+def project_version(project):
+    """The change version fragments of ``project`` are keyed on.
+
+    Uses the ``with_change_version()`` annotation when present, otherwise
+    reads it once and keeps it on the instance for the rest of the render.
+    """
+    version = getattr(project, "change_version", None)
+    if version is None:
+        from tasks.models import ProjectChangeSequence
+
+        version, _ = ProjectChangeSequence.current(project.pk)
+        project.change_version = version
+    return version
+
+
+def render_cached(name, project, render, version=None):
+    """Return fragment ``name`` of ``project``, calling ``render()`` on a miss.
+
+    ``version`` is added to the key for fragments that show rows the
+    project's change sequence does not follow.
+    """
+    if name not in FRAGMENTS:
+        raise ValueError(f"Unknown template fragment {name!r}.")
+    key = f"fragments:{name}:{project.pk}:{project_version(project)}"
+    if version is not None:
+        key = f"{key}:{version}"
+    content = cache.get(key)
+    if content is None:
+        _count(name, "misses")
+        metrics.inc("pms_cache_requests_total", cache="fragments", result="miss")
+        content = render()
+        cache.set(key, content, settings.FRAGMENT_CACHE_TIMEOUT)
+    else:
+        _count(name, "hits")
+        metrics.inc("pms_cache_requests_total", cache="fragments", result="hit")
+    return content
+
+
+def stats():
+    """``{fragment: {"hits": n, "misses": n}}`` as seen by this cache."""
+    keys = {(name, outcome): _stats_key(name, outcome) for name in FRAGMENTS for outcome in ("hits", "misses")}
+    values = cache.get_many(keys.values())
+    result = {name: {"hits": 0, "misses": 0} for name in FRAGMENTS}
+    for (name, outcome), key in keys.items():
+        result[name][outcome] = values.get(key, 0)
+    return result
+
+
+def _stats_key(name, outcome):
+    return f"fragments:stats:{name}:{outcome}"
+
+
+def _count(name, outcome):
+    key = _stats_key(name, outcome)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.add(key, 1, timeout=None)
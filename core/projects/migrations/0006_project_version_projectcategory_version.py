@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_project_planned_end_date_project_planned_start_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Bumped on every write; guards edit forms against lost updates.'),
+        ),
+        migrations.AddField(
+            model_name='projectcategory',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Bumped on every write; guards edit forms against lost updates.'),
+        ),
+    ]
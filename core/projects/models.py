@@ -1,7 +1,27 @@
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from core.db_functions import DateDiff
+
+
+class ProjectCategoryQuerySet(models.QuerySet):
+    def with_task_counts(self):
+        """Annotate ``open_task_count`` and ``done_task_count``.
+
+        ``total_tasks`` and ``done_tasks`` read these instead of counting.
+        """
+        from tasks.models import TaskInstance
+
+        open_tasks = models.Q(tasks__is_closed=False)
+        return self.annotate(
+            open_task_count=models.Count("tasks", filter=open_tasks),
+            done_task_count=models.Count(
+                "tasks", filter=open_tasks & models.Q(tasks__stage=TaskInstance.DONE)
+            ),
+        )
+
 
 class ProjectCategory(models.Model):
     """Custom project-specific categories with weight contribution to project progress."""
@@ -20,6 +40,11 @@ class ProjectCategory(models.Model):
     order = models.PositiveIntegerField(default=0, help_text="Display order of this category.")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(
+        default=1, editable=False, help_text="Bumped on every write; guards edit forms against lost updates."
+    )
+
+    objects = ProjectCategoryQuerySet.as_manager()
 
     class Meta:
         ordering = ["order", "-created_at"]
@@ -29,14 +54,25 @@ class ProjectCategory(models.Model):
     def __str__(self):
         return f"{self.project.name} - {self.name}"
 
+    def save(self, *args, **kwargs):
+        if self.pk:
+            self.version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
+
     @property
     def total_tasks(self):
         """Count of all tasks in this project category."""
+        if "open_task_count" in self.__dict__:
+            return self.open_task_count
         return self.tasks.filter(is_closed=False).count()
 
     @property
     def done_tasks(self):
         """Count of completed (DONE stage) tasks in this project category."""
+        if "done_task_count" in self.__dict__:
+            return self.done_task_count
         from tasks.models import TaskInstance
         return self.tasks.filter(
             is_closed=False, stage=TaskInstance.DONE
@@ -52,9 +88,89 @@ class ProjectCategory(models.Model):
         return round((done / total) * 100)
 
 
+def _task_stats_aggregates(prefix=""):
+    """Aggregates behind ``Project.task_stats``, over open tasks.
+
+    ``prefix`` is the path from the queried model to the tasks ("tasks__"
+    from projects, "" from tasks).
+    """
+    from tasks.models import TaskInstance
+
+    def open_tasks(**lookups):
+        lookups["is_closed"] = False
+        return models.Q(**{prefix + name: value for name, value in lookups.items()})
+
+    tasks = f"{prefix}pk"
+    story_points = f"{prefix}story_points"
+    zero = models.Value(0)
+    return {
+        "stats_total": models.Count(tasks, filter=open_tasks()),
+        "stats_done": models.Count(tasks, filter=open_tasks(stage=TaskInstance.DONE)),
+        "stats_in_progress": models.Count(tasks, filter=open_tasks(stage=TaskInstance.IN_PROGRESS)),
+        "stats_having_issues": models.Count(tasks, filter=open_tasks(stage=TaskInstance.HAVING_ISSUES)),
+        "stats_total_story_points": Coalesce(models.Sum(story_points, filter=open_tasks()), zero),
+        "stats_earned_story_points": Coalesce(
+            models.Sum(story_points, filter=open_tasks(stage=TaskInstance.DONE)), zero
+        ),
+    }
+
+
+class ProjectQuerySet(models.QuerySet):
+    def with_task_stats(self):
+        """Annotate the open task counts and story points that ``task_stats`` returns."""
+        return self.annotate(**_task_stats_aggregates("tasks__"))
+
+    def with_progress(self):
+        """Prefetch categories with their task counts, so ``progress`` runs no queries."""
+        return self.prefetch_related(
+            models.Prefetch("categories", queryset=ProjectCategory.objects.with_task_counts())
+        )
+
+    def with_change_version(self):
+        """Annotate ``change_version``, the project's change sequence value.
+
+        Used to key cached template fragments; see ``projects.fragments``.
+        """
+        return self.annotate(
+            change_version=Coalesce("change_sequence__value", models.Value(0))
+        )
+
+    def with_due_status(self, today=None):
+        """Annotate ``due_code`` (``Project.DUE_*``) and ``due_days``.
+
+        ``due_days`` counts down to the planned start while the project has
+        not started, then to the planned end; it is negative once overdue.
+        """
+        if today is None:
+            today = timezone.now().date()
+        today_value = models.Value(today, output_field=models.DateField())
+        not_started = models.Q(planned_start_date__gt=today)
+        return self.annotate(
+            due_code=models.Case(
+                models.When(not_started, then=models.Value(Project.DUE_NOT_STARTED)),
+                models.When(planned_end_date__isnull=True, then=models.Value(Project.DUE_NONE)),
+                models.When(planned_end_date__lt=today, then=models.Value(Project.DUE_OVERDUE)),
+                models.When(planned_end_date=today, then=models.Value(Project.DUE_TODAY)),
+                default=models.Value(Project.DUE_LATER),
+                output_field=models.PositiveSmallIntegerField(),
+            ),
+            due_days=models.Case(
+                models.When(not_started, then=DateDiff(models.F("planned_start_date"), today_value)),
+                default=DateDiff(models.F("planned_end_date"), today_value),
+            ),
+        )
+
+
 class Project(models.Model):
     """Project belongs to exactly one organization."""
 
+    # ── Due status codes (see ProjectQuerySet.with_due_status) ──
+    DUE_NONE = 0
+    DUE_LATER = 1
+    DUE_TODAY = 2
+    DUE_OVERDUE = 3
+    DUE_NOT_STARTED = 4
+
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     organization = models.ForeignKey(
@@ -88,6 +204,11 @@ class Project(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(
+        default=1, editable=False, help_text="Bumped on every write; guards edit forms against lost updates."
+    )
+
+    objects = ProjectQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
@@ -96,6 +217,13 @@ class Project(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.pk:
+            self.version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version"}
+        super().save(*args, **kwargs)
+
     @property
     def progress(self):
         """Weighted project progress based on custom project categories.
@@ -118,20 +246,25 @@ class Project(models.Model):
 
     @property
     def task_stats(self):
-        from tasks.models import TaskInstance
-        from django.db.models import Sum
+        """Open task counts and story points.
 
-        tasks = TaskInstance.objects.filter(project=self, is_closed=False)
-        done_tasks = tasks.filter(stage=TaskInstance.DONE)
-        
-        total_sp = tasks.aggregate(Sum('story_points'))['story_points__sum'] or 0
-        earned_sp = done_tasks.aggregate(Sum('story_points'))['story_points__sum'] or 0
-        
+        Uses the ``with_task_stats()`` annotations when present, otherwise
+        runs one aggregate query.
+        """
+        if "stats_total" in self.__dict__:
+            stats = {name: getattr(self, name) for name in _task_stats_aggregates()}
+        else:
+            from tasks.models import TaskInstance
+
+            stats = TaskInstance.objects.filter(project=self).aggregate(**_task_stats_aggregates())
+
+        total_sp = stats["stats_total_story_points"]
+        earned_sp = stats["stats_earned_story_points"]
         return {
-            "total": tasks.count(),
-            "done": done_tasks.count(),
-            "in_progress": tasks.filter(stage=TaskInstance.IN_PROGRESS).count(),
-            "having_issues": tasks.filter(stage=TaskInstance.HAVING_ISSUES).count(),
+            "total": stats["stats_total"],
+            "done": stats["stats_done"],
+            "in_progress": stats["stats_in_progress"],
+            "having_issues": stats["stats_having_issues"],
             "total_story_points": total_sp,
             "earned_story_points": earned_sp,
             "remaining_story_points": total_sp - earned_sp,
@@ -139,10 +272,14 @@ class Project(models.Model):
 
     @property
     def tasks_by_project_category(self):
-        """Tasks grouped by project category with completion stats and weights."""
-        return list(
-            self.categories.prefetch_related("tasks").order_by("order", "-created_at")
-        )
+        """Tasks grouped by project category with completion stats and weights.
+
+        Reuses the categories prefetched by the view (``with_progress()`` or
+        with their tasks) when present.
+        """
+        if "categories" in getattr(self, "_prefetched_objects_cache", {}):
+            return list(self.categories.all())
+        return list(self.categories.with_task_counts().prefetch_related("tasks"))
 
     @property
     def due_status(self):
@@ -150,28 +287,35 @@ class Project(models.Model):
         - 'Starts in X days' if project hasn't started yet
         - 'Due in X days' if project is in progress
         - 'Overdue X days' if past deadline
+
+        Uses the ``due_code``/``due_days`` annotations when the project was
+        loaded ``with_due_status()``.
         """
-        today = timezone.now().date()
-        
+        from tasks.models import due_label
+
+        if "due_code" in self.__dict__:
+            code, days = self.due_code, self.due_days
+        else:
+            code, days = self._due_state(timezone.now().date())
+
+        if code == self.DUE_NONE:
+            return None
+        if code == self.DUE_NOT_STARTED:
+            return f"Starts in {days} day{'s' if days != 1 else ''}"
+        return due_label(days)
+
+    def _due_state(self, today):
+        """``(due_code, due_days)`` computed in Python, as ``with_due_status`` does in SQL."""
         # Check if project has a planned start date and hasn't started yet
         if self.planned_start_date and today < self.planned_start_date:
-            days_until_start = (self.planned_start_date - today).days
-            if days_until_start == 0:
-                return "Starts today"
-            return f"Starts in {days_until_start} day{'s' if days_until_start != 1 else ''}"
-        
+            return self.DUE_NOT_STARTED, (self.planned_start_date - today).days
         # If project has started (or no start date), show due status based on end date
         if not self.planned_end_date:
-            return None
-        
-        days_diff = (self.planned_end_date - today).days
-        
-        if days_diff > 0:
-            return f"Due in {days_diff} day{'s' if days_diff != 1 else ''}"
-        elif days_diff == 0:
-            return "Due today"
-        else:
-            return f"Overdue {abs(days_diff)} day{'s' if abs(days_diff) != 1 else ''}"
+            return self.DUE_NONE, None
+        days = (self.planned_end_date - today).days
+        if days > 0:
+            return self.DUE_LATER, days
+        return (self.DUE_TODAY if days == 0 else self.DUE_OVERDUE), days
 
     @property
     def project_duration(self):
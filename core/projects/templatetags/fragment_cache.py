@@ -0,0 +1,42 @@
+from django import template
+
+from projects.fragments import render_cached
+
+register = template.Library()
+
+
+@register.tag
+def project_fragment(parser, token):
+    """Cache a section of a project page until the project changes.
+
+    {% project_fragment "project_members" project %} ... {% endproject_fragment %}
+    {% project_fragment "project_activity" project last_log %} ... {% endproject_fragment %}
+
+    The optional third argument is a version of rows the section shows
+    besides the project's own. The section must look the same to every
+    user; see ``projects.fragments``.
+    """
+    bits = token.split_contents()
+    if len(bits) not in (3, 4):
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' takes a fragment name, a project and optionally a version."
+        )
+    nodelist = parser.parse(("endproject_fragment",))
+    parser.delete_first_token()
+    return ProjectFragmentNode(nodelist, *(parser.compile_filter(bit) for bit in bits[1:]))
+
+
+class ProjectFragmentNode(template.Node):
+    def __init__(self, nodelist, name, project, version=None):
+        self.nodelist = nodelist
+        self.name = name
+        self.project = project
+        self.version = version
+
+    def render(self, context):
+        return render_cached(
+            self.name.resolve(context),
+            self.project.resolve(context),
+            lambda: self.nodelist.render(context),
+            None if self.version is None else self.version.resolve(context),
+        )
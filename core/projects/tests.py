@@ -1,3 +1,116 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import Role, User
+from core.testing import QueryBudgetMixin, seed_project
+from organizations.models import Organization
+from projects.models import Project
+from tasks.models import TaskInstance
+
+
+# Pages are rendered without running collectstatic first
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ProjectQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """Project pages and the dashboard run the same queries for one project or many."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            "admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR)
+        )
+        cls.developer = User.objects.create_user(
+            "developer", role=Role.objects.create(name=Role.DEVELOPER)
+        )
+        cls.organization = Organization.objects.create(name="Org")
+        cls.organization.members.add(cls.admin, cls.developer)
+        cls.project = seed_project(cls.organization, [cls.admin, cls.developer], categories=1, tasks_per_category=1)
+
+    def add_projects(self):
+        for _ in range(4):
+            seed_project(self.organization, [self.admin, self.developer], categories=3, tasks_per_category=4)
+
+    def add_to_project(self):
+        users = [User.objects.create_user(f"user{i}") for i in range(5)]
+        self.organization.members.add(*users)
+        more = seed_project(self.organization, users, categories=4, tasks_per_category=5, notes=5)
+        more.categories.update(project=self.project)
+        more.tasks.update(project=self.project)
+        more.notes.update(project=self.project)
+        more.audit_logs.update(project=self.project)
+        for relation in ("members", "commenters", "viewers"):
+            getattr(self.project, relation).add(*getattr(more, relation).all())
+
+    def test_project_list(self):
+        for user in (self.admin, self.developer):
+            with self.subTest(user=user.username):
+                self.client.force_login(user)
+                self.assertQueriesDoNotGrow(reverse("projects:project_list"), self.add_projects)
+
+    def test_dashboard(self):
+        for user in (self.admin, self.developer):
+            with self.subTest(user=user.username):
+                self.client.force_login(user)
+                self.assertQueriesDoNotGrow(reverse("dashboard"), self.add_projects)
+
+    def test_project_detail(self):
+        self.client.force_login(self.admin)
+        url = reverse("projects:project_detail", args=[self.project.pk])
+        self.assertQueriesDoNotGrow(url, self.add_to_project)
+
+    def test_project_detail_lists_open_tasks_by_category(self):
+        category = self.project.categories.get()
+        category.tasks.update(is_closed=True, title="Closed one")
+        shown = TaskInstance.objects.create(project=self.project, project_category=category, title="Shown")
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("projects:project_detail", args=[self.project.pk]))
+        self.assertContains(response, shown.title)
+        self.assertNotContains(response, "Closed one")
+        # The cards never load a task's description
+        self.assertFalse([q for q in queries if '"tasks_taskinstance"."description"' in q["sql"]])
+
+
+# Pages are rendered without running collectstatic first
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class VersionedEditTests(TestCase):
+    """An edit form posted after someone else saved the project is turned away."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            "admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR, can_manage_projects=True)
+        )
+        cls.other = User.objects.create_user("other")
+        cls.organization = Organization.objects.create(name="Org")
+        cls.organization.members.add(cls.admin, cls.other)
+        cls.project = Project.objects.create(name="Before", organization=cls.organization)
+        cls.project.members.add(cls.admin)
+
+    def edit(self, version):
+        self.client.force_login(self.admin)
+        return self.client.post(reverse("projects:project_edit", args=[self.project.pk]), {
+            "name": "After",
+            "description": "",
+            "organization": self.organization.pk,
+            "members_search": "other",
+            "version": version,
+        })
+
+    def test_current_version_saves(self):
+        response = self.edit(self.project.version)
+        self.assertEqual(response.status_code, 302)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.name, "After")
+        self.assertEqual(list(self.project.members.all()), [self.other])
+
+    def test_stale_version_conflicts(self):
+        rendered = self.project.version
+        # Someone else saves the project after the form was rendered
+        Project.objects.filter(pk=self.project.pk).update(version=rendered + 1)
+        response = self.edit(rendered)
+        self.assertEqual(response.status_code, 409)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.name, "Before")
+        self.assertEqual(list(self.project.members.all()), [self.admin])
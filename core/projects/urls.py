@@ -7,6 +7,7 @@ app_name = "projects"
 urlpatterns = [
     path("", views.project_list, name="project_list"),
     path("create/", views.project_create, name="project_create"),
+    path("fragment-cache/", views.fragment_cache_stats, name="fragment_cache_stats"),
     path("<int:pk>/", views.project_detail, name="project_detail"),
     path("<int:pk>/edit/", views.project_edit, name="project_edit"),
     path("notes/<int:pk>/delete/", views.note_delete, name="note_delete"),
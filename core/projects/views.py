@@ -1,34 +1,51 @@
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Max, OuterRef, Prefetch, Subquery, prefetch_related_objects
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
 
+from core.conditional import conditional_page, private_etag
+from core.replicas import read_from_replica
 from logs.utils import log_action
 
+from . import fragments
 from .forms import ProjectForm, ProjectNoteForm, ProjectCategoryForm
 from .models import Project, ProjectNote, ProjectCategory
 
 User = get_user_model()
 
 
+@read_from_replica
 @login_required
 def project_list(request):
     user = request.user
+    # Card stats and progress come with the list, not from a query per card
+    projects = Project.objects.with_change_version().with_task_stats().with_progress()
     if user.is_system_admin():
-        projects = Project.objects.select_related("organization").all()
+        projects = projects.select_related("organization")
     else:
         # Get organizations user belongs to
         user_orgs = user.member_organizations.values_list('id', flat=True)
         
         # All users only see projects in their organizations
         # Their role (manage_projects, member, etc) determines what they can do within those projects
-        projects = Project.objects.filter(
+        projects = projects.filter(
             organization_id__in=user_orgs
         ).select_related("organization").distinct()
     
     return render(request, "projects/project_list.html", {"projects": projects})
 
 
+@login_required
+def fragment_cache_stats(request):
+    """Hit/miss counters of the project page fragment cache, as JSON."""
+    if not request.user.is_system_admin():
+        return JsonResponse({"error": "Permission denied."}, status=403)
+    return JsonResponse({"fragments": fragments.stats()})
+
+
 @login_required
 def project_create(request):
     if not request.user.has_perm_manage_projects():
@@ -68,9 +85,56 @@ def _ensure_category_order(project):
             cat.save()
 
 
+def _per_project(rows, **aggregate):
+    """Scalar subquery of one aggregate over ``rows`` of the outer project."""
+    (name, expression), = aggregate.items()
+    return Subquery(
+        rows.filter(project=OuterRef("pk")).order_by().values("project").annotate(**aggregate).values(name)
+    )
+
+
+def _project_detail_etag(request, pk):
+    from logs.models import AuditLog
+
+    # Everything the page depends on, in one query
+    project = (
+        Project.objects.with_change_version()
+        .select_related("organization")
+        .annotate(
+            note_count=_per_project(ProjectNote.objects, count=Count("pk")),
+            note_changed=_per_project(ProjectNote.objects, changed=Max("updated_at")),
+            category_count=_per_project(ProjectCategory.objects, count=Count("pk")),
+            category_changed=_per_project(ProjectCategory.objects, changed=Max("updated_at")),
+            last_log=_per_project(AuditLog.objects, last=Max("pk")),
+        )
+        .filter(pk=pk)
+        .first()
+    )
+    if project is None or not project.organization.user_is_member(request.user):
+        return None
+    return private_etag(
+        request,
+        "project",
+        pk,
+        project.version,
+        project.organization.updated_at,
+        project.change_version,
+        project.note_count,
+        project.note_changed,
+        project.category_count,
+        project.category_changed,
+        project.last_log,
+        timezone.now().date(),
+    )
+
+
 @login_required
+@conditional_page(_project_detail_etag)
 def project_detail(request, pk):
-    project = get_object_or_404(Project, pk=pk)
+    project = get_object_or_404(
+        Project.objects.with_due_status().with_change_version().with_task_stats().select_related("organization"),
+        pk=pk,
+    )
     user = request.user
 
     # Permission check: user must have access to organization
@@ -80,20 +144,38 @@ def project_detail(request, pk):
 
     # Ensure categories have proper order values
     _ensure_category_order(project)
-    
-    # Get tasks without a project category
+
+    from tasks.cards import task_cards
     from tasks.models import TaskInstance
-    uncategorized_tasks = TaskInstance.objects.filter(
+
+    # Categories with their counts (progress) and open tasks with assignees
+    # (the category list); only the fields the cards show are loaded
+    prefetch_related_objects([project], Prefetch(
+        "categories",
+        queryset=ProjectCategory.objects.with_task_counts().prefetch_related(
+            Prefetch(
+                "tasks",
+                queryset=TaskInstance.objects.filter(is_closed=False)
+                .only("pk", "project_category", "title", "category", "stage", "story_points", "deadline")
+                .prefetch_related(Prefetch("assignees", queryset=User.objects.only("pk", "username"))),
+            )
+        ),
+    ))
+
+    # Get tasks without a project category
+    uncategorized_tasks = task_cards(TaskInstance.objects.filter(
         project=project,
         project_category__isnull=True,
         is_closed=False
-    ).select_related("created_by").prefetch_related("assignees").order_by("-created_at")
+    ).order_by("-created_at"))
     
     notes = project.notes.select_related("author").all()
     note_form = ProjectNoteForm()
     
     # Get recent audit logs for this project (last 20)
     audit_logs = project.audit_logs.select_related("actor").all()[:20]
+    # The activity fragment is cached until a new entry is logged
+    last_log = project.audit_logs.aggregate(last=Max("pk"))["last"]
 
     # Members and commenters can add notes to the project
     can_add_notes = project.user_is_commenter(user)
@@ -114,6 +196,7 @@ def project_detail(request, pk):
         "note_form": note_form,
         "can_add_notes": can_add_notes,
         "audit_logs": audit_logs,
+        "last_log": last_log,
         "uncategorized_tasks": uncategorized_tasks,
     })
 
@@ -133,24 +216,34 @@ def project_edit(request, pk):
         return redirect("projects:project_list")
     
     form = ProjectForm(request.POST or None, instance=project)
+    status = 200
     if request.method == "POST" and form.is_valid():
-        form.save()
-        log_action(
-            actor=request.user,
-            action="PROJECT_UPDATED",
-            target_type="Project",
-            target_id=project.pk,
-            detail=f"Project '{project.name}' updated.",
+        if form.save_versioned():
+            log_action(
+                actor=request.user,
+                action="PROJECT_UPDATED",
+                target_type="Project",
+                target_id=project.pk,
+                detail=f"Project '{project.name}' updated.",
+            )
+            messages.success(request, f"Project '{project.name}' updated.")
+            return redirect("projects:project_detail", pk=pk)
+        # Someone saved the project after this form was rendered: show their version
+        project = get_object_or_404(Project, pk=pk)
+        form = ProjectForm(instance=project)
+        status = 409
+        messages.error(
+            request,
+            "This project was changed by someone else while you were editing. "
+            "Review the current values and apply your changes again.",
         )
-        messages.success(request, f"Project '{project.name}' updated.")
-        return redirect("projects:project_detail", pk=pk)
     return render(request, "projects/project_form.html", {
         "form": form,
         "title": f"Edit — {project.name}",
         "existing_members": list(project.members.values_list("username", flat=True)),
         "existing_commenters": list(project.commenters.values_list("username", flat=True)),
         "existing_viewers": list(project.viewers.values_list("username", flat=True)),
-    })
+    }, status=status)
 
 
 @login_required
@@ -225,16 +318,26 @@ def category_edit(request, category_pk):
         return redirect("projects:project_detail", pk=project.pk)
     
     form = ProjectCategoryForm(request.POST or None, instance=category)
+    status = 200
     if request.method == "POST" and form.is_valid():
-        form.save()
-        messages.success(request, f"Category '{category.name}' updated.")
-        return redirect("projects:project_detail", pk=project.pk)
+        if form.save_versioned():
+            messages.success(request, f"Category '{category.name}' updated.")
+            return redirect("projects:project_detail", pk=project.pk)
+        # Someone saved the category after this form was rendered: show their version
+        category = get_object_or_404(ProjectCategory, pk=category_pk)
+        form = ProjectCategoryForm(instance=category)
+        status = 409
+        messages.error(
+            request,
+            "This category was changed by someone else while you were editing. "
+            "Review the current values and apply your changes again.",
+        )
     
     return render(request, "projects/category_form.html", {
         "form": form,
         "project": project,
         "title": f"Edit — {category.name}",
-    })
+    }, status=status)
 
 
 @login_required
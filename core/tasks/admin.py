@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import TaskInstance, TaskNote
+from .models import ArchivedTaskInstance, TaskDependency, TaskInstance, TaskNote
 
 
 @admin.register(TaskInstance)
@@ -40,3 +40,27 @@ class TaskNoteAdmin(admin.ModelAdmin):
     list_filter = ("created_at", "task__project")
     search_fields = ("task__title", "author__username", "content")
     readonly_fields = ("created_at", "updated_at")
+
+
+@admin.register(ArchivedTaskInstance)
+class ArchivedTaskInstanceAdmin(admin.ModelAdmin):
+    list_display = ("title", "project", "stage", "category", "is_closed", "archived_at")
+    list_filter = ("project", "stage", "category", "is_closed")
+    search_fields = ("title", "project__name")
+    readonly_fields = ("archived_at",)
+
+
+@admin.register(TaskDependency)
+class TaskDependencyAdmin(admin.ModelAdmin):
+    list_display = ("blocker", "blocked", "created_by", "created_at")
+    list_filter = ("blocked__project",)
+    search_fields = ("blocker__title", "blocked__title")
+    raw_id_fields = ("blocker", "blocked")
+    readonly_fields = ("created_at",)
+
+    # Edges are added from the task page, which keeps the graph acyclic.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
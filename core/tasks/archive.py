@@ -0,0 +1,185 @@
+"""Move finished task instances out of the hot ``TaskInstance`` table.
+
+Rejected testing clones are closed and never reopened, and every finished
+work item leaves its DEV/TEST/DEPLOY instances behind. Those rows are skipped
+by every board and stats query, so they are moved, in batches, into
+``ArchivedTaskInstance``/``ArchivedTaskNote`` together with their assignee
+links. Primary keys are preserved, so ``task_detail`` and lineage links keep
+working, and ``restore_project`` can move a project's rows back verbatim.
+
+A task is only archived once none of its clones are still live, so a live
+task never points at an archived parent.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    ArchivedTaskInstance,
+    ArchivedTaskNote,
+    ProjectChangeSequence,
+    TaskInstance,
+    TaskNote,
+)
+
+# Dependency edges are dropped with the live row, and a rank only means
+# something relative to those edges, so it is not carried over. Change
+# sequence numbers are handed out afresh when a task comes back.
+TASK_FIELDS = [
+    f.attname
+    for f in TaskInstance._meta.concrete_fields
+    if f.name not in ("dependency_rank", "change_seq")
+]
+NOTE_FIELDS = [f.attname for f in TaskNote._meta.concrete_fields]
+
+TaskAssignee = TaskInstance.assignees.through
+ArchivedTaskAssignee = ArchivedTaskInstance.assignees.through
+
+
+def archivable_tasks(finished_before):
+    """Closed instances, and DONE instances untouched since ``finished_before``."""
+    return TaskInstance.objects.filter(
+        Q(is_closed=True) | Q(stage=TaskInstance.DONE, updated_at__lt=finished_before)
+    )
+
+
+def archive_tasks(*, older_than_days=90, batch_size=500, project=None):
+    """Archive eligible task instances in batches. Returns the number archived.
+
+    Batches walk primary keys downwards: clones always have a higher pk than
+    the task they were cloned from, so children are archived before their
+    parents and whole finished chains move in a single run.
+    """
+    candidates = archivable_tasks(timezone.now() - timedelta(days=older_than_days))
+    if project is not None:
+        candidates = candidates.filter(project=project)
+
+    archived = 0
+    upper = None
+    while True:
+        batch = candidates.order_by("-pk")
+        if upper is not None:
+            batch = batch.filter(pk__lt=upper)
+        ids = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return archived
+        upper = ids[-1]
+        with transaction.atomic():
+            movable = _without_live_children(ids)
+            _archive_batch(movable)
+        archived += len(movable)
+
+
+def restore_project(project, *, batch_size=500):
+    """Move every archived task of ``project`` back into the live tables.
+
+    Returns the number of task instances restored.
+    """
+    restored = 0
+    lower = 0
+    while True:
+        ids = list(
+            ArchivedTaskInstance.objects.filter(project=project, pk__gt=lower)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return restored
+        lower = ids[-1]
+        with transaction.atomic():
+            _restore_batch(ids)
+        restored += len(ids)
+
+
+def find_task(pk):
+    """Return ``(task, archived)`` for a live or archived task id, or ``(None, False)``."""
+    task = TaskInstance.objects.filter(pk=pk).first()
+    if task is not None:
+        return task, False
+    archived = ArchivedTaskInstance.objects.filter(pk=pk).first()
+    return archived, archived is not None
+
+
+def _without_live_children(ids):
+    """Drop ids that still have a clone outside the set being archived."""
+    movable = set(ids)
+    links = list(
+        TaskInstance.objects.filter(parent_task_id__in=movable).values_list("pk", "parent_task_id")
+    )
+    while True:
+        blocked = {parent for child, parent in links if child not in movable and parent in movable}
+        if not blocked:
+            return sorted(movable)
+        movable -= blocked
+
+
+def _archive_batch(ids):
+    if not ids:
+        return
+    rows = TaskInstance.objects.filter(pk__in=ids).values(*TASK_FIELDS)
+    ArchivedTaskInstance.objects.bulk_create(ArchivedTaskInstance(**row) for row in rows)
+
+    ArchivedTaskAssignee.objects.bulk_create(
+        ArchivedTaskAssignee(archivedtaskinstance_id=task_id, user_id=user_id)
+        for task_id, user_id in TaskAssignee.objects.filter(taskinstance_id__in=ids)
+        .values_list("taskinstance_id", "user_id")
+    )
+    ArchivedTaskNote.objects.bulk_create(
+        ArchivedTaskNote(**row) for row in TaskNote.objects.filter(task_id__in=ids).values(*NOTE_FIELDS)
+    )
+
+    project_ids = set(TaskInstance.objects.filter(pk__in=ids).values_list("project_id", flat=True))
+    # Board clients cannot learn about deleted rows from a delta. Numbered
+    # before the delete: sequence rows are locked before task rows.
+    for project_id in sorted(project_ids):
+        seq = ProjectChangeSequence.stamp(project_id)
+        ProjectChangeSequence.objects.filter(project_id=project_id).update(reset_below=seq)
+    TaskInstance.objects.filter(pk__in=ids).delete()
+
+
+def _restore_batch(ids):
+    archived = list(ArchivedTaskInstance.objects.filter(pk__in=ids).values(*TASK_FIELDS))
+    # Ascending pk order means a parent from an earlier batch is already
+    # live, and one from this batch is inserted with its clones; anything
+    # else the lineage points at may have been deleted meanwhile.
+    parent_ids = {row["parent_task_id"] for row in archived if row["parent_task_id"]}
+    live_parents = set(TaskInstance.objects.filter(pk__in=parent_ids).values_list("pk", flat=True))
+    live_parents |= {row["id"] for row in archived}
+    tasks = []
+    for row in archived:
+        if row["parent_task_id"] not in live_parents:
+            row["parent_task_id"] = None
+        tasks.append(TaskInstance(**row))
+    _bulk_create_with_timestamps(TaskInstance, tasks, archived)
+    for project_id in {task.project_id for task in tasks}:
+        TaskInstance.objects.filter(pk__in=ids, project_id=project_id).update(
+            change_seq=ProjectChangeSequence.advance(project_id)
+        )
+
+    TaskAssignee.objects.bulk_create(
+        TaskAssignee(taskinstance_id=task_id, user_id=user_id)
+        for task_id, user_id in ArchivedTaskAssignee.objects.filter(archivedtaskinstance_id__in=ids)
+        .values_list("archivedtaskinstance_id", "user_id")
+    )
+    archived_notes = list(ArchivedTaskNote.objects.filter(task_id__in=ids).values(*NOTE_FIELDS))
+    _bulk_create_with_timestamps(TaskNote, [TaskNote(**row) for row in archived_notes], archived_notes)
+
+    ArchivedTaskInstance.objects.filter(pk__in=ids).delete()
+
+
+def _bulk_create_with_timestamps(model, objs, rows):
+    """Insert ``objs`` and give them back the timestamps stored in ``rows``.
+
+    ``bulk_create`` stamps ``auto_now``/``auto_now_add`` fields with the
+    current time, on the instances as well as in the database, so the
+    archived values are set again afterwards from ``rows``.
+    """
+    model.objects.bulk_create(objs)
+    for obj, row in zip(objs, rows):
+        obj.created_at = row["created_at"]
+        obj.updated_at = row["updated_at"]
+    # bulk_update writes the attributes as they are, without pre_save()
+    model.objects.bulk_update(objs, ["created_at", "updated_at"])
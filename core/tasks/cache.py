@@ -0,0 +1,19 @@
+"""Cache keys derived from the state of a project's tasks."""
+
+from django.db.models import Count, Max
+
+from .models import TaskInstance
+
+
+def open_tasks_key(project):
+    """A short string that changes whenever an open task of ``project`` does.
+
+    Creating, editing, moving, closing or deleting an open task changes either
+    the count or the latest ``updated_at``. The key costs one aggregate query
+    and holds across worker processes without any invalidation signals.
+    """
+    state = TaskInstance.objects.filter(project=project, is_closed=False).aggregate(
+        count=Count("pk"), changed=Max("updated_at")
+    )
+    changed = state["changed"].timestamp() if state["changed"] else 0
+    return f"{state['count']}:{changed}"
@@ -0,0 +1,89 @@
+"""Read model for rendering many tasks at once (board, task lists, dashboard).
+
+``task_cards`` runs one ``values()`` query, which skips ``description`` and
+never builds model instances, plus one query for assignee names. It returns
+``TaskCard`` objects whose labels, badge classes and due/on-time status are
+worked out once when the card is built. Cards keep the attribute names the
+templates already use on ``TaskInstance`` (``get_stage_display``,
+``stage_color``, ``due_status`` ...), so a partial renders either.
+"""
+
+from .models import TaskInstance, due_label
+
+CARD_FIELDS = (
+    "pk",
+    "title",
+    "project_id",
+    "category",
+    "stage",
+    "is_closed",
+    "story_points",
+    "deadline",
+    "start_date",
+    "end_date",
+    "days_until_due",
+    "due_code",
+    "on_time_code",
+)
+
+STAGE_LABELS = dict(TaskInstance.STAGE_CHOICES)
+CATEGORY_LABELS = dict(TaskInstance.CATEGORY_CHOICES)
+
+
+class TaskCard:
+    __slots__ = (
+        *CARD_FIELDS,
+        "project_name",
+        "get_category_display",
+        "category_color",
+        "get_stage_display",
+        "stage_color",
+        "stage_status",
+        "due_status",
+        "on_time_status",
+        "assignee_names",
+    )
+
+    # Code constants, so templates can compare ``task.due_code == task.DUE_OVERDUE``
+    PENDING = TaskInstance.PENDING
+    DUE_NONE = TaskInstance.DUE_NONE
+    DUE_LATER = TaskInstance.DUE_LATER
+    DUE_TODAY = TaskInstance.DUE_TODAY
+    DUE_OVERDUE = TaskInstance.DUE_OVERDUE
+    ON_TIME = TaskInstance.ON_TIME
+    ON_TIME_LATE = TaskInstance.ON_TIME_LATE
+
+    def __init__(self, row):
+        for name in CARD_FIELDS:
+            setattr(self, name, row[name])
+        self.project_name = row.get("project__name")
+        self.get_category_display = CATEGORY_LABELS.get(self.category, self.category)
+        self.category_color = TaskInstance.CATEGORY_COLORS.get(self.category, "border-white/20")
+        self.get_stage_display = STAGE_LABELS.get(self.stage, self.stage)
+        self.stage_color = TaskInstance.STAGE_COLORS.get(self.stage, "bg-white/10 text-white/70")
+        self.stage_status = TaskInstance.STAGE_STATUSES.get(self.stage)
+        self.due_status = due_label(self.days_until_due) if self.deadline else None
+        self.on_time_status = TaskInstance.ON_TIME_LABELS.get(self.on_time_code)
+        self.assignee_names = []
+
+    def __repr__(self):
+        return f"<TaskCard {self.pk}: {self.title}>"
+
+
+def task_cards(queryset, *, with_project=False, limit=None, today=None):
+    """Build ``TaskCard`` objects for ``queryset``, keeping its ordering."""
+    fields = [*CARD_FIELDS, "project__name"] if with_project else CARD_FIELDS
+    rows = queryset.with_due_status(today).values(*fields)
+    if limit is not None:
+        rows = rows[:limit]
+    cards = [TaskCard(row) for row in rows]
+    if cards:
+        by_pk = {card.pk: card for card in cards}
+        assignees = (
+            TaskInstance.assignees.through.objects.filter(taskinstance_id__in=list(by_pk))
+            .order_by("user__username")
+            .values_list("taskinstance_id", "user__username")
+        )
+        for task_id, username in assignees:
+            by_pk[task_id].assignee_names.append(username)
+    return cards
@@ -0,0 +1,230 @@
+"""Blocks/blocked-by graph between the tasks of a project.
+
+Every task that takes part in a dependency carries a ``dependency_rank`` and
+the ranks of a project always form a topological order: a blocker ranks
+lower than everything it blocks. That order is maintained incrementally on
+insert (Pearce & Kelly, "A dynamic topological sort algorithm for directed
+acyclic graphs"):
+
+* an edge that already agrees with the order is stored without any search;
+* otherwise only the tasks ranked between the two endpoints are searched.
+  Reaching the blocker from the blocked task means the edge closes a cycle
+  and it is rejected; if not, just the visited tasks swap ranks among
+  themselves.
+
+Removing an edge never invalidates the order, so it needs no bookkeeping.
+
+With the order at hand, ``critical_path`` schedules a whole project in one
+forward and one backward sweep over an in-memory adjacency list, and caches
+the result until a task or edge of the project changes.
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .cache import open_tasks_key
+from .models import TaskDependency, TaskInstance
+
+CRITICAL_PATH_CACHE_TIMEOUT = 60 * 60
+
+
+def add_dependency(blocker, blocked, *, user=None):
+    """Record that ``blocker`` blocks ``blocked`` and return the new edge.
+
+    Raises ``ValidationError`` for self-dependencies, tasks of different
+    projects, duplicates, and edges that would close a cycle.
+    """
+    from projects.models import Project
+
+    if blocker.pk == blocked.pk:
+        raise ValidationError("A task cannot depend on itself.")
+    if blocker.project_id != blocked.project_id:
+        raise ValidationError("Dependencies can only link tasks of the same project.")
+
+    with transaction.atomic():
+        # One writer per project graph: ranks are read, searched and rewritten below.
+        Project.objects.select_for_update().get(pk=blocker.project_id)
+        if TaskDependency.objects.filter(blocker=blocker, blocked=blocked).exists():
+            raise ValidationError("This dependency already exists.")
+
+        ranks = _ensure_ranked(blocker.project_id, [blocker.pk, blocked.pk])
+        lower, upper = ranks[blocked.pk], ranks[blocker.pk]
+        if upper > lower:
+            _reorder(blocker.pk, blocked.pk, lower, upper)
+        return TaskDependency.objects.create(blocker=blocker, blocked=blocked, created_by=user)
+
+
+def remove_dependency(blocker, blocked):
+    """Delete the edge between two tasks. Returns True if there was one."""
+    deleted, _ = TaskDependency.objects.filter(blocker=blocker, blocked=blocked).delete()
+    return bool(deleted)
+
+
+def _ensure_ranked(project_id, task_ids):
+    """Return ``{pk: rank}`` for ``task_ids``, ranking unranked tasks last."""
+    ranks = dict(
+        TaskInstance.objects.filter(pk__in=task_ids).values_list("pk", "dependency_rank")
+    )
+    unranked = [pk for pk in task_ids if ranks[pk] is None]
+    if unranked:
+        # A task without edges can sit anywhere in the order; the end is free.
+        top = TaskInstance.objects.filter(project_id=project_id).aggregate(
+            top=Max("dependency_rank")
+        )["top"] or 0
+        for offset, pk in enumerate(unranked, start=1):
+            ranks[pk] = top + offset
+            TaskInstance.objects.filter(pk=pk).update(dependency_rank=top + offset)
+    return ranks
+
+
+def _reorder(blocker_id, blocked_id, lower, upper):
+    """Make room for ``blocker -> blocked`` when ``blocked`` currently ranks first.
+
+    Only tasks ranked within ``[lower, upper]`` can lie on a path between the
+    two, so both searches stop at that window.
+    """
+    forward = _reachable(blocked_id, lower, lambda rank: rank <= upper, forward=True)
+    if blocker_id in forward:
+        raise ValidationError("This dependency would create a cycle.")
+    backward = _reachable(blocker_id, upper, lambda rank: rank >= lower, forward=False)
+
+    # Everything that leads to the blocker moves ahead of everything the
+    # blocked task leads to, reusing the same set of ranks.
+    moved = sorted(backward.items(), key=lambda item: item[1])
+    moved += sorted(forward.items(), key=lambda item: item[1])
+    pool = sorted(rank for _, rank in moved)
+    tasks = [TaskInstance(pk=pk, dependency_rank=rank) for (pk, _), rank in zip(moved, pool)]
+    TaskInstance.objects.bulk_update(tasks, ["dependency_rank"])
+
+
+def _reachable(start_id, start_rank, in_window, *, forward):
+    """Breadth-first search along (or against) edges, one query per level.
+
+    Returns ``{pk: rank}`` of every task reached without leaving the window.
+    """
+    source, target = ("blocker", "blocked") if forward else ("blocked", "blocker")
+    seen = {start_id: start_rank}
+    frontier = [start_id]
+    while frontier:
+        edges = TaskDependency.objects.filter(**{f"{source}_id__in": frontier}).values_list(
+            f"{target}_id", f"{target}__dependency_rank"
+        )
+        frontier = []
+        for pk, rank in edges:
+            if pk not in seen and in_window(rank):
+                seen[pk] = rank
+                frontier.append(pk)
+    return seen
+
+
+# ── Critical path ──
+
+def critical_path(project):
+    """Schedule the open tasks of ``project`` along their dependencies.
+
+    Durations are in days: the actual span for tasks with both a start and an
+    end date, otherwise the story points (at least one). Unfinished work is
+    assumed to finish no earlier than tomorrow, and a deadline caps the
+    latest finish of its task. Returns::
+
+        {
+            "finish": date the last task finishes,
+            "path": [task ids of the longest chain, first to last],
+            "tasks": {task id: {"earliest_start", "earliest_finish",
+                                "latest_finish", "slack"}},
+        }
+
+    where ``slack`` is in days and negative when a deadline will be missed.
+    The result is cached until a task or dependency of the project changes.
+    """
+    key = _critical_path_cache_key(project)
+    result = cache.get(key)
+    if result is None:
+        result = _compute_critical_path(project)
+        cache.set(key, result, CRITICAL_PATH_CACHE_TIMEOUT)
+    return result
+
+
+def _critical_path_cache_key(project):
+    edges = TaskDependency.objects.filter(blocked__project=project).aggregate(
+        count=Count("pk"), last=Max("pk")
+    )
+    return (
+        f"tasks:critical_path:{project.pk}:{timezone.localdate().isoformat()}:"
+        f"{open_tasks_key(project)}:{edges['count']}:{edges['last']}"
+    )
+
+
+def _compute_critical_path(project):
+    today = timezone.localdate()
+    tomorrow = today + timedelta(days=1)
+    rows = list(
+        TaskInstance.objects.filter(project=project, is_closed=False).values(
+            "pk", "start_date", "end_date", "deadline", "story_points", "dependency_rank"
+        )
+    )
+    if not rows:
+        return {"finish": None, "path": [], "tasks": {}}
+    # Ranks are a topological order; unranked tasks have no edges.
+    rows.sort(key=lambda row: (row["dependency_rank"] or 0, row["pk"]))
+
+    predecessors = {row["pk"]: [] for row in rows}
+    successors = {row["pk"]: [] for row in rows}
+    for blocker_id, blocked_id in TaskDependency.objects.filter(
+        blocked__project=project, blocked__is_closed=False, blocker__is_closed=False
+    ).values_list("blocker_id", "blocked_id"):
+        predecessors[blocked_id].append(blocker_id)
+        successors[blocker_id].append(blocked_id)
+
+    durations = {}
+    early = {}
+    for row in rows:
+        pk = row["pk"]
+        if row["start_date"] and row["end_date"]:
+            duration = (row["end_date"] - row["start_date"]).days + 1
+        else:
+            duration = max(row["story_points"], 1)
+        durations[pk] = timedelta(days=duration)
+
+        if row["start_date"]:
+            start = row["start_date"]
+        else:
+            start = max([today, *(early[p][1] for p in predecessors[pk])])
+        if row["end_date"]:
+            finish = row["end_date"] + timedelta(days=1)
+        else:
+            finish = max(start + durations[pk], tomorrow)
+        early[pk] = (start, finish)
+
+    project_finish = max(finish for _, finish in early.values())
+    schedule = {}
+    late_start = {}
+    for row in reversed(rows):
+        pk = row["pk"]
+        latest = [project_finish, *(late_start[s] for s in successors[pk])]
+        if row["deadline"]:
+            latest.append(row["deadline"] + timedelta(days=1))
+        latest_finish = min(latest)
+        late_start[pk] = latest_finish - durations[pk]
+        start, finish = early[pk]
+        schedule[pk] = {
+            "earliest_start": start,
+            "earliest_finish": finish,
+            "latest_finish": latest_finish,
+            "slack": (latest_finish - finish).days,
+        }
+
+    # Walk back from the last task to finish through whichever blocker finishes last.
+    current = max(early, key=lambda pk: (early[pk][1], -schedule[pk]["slack"]))
+    path = [current]
+    while predecessors[current]:
+        current = max(predecessors[current], key=lambda pk: early[pk][1])
+        path.append(current)
+    path.reverse()
+
+    return {"finish": project_finish, "path": path, "tasks": schedule}
@@ -0,0 +1,195 @@
+"""Live task board feed.
+
+Views call ``publish_task_event`` when a task is created, moved or edited.
+The event is stored as a ``BoardEvent`` row in the same transaction, so it
+only goes out if the change commits. Events are numbered from the project's
+``ProjectChangeSequence``, whose row stays locked until the numbering
+transaction commits, so a project's events become visible in order and
+"after N" never skips one that commits late. Events of one transaction
+share its number, the task's ``change_seq``. Each process keeps one ``BoardHub``
+that fans events out to the Server-Sent Events streams opened on it
+(``views.task_events``). Those streams are coroutines waiting on an
+``asyncio.Queue``, so on an ASGI server an idle board costs a few kilobytes
+and no thread.
+
+How events reach the hub depends on ``settings.TASK_EVENTS_BACKEND``:
+
+* ``"db"``: one poller task per process reads new ``BoardEvent`` rows for
+  every project with an open stream, every
+  ``settings.TASK_EVENTS_POLL_INTERVAL`` seconds. It keeps a cursor per
+  project, starting at the project's head when its first stream opens.
+  That is one query per interval however many browsers are connected, and
+  changes made by any worker are seen. No broker is needed.
+* ``"local"``: the publishing process hands the event straight to its own
+  hub after commit. There is no polling, but only streams on the same
+  process see the change.
+
+Either way the rows let a browser replay what it missed since its
+``Last-Event-ID``, or the board's ``?after=``, by itself. Rows older than
+``settings.TASK_EVENTS_RETENTION`` are pruned; see ``tasks.pruning``.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+
+from .models import BoardEvent, ProjectChangeSequence
+from .pruning import prune_soon
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+
+
+def publish_task_event(task, kind):
+    """Record that ``task`` was created, moved or updated (``BoardEvent.*``).
+
+    Call it in the transaction that saved the task: the event then takes the
+    task's ``change_seq`` instead of advancing the sequence again.
+    """
+    # One transaction, so the sequence row stays locked until the event commits
+    with transaction.atomic():
+        event = BoardEvent.objects.create(
+            project_id=task.project_id,
+            seq=ProjectChangeSequence.stamp(task.project_id),
+            task_id=task.pk,
+            kind=kind,
+            payload={
+                "stage": task.stage,
+                "category": task.category,
+                "closed": task.is_closed,
+            },
+        )
+    if settings.TASK_EVENTS_BACKEND == "local":
+        message = as_message(event)
+        transaction.on_commit(lambda: hub.publish(event.project_id, message))
+    prune_soon("events")
+    return event
+
+
+def as_message(event):
+    """The JSON-ready body of an event as sent to browsers."""
+    return {"id": event.seq, "kind": event.kind, "task": event.task_id, **event.payload}
+
+
+def events_since(project_id, last_id):
+    """Stored events of a project after ``last_id``, oldest first."""
+    return [
+        as_message(event)
+        for event in BoardEvent.objects.filter(project_id=project_id, seq__gt=last_id)
+    ]
+
+
+class BoardHub:
+    """Per-process fan-out from published events to open board streams.
+
+    Every method except ``publish`` runs on the event loop.
+    """
+
+    def __init__(self):
+        self._streams = defaultdict(set)
+        # Project id -> seq of the last event polled for it
+        self._cursors = {}
+        self._loop = None
+        self._poller = None
+
+    async def subscribe(self, project_id):
+        """Register a new stream for ``project_id`` and return its queue.
+
+        The queue gets events committed after the call; a stream replays
+        older ones itself with ``events_since``. With the "db" backend the
+        first stream of a project starts its cursor at the project's head.
+        """
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        if settings.TASK_EVENTS_BACKEND == "db" and project_id not in self._cursors:
+            head = await _poll_query(_head, project_id)
+            self._cursors.setdefault(project_id, head)
+        self._streams[project_id].add(queue)
+        if settings.TASK_EVENTS_BACKEND == "db" and self._poller is None:
+            self._poller = self._loop.create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, project_id, queue):
+        streams = self._streams.get(project_id)
+        if streams is not None:
+            streams.discard(queue)
+            if not streams:
+                del self._streams[project_id]
+                self._cursors.pop(project_id, None)
+
+    def publish(self, project_id, message):
+        """Hand ``message`` to the streams of ``project_id``. Safe from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self._dispatch, project_id, message)
+
+    def _dispatch(self, project_id, message):
+        for queue in list(self._streams.get(project_id, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # The browser stopped reading. End its stream (None); it
+                # reconnects and resumes from Last-Event-ID.
+                self.unsubscribe(project_id, queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _poll(self):
+        try:
+            while self._streams:
+                await asyncio.sleep(settings.TASK_EVENTS_POLL_INTERVAL)
+                polled = dict(self._cursors)
+                events = await _poll_query(_new_events, polled)
+                for project_id, message in events:
+                    # The project's streams may have closed, or reopened
+                    # with a newer cursor, while the query ran. Events of
+                    # one transaction share their seq.
+                    cursor = self._cursors.get(project_id)
+                    if cursor is not None and message["id"] > polled[project_id] and message["id"] >= cursor:
+                        self._cursors[project_id] = message["id"]
+                        self._dispatch(project_id, message)
+        except Exception:
+            logger.exception("Board event poller stopped")
+        finally:
+            self._poller = None
+
+
+async def _poll_query(func, *args):
+    # Off the request thread, so a slow poll never delays sync views.
+    return await sync_to_async(_like_a_request, thread_sensitive=False)(func, *args)
+
+
+def _like_a_request(func, *args):
+    # The worker thread's connection follows CONN_MAX_AGE as a request's does
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+def _head(project_id):
+    return ProjectChangeSequence.current(project_id)[0]
+
+
+def _new_events(cursors):
+    if not cursors:
+        return []
+    after = Q()
+    for project_id, seq in cursors.items():
+        after |= Q(project_id=project_id, seq__gt=seq)
+    return [
+        (event.project_id, as_message(event))
+        for event in BoardEvent.objects.filter(after).order_by("project_id", "seq")
+    ]
+
+
+hub = BoardHub()
@@ -1,7 +1,10 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from django.db import transaction
 
-from .models import TaskInstance, TaskNote
+from core.concurrency import save_if_unchanged
+
+from .models import ProjectChangeSequence, TaskInstance, TaskNote
 
 User = get_user_model()
 
@@ -80,6 +83,9 @@ class TaskInstanceForm(forms.ModelForm):
         widget=DateInput(attrs={"class": GLASS_INPUT})
     )
 
+    # Version the form was rendered from; see save_versioned()
+    version = forms.IntegerField(required=False, widget=forms.HiddenInput)
+
     class Meta:
         model = TaskInstance
         fields = [
@@ -110,6 +116,7 @@ class TaskInstanceForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         self.project = project
         if self.instance.pk:
+            self.fields["version"].initial = self.instance.version
             if self.instance.assignees.exists():
                 assignee_names = ", ".join(self.instance.assignees.values_list("username", flat=True))
                 self.fields["assignees_search"].initial = assignee_names
@@ -197,6 +204,22 @@ class TaskInstanceForm(forms.ModelForm):
                 instance.assignees.clear()
         return instance
 
+    def save_versioned(self):
+        """Save an edit unless the task changed since this form was rendered.
+
+        Returns False, leaving the task untouched, on a conflicting edit.
+        """
+        instance = super().save(commit=False)
+        instance.coordinator = self.cleaned_data.get("coordinator")
+        fields = [*self._meta.fields, "coordinator", "change_seq"]
+        with transaction.atomic():
+            # The sequence row before the task row, like every task write
+            instance.change_seq = ProjectChangeSequence.stamp(instance.project_id)
+            if not save_if_unchanged(instance, self.cleaned_data.get("version"), fields):
+                return False
+            instance.assignees.set(self.cleaned_data.get("assignees", []))
+        return True
+
 
 class TaskNoteForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.models import Project
+from tasks.archive import archive_tasks
+
+
+class Command(BaseCommand):
+    help = "Move closed and long-finished task instances into the archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.TASK_ARCHIVE_AFTER_DAYS,
+            help="Archive DONE tasks untouched for this many days (closed tasks are always eligible).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--project", type=int, help="Only archive tasks of this project id.")
+
+    def handle(self, *args, **options):
+        project = None
+        if options["project"] is not None:
+            try:
+                project = Project.objects.get(pk=options["project"])
+            except Project.DoesNotExist:
+                raise CommandError(f"Project {options['project']} does not exist.")
+
+        count = archive_tasks(
+            older_than_days=options["days"],
+            batch_size=options["batch_size"],
+            project=project,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Archived {count} task instance(s)."))
@@ -0,0 +1,102 @@
+import random
+import time
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import Context, Template
+from django.utils import timezone
+
+from organizations.models import Organization
+from projects.models import Project
+from tasks.cards import task_cards
+from tasks.models import TaskInstance
+
+CARDS_TEMPLATE = Template(
+    '{% for task in tasks %}{% include "tasks/_task_card.html" %}{% endfor %}'
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare memory and render time of the board card partial for model "
+        "instances versus TaskCard view-models. Runs in a rolled-back transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cards", type=int, default=2000)
+        parser.add_argument("--rounds", type=int, default=3, help="Best of this many runs per variant.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            project = self._seed(options["cards"])
+            queryset = TaskInstance.objects.filter(project=project, is_closed=False)
+            results = {
+                "models": self._measure(lambda: self._load_models(queryset), options["rounds"]),
+                "cards": self._measure(lambda: task_cards(queryset), options["rounds"]),
+            }
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{options['cards']} cards, best of {options['rounds']}:")
+        for name, (load_ms, render_ms, peak_kib) in results.items():
+            self.stdout.write(
+                f"  {name:<7} load {load_ms:8.1f} ms   render {render_ms:8.1f} ms   "
+                f"peak {peak_kib:9.0f} KiB"
+            )
+
+    def _seed(self, count):
+        User = get_user_model()
+        organization = Organization.objects.create(name=f"benchmark-{time.time_ns()}")
+        project = Project.objects.create(name="Card benchmark", organization=organization)
+        users = [
+            User.objects.create(username=f"bench-{time.time_ns()}-{i}") for i in range(5)
+        ]
+        today = timezone.now().date()
+        stages = [key for key, _ in TaskInstance.STAGE_CHOICES]
+        TaskInstance.objects.bulk_create(
+            TaskInstance(
+                project=project,
+                title=f"Benchmark task {i}",
+                description="Lorem ipsum dolor sit amet. " * 40,
+                category=TaskInstance.DEVELOPMENT,
+                stage=random.choice(stages),
+                story_points=random.randint(0, 8),
+                deadline=today + timedelta(days=random.randint(-10, 30)),
+            )
+            for i in range(count)
+        )
+        links = TaskInstance.assignees.through
+        links.objects.bulk_create(
+            links(taskinstance_id=task_id, user_id=random.choice(users).pk)
+            for task_id in TaskInstance.objects.filter(project=project).values_list("pk", flat=True)
+        )
+        return project
+
+    def _load_models(self, queryset):
+        tasks = list(queryset.with_due_status().prefetch_related("assignees"))
+        for task in tasks:
+            task.assignee_names = [user.username for user in task.assignees.all()]
+        return tasks
+
+    def _measure(self, load, rounds):
+        """Best load/render times over ``rounds``, then peak memory of one traced run."""
+        load_ms = render_ms = float("inf")
+        for _ in range(rounds):
+            started = time.perf_counter()
+            tasks = load()
+            loaded = time.perf_counter()
+            CARDS_TEMPLATE.render(Context({"tasks": tasks, "can_move": True}))
+            rendered = time.perf_counter()
+            load_ms = min(load_ms, (loaded - started) * 1000)
+            render_ms = min(render_ms, (rendered - loaded) * 1000)
+            del tasks
+
+        # Timed separately: tracing allocations slows everything down severalfold
+        tracemalloc.start()
+        tasks = load()
+        CARDS_TEMPLATE.render(Context({"tasks": tasks, "can_move": True}))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return load_ms, render_ms, peak / 1024
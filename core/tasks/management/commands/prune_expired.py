@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from tasks.pruning import BATCH_SIZE, EXPIRED, prune
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete board events older than TASK_EVENTS_RETENTION seconds and move "
+        "receipts older than TASK_MOVE_IDEMPOTENCY_TTL seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        for kind in EXPIRED:
+            count = prune(kind, batch_size=options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Pruned {count} expired {kind}."))
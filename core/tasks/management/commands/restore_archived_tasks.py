@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from projects.models import Project
+from tasks.archive import restore_project
+
+
+class Command(BaseCommand):
+    help = "Move a project's archived task instances back into the live tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project", type=int, help="Project id to restore.")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            project = Project.objects.get(pk=options["project"])
+        except Project.DoesNotExist:
+            raise CommandError(f"Project {options['project']} does not exist.")
+
+        count = restore_project(project, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Restored {count} task instance(s) to '{project.name}'."))
@@ -0,0 +1,323 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import Role, warm_role_cache
+from logs.models import AuditLog
+from organizations.models import Organization
+from projects.models import Project, ProjectCategory, ProjectNote
+from tasks.models import ProjectChangeSequence, TaskInstance, TaskNote
+
+User = get_user_model()
+T = TaskInstance
+
+# (value, weight) pairs
+USER_ROLES = [(Role.DEVELOPER, 80), (Role.COORDINATOR, 15), (Role.ADMINISTRATOR, 5)]
+ROOT_CATEGORIES = [(T.DEVELOPMENT, 60), (T.IMPLEMENTATION, 15), (T.IMPROVEMENT, 10), (T.GENERAL, 15)]
+ROOT_STAGES = [(T.TODO, 30), (T.IN_PROGRESS, 20), (T.PENDING, 5), (T.HAVING_ISSUES, 5), (T.DONE, 40)]
+# What happened to the testing clone of a finished build task
+TESTING_STAGES = [(T.TODO, 25), (T.IN_PROGRESS, 20), (T.DONE, 40), (T.REJECT, 15)]
+DEPLOYMENT_STAGES = [(T.TODO, 30), (T.IN_PROGRESS, 20), (T.DONE, 50)]
+AUDIT_ACTIONS = [
+    ("STAGE_CHANGE", 55),
+    ("TASK_UPDATED", 20),
+    ("TASK_CREATED", 12),
+    ("TASK_CLONED_TO_TESTING", 6),
+    ("TASK_CLONED_TO_DEPLOYMENT", 4),
+    ("TESTING_REJECTED", 2),
+    ("DEPLOYMENT_DONE", 1),
+]
+CATEGORY_NAMES = [
+    "Backend", "Frontend", "Infrastructure", "Design", "Quality", "Documentation",
+    "Data", "Security", "Integrations", "Reporting", "Mobile", "Operations",
+]
+WORDS = (
+    "account api archive audit board cache client dashboard deploy export filter form import "
+    "index invoice login migration notification page payment permission report role schedule "
+    "search session settings sync template timeline token upload user validation webhook"
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large, realistic data set for benchmarking: organizations, users, "
+        "projects with weighted categories, task instances with clone lineage, notes "
+        "and audit log entries. The same --seed always produces the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--prefix", default="bench", help="Prefix of generated user and organization names.")
+        parser.add_argument("--organizations", type=int, default=10)
+        parser.add_argument("--users", type=int, default=3000)
+        parser.add_argument("--projects", type=int, default=300)
+        parser.add_argument(
+            "--work-items", type=int, default=655_000,
+            help="Tasks created on boards; finished ones add testing, deployment and rework clones, "
+            "about 1.5 task instances per work item (the default makes about a million).",
+        )
+        parser.add_argument("--notes", type=int, default=30_000, help="Project and task notes.")
+        parser.add_argument("--audit-logs", type=int, default=2_000_000)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.prefix = options["prefix"]
+        self.batch_size = options["batch_size"]
+        self.today = timezone.now().date()
+        self.counts = {}
+        self.elapsed = {}
+
+        if options["users"] < options["organizations"] or min(options["organizations"], options["projects"]) < 1:
+            raise CommandError("Need at least one organization and project, and a user per organization.")
+        if Organization.objects.filter(name__startswith=f"{self.prefix} ").exists():
+            raise CommandError(f"Data with prefix {self.prefix!r} already exists; pass another --prefix.")
+
+        started = time.perf_counter()
+        organizations = self._organizations(options["organizations"])
+        members = self._users(options["users"], organizations)
+        projects = self._projects(options["projects"], organizations, members)
+
+        # Each project gets a share of the work: a few big boards, many small ones
+        shares = [min(self.rng.paretovariate(1.2), 50) for _ in projects]
+        total_share = sum(shares)
+        for project, share in zip(projects, shares):
+            fraction = share / total_share
+            with transaction.atomic():
+                self._project_content(
+                    project,
+                    work_items=max(1, round(options["work_items"] * fraction)),
+                    notes=round(options["notes"] * fraction),
+                    audit_logs=round(options["audit_logs"] * fraction),
+                )
+        warm_role_cache()
+
+        self._report(time.perf_counter() - started)
+
+    # ── Generators ──
+
+    def _organizations(self, count):
+        return self._insert(Organization, [
+            Organization(name=f"{self.prefix} Organization {i:03d}", description=self._sentence(12))
+            for i in range(count)
+        ])
+
+    def _users(self, count, organizations):
+        """Users spread over organizations; returns ``{organization_id: [user_id, ...]}``."""
+        roles = {name: Role.objects.get_or_create(name=name)[0] for name, _ in USER_ROLES}
+        password = make_password(self.prefix)  # hashing once; every user signs in with the prefix
+        users = []
+        for i in range(count):
+            role = roles[self._pick(USER_ROLES)]
+            organization = organizations[i % len(organizations)]
+            users.append(User(
+                username=f"{self.prefix}-user-{i:05d}",
+                email=f"{self.prefix}-user-{i:05d}@example.com",
+                password=password,
+                role=role,
+                admin_organization=organization if role.name == Role.ADMINISTRATOR else None,
+            ))
+        users = self._insert(User, users)
+
+        members = {organization.pk: [] for organization in organizations}
+        links = Organization.members.through
+        rows = []
+        for i, user in enumerate(users):
+            home = organizations[i % len(organizations)]
+            joined = {home}
+            if self.rng.random() < 0.1:
+                joined.add(self.rng.choice(organizations))
+            for organization in sorted(joined, key=lambda o: o.pk):
+                members[organization.pk].append(user.pk)
+                rows.append(links(organization_id=organization.pk, user_id=user.pk))
+        self._insert(links, rows, label="Organization members")
+        return members
+
+    def _projects(self, count, organizations, members):
+        projects = self._insert(Project, [
+            Project(
+                name=f"{self._title(3)} {i:04d}",
+                description=self._sentence(30),
+                organization=organizations[i % len(organizations)],
+                planned_start_date=self.today - timedelta(days=self.rng.randint(-30, 365)),
+                planned_end_date=self.today + timedelta(days=self.rng.randint(-60, 365)),
+            )
+            for i in range(count)
+        ])
+
+        memberships = {"members": [], "commenters": [], "viewers": []}
+        categories = []
+        for project in projects:
+            people = members[project.organization_id]
+            team = self.rng.sample(people, min(len(people), self.rng.randint(5, 30)))
+            team_set = set(team)
+            project.team = team
+            audience = [pk for pk in people if pk not in team_set]
+            for relation, size in (("members", None), ("commenters", 5), ("viewers", 10)):
+                chosen = team if size is None else self.rng.sample(audience, min(len(audience), self.rng.randint(0, size)))
+                through = getattr(Project, relation).through
+                memberships[relation] += [through(project_id=project.pk, user_id=pk) for pk in chosen]
+
+            # Weights are each category's share of the project's progress and add up to 100
+            names = self.rng.sample(CATEGORY_NAMES, self.rng.randint(3, 8))
+            cuts = sorted(self.rng.sample(range(1, 100), len(names) - 1))
+            weights = [b - a for a, b in zip([0, *cuts], [*cuts, 100])]
+            categories += [
+                ProjectCategory(project=project, name=name, weight=weight, order=order)
+                for order, (name, weight) in enumerate(zip(names, weights))
+            ]
+        for relation, rows in memberships.items():
+            self._insert(getattr(Project, relation).through, rows, label=f"Project {relation}")
+
+        categories = self._insert(ProjectCategory, categories)
+        for project in projects:
+            project.category_ids = []
+        by_pk = {project.pk: project for project in projects}
+        for category in categories:
+            by_pk[category.project_id].category_ids.append(category.pk)
+        return projects
+
+    def _project_content(self, project, work_items, notes, audit_logs):
+        """Tasks with their clones, assignees, notes and audit entries of one project."""
+        sequence = 0
+
+        def task(**fields):
+            nonlocal sequence
+            sequence += 1
+            return TaskInstance(project=project, change_seq=sequence, **fields)
+
+        # First instances of every work item
+        roots = []
+        for _ in range(work_items):
+            category = self._pick(ROOT_CATEGORIES)
+            stage = self._pick(ROOT_STAGES)
+            start = self.today - timedelta(days=self.rng.randint(0, 400))
+            roots.append(task(
+                title=self._title(5),
+                description=self._sentence(40),
+                project_category_id=self.rng.choice(project.category_ids) if self.rng.random() < 0.85 else None,
+                category=category,
+                stage=stage,
+                story_points=self.rng.choice([0, 1, 2, 3, 5, 8, 13]),
+                points_earned=stage == T.DONE,
+                deadline=start + timedelta(days=self.rng.randint(3, 60)) if self.rng.random() < 0.7 else None,
+                start_date=start if stage != T.TODO else None,
+                end_date=start + timedelta(days=self.rng.randint(1, 30)) if stage == T.DONE else None,
+                created_by_id=self.rng.choice(project.team),
+            ))
+        roots = self._insert(TaskInstance, roots)
+        TaskInstance.objects.filter(project=project, work_item__isnull=True).update(work_item=F("pk"))
+
+        # Finished build work went to testing; testing either passed to
+        # deployment or was rejected, sending the build task back to TODO
+        testing, reset = [], []
+        for root in roots:
+            if root.category in T.BUILD_CATEGORIES and root.stage == T.DONE:
+                outcome = self._pick(TESTING_STAGES)
+                testing.append(self._clone(task, root, T.TESTING, outcome))
+                if outcome == T.REJECT:
+                    root.stage, root.end_date, root.points_earned = T.TODO, None, False
+                    reset.append(root)
+        testing = self._insert(TaskInstance, testing)
+        if reset:
+            TaskInstance.objects.bulk_update(reset, ["stage", "end_date", "points_earned"], batch_size=self.batch_size)
+        deployment = self._insert(TaskInstance, [
+            self._clone(task, tested, T.DEPLOYMENT, self._pick(DEPLOYMENT_STAGES))
+            for tested in testing
+            if tested.stage == T.DONE
+        ])
+        ProjectChangeSequence.objects.create(project=project, value=sequence)
+
+        tasks = roots + testing + deployment
+        by_pk = {t.pk: t for t in tasks}
+        links = TaskInstance.assignees.through
+        assignments = []
+        for t in roots:
+            t.assignee_ids = self.rng.sample(project.team, min(len(project.team), self.rng.randint(1, 3)))
+        for t in testing + deployment:
+            # Clones keep the people of the task they were cloned from
+            t.assignee_ids = by_pk[t.parent_task_id].assignee_ids
+        for t in tasks:
+            assignments += [links(taskinstance_id=t.pk, user_id=pk) for pk in t.assignee_ids]
+        self._insert(links, assignments, label="Task assignees")
+
+        project_notes = notes // 4
+        self._insert(ProjectNote, [
+            ProjectNote(project=project, author_id=self.rng.choice(project.team), content=self._sentence(25))
+            for _ in range(project_notes)
+        ])
+        self._insert(TaskNote, [
+            TaskNote(task_id=self.rng.choice(tasks).pk, author_id=self.rng.choice(project.team), content=self._sentence(20))
+            for _ in range(notes - project_notes)
+        ])
+
+        for start in range(0, audit_logs, self.batch_size):
+            batch = []
+            for _ in range(min(self.batch_size, audit_logs - start)):
+                target = self.rng.choice(tasks)
+                batch.append(AuditLog(
+                    actor_id=self.rng.choice(project.team),
+                    action=self._pick(AUDIT_ACTIONS),
+                    target_type="TaskInstance",
+                    target_id=target.pk,
+                    detail=f"Task '{target.title}' {self._sentence(6)}",
+                    project=project,
+                ))
+            self._insert(AuditLog, batch)
+
+    def _clone(self, task, parent, category, stage):
+        return task(
+            title=parent.title,
+            description=parent.description,
+            project_category_id=parent.project_category_id,
+            category=category,
+            stage=T.DONE if stage == T.REJECT else stage,
+            is_closed=stage == T.REJECT,
+            story_points=parent.story_points,
+            points_earned=stage == T.DONE,
+            deadline=parent.deadline,
+            start_date=parent.end_date if stage != T.TODO else None,
+            end_date=parent.end_date + timedelta(days=self.rng.randint(1, 14)) if stage in (T.DONE, T.REJECT) else None,
+            created_by_id=parent.created_by_id,
+            parent_task_id=parent.pk,
+            work_item=parent.work_item or parent.pk,
+            original_category=parent.original_category or parent.category,
+        )
+
+    # ── Helpers ──
+
+    def _insert(self, model, objs, label=None):
+        """``bulk_create`` in batches, counting rows and time under ``label``."""
+        label = label or model._meta.verbose_name_plural.capitalize()
+        started = time.perf_counter()
+        created = model.objects.bulk_create(objs, batch_size=self.batch_size)
+        self.elapsed[label] = self.elapsed.get(label, 0) + time.perf_counter() - started
+        self.counts[label] = self.counts.get(label, 0) + len(objs)
+        return created
+
+    def _pick(self, weighted):
+        values, weights = zip(*weighted)
+        return self.rng.choices(values, weights)[0]
+
+    def _sentence(self, words):
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(max(1, words // 2), words))).capitalize() + "."
+
+    def _title(self, words):
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(2, words))).capitalize()
+
+    def _report(self, elapsed):
+        total = sum(self.counts.values())
+        for label, count in self.counts.items():
+            insert_time = self.elapsed[label]
+            rate = count / insert_time if insert_time else 0
+            self.stdout.write(f"  {label:<22} {count:>11,} rows  {rate:>11,.0f} rows/s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {total:,} rows in {elapsed:.1f} s ({total / elapsed:,.0f} rows/s overall)."
+        ))
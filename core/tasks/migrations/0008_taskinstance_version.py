@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_movereceipt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskinstance',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False, help_text='Bumped on every write; guards edit forms against lost updates.'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_taskinstance_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskinstance',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['project', 'category', 'stage'], name='task_active_board_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskinstance',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['project', 'project_category'], name='task_active_pcat_idx'),
+        ),
+    ]
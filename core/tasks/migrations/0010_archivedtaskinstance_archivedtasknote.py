@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('projects', '0006_project_version_projectcategory_version'),
+        ('tasks', '0009_taskinstance_active_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTaskInstance',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=300)),
+                ('description', models.TextField(blank=True)),
+                ('category', models.CharField(choices=[('DEVELOPMENT', 'Development'), ('IMPLEMENTATION', 'Implementation'), ('IMPROVEMENT', 'Improvement'), ('TESTING', 'Testing'), ('DEPLOYMENT', 'Deployment'), ('GENERAL', 'General')], max_length=20)),
+                ('stage', models.CharField(choices=[('TODO', 'To Do'), ('IN_PROGRESS', 'In Progress'), ('PENDING', 'Pending'), ('HAVING_ISSUES', 'Having Issues'), ('DONE', 'Done'), ('REJECT', 'Reject')], max_length=20)),
+                ('story_points', models.PositiveIntegerField(default=0)),
+                ('points_earned', models.BooleanField(default=False)),
+                ('deadline', models.DateField(blank=True, null=True)),
+                ('start_date', models.DateField(blank=True, null=True)),
+                ('end_date', models.DateField(blank=True, null=True)),
+                ('parent_task_id', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('original_category', models.CharField(blank=True, choices=[('DEVELOPMENT', 'Development'), ('IMPLEMENTATION', 'Implementation'), ('IMPROVEMENT', 'Improvement'), ('TESTING', 'Testing'), ('DEPLOYMENT', 'Deployment'), ('GENERAL', 'General')], max_length=20)),
+                ('is_closed', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('assignees', models.ManyToManyField(blank=True, related_name='archived_assigned_tasks', to=settings.AUTH_USER_MODEL)),
+                ('coordinator', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to='projects.project')),
+                ('project_category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_tasks', to='projects.projectcategory')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTaskNote',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notes', to='tasks.archivedtaskinstance')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:43
+
+from django.db import migrations, models
+from django.db.models import Exists, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 5000
+
+
+def _batched_update(queryset, **values):
+    """Run ``queryset.update(**values)`` over consecutive primary-key ranges."""
+    bounds = queryset.aggregate(lo=Min("pk"), hi=Max("pk"))
+    if bounds["lo"] is None:
+        return 0
+    updated = 0
+    for start in range(bounds["lo"], bounds["hi"] + 1, BATCH_SIZE):
+        updated += queryset.filter(pk__gte=start, pk__lt=start + BATCH_SIZE).update(**values)
+    return updated
+
+
+def backfill_work_items(apps, schema_editor):
+    """Stamp every existing instance with the id of the root of its clone chain.
+
+    Roots name their own work item; each further pass copies the work item one
+    generation down the ``parent_task`` chain, so the number of passes is the
+    depth of the deepest chain rather than the number of rows.
+    """
+    TaskInstance = apps.get_model("tasks", "TaskInstance")
+    ArchivedTaskInstance = apps.get_model("tasks", "ArchivedTaskInstance")
+
+    def parent_item(model):
+        return model.objects.filter(pk=OuterRef("parent_task_id")).values("work_item")[:1]
+
+    def parent_stamped(model):
+        return Exists(model.objects.filter(pk=OuterRef("parent_task_id"), work_item__isnull=False))
+
+    # Live rows only ever point at live parents.
+    pending = TaskInstance.objects.filter(work_item__isnull=True)
+    _batched_update(pending.filter(parent_task__isnull=True), work_item=F("pk"))
+    while _batched_update(
+        pending.filter(parent_stamped(TaskInstance)),
+        work_item=Subquery(parent_item(TaskInstance)),
+    ):
+        pass
+
+    # Archived rows may point at a live or an archived parent.
+    pending = ArchivedTaskInstance.objects.filter(work_item__isnull=True)
+    _batched_update(pending.filter(parent_task_id__isnull=True), work_item=F("pk"))
+    while _batched_update(
+        pending.filter(Q(parent_stamped(TaskInstance)) | Q(parent_stamped(ArchivedTaskInstance))),
+        work_item=Coalesce(
+            Subquery(parent_item(TaskInstance)), Subquery(parent_item(ArchivedTaskInstance))
+        ),
+    ):
+        pass
+
+    # Whatever is left points at a parent that no longer exists: a new root.
+    _batched_update(TaskInstance.objects.filter(work_item__isnull=True), work_item=F("pk"))
+    _batched_update(ArchivedTaskInstance.objects.filter(work_item__isnull=True), work_item=F("pk"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0010_archivedtaskinstance_archivedtasknote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedtaskinstance',
+            name='work_item',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='taskinstance',
+            name='work_item',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, help_text='Id of the first instance of this logical work item, shared by all its clones.', null=True),
+        ),
+        migrations.RunPython(backfill_work_items, migrations.RunPython.noop),
+    ]
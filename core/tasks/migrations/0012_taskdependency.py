@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0011_work_item'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='taskinstance',
+            name='dependency_rank',
+            field=models.BigIntegerField(blank=True, editable=False, help_text="Position in the project's dependency order; blockers always rank lower.", null=True),
+        ),
+        migrations.CreateModel(
+            name='TaskDependency',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('blocked', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocked_by', to='tasks.taskinstance')),
+                ('blocker', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocking', to='tasks.taskinstance')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Task Dependencies',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskdependency',
+            constraint=models.CheckConstraint(check=models.Q(('blocker', models.F('blocked')), _negated=True), name='task_dependency_not_self'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='taskdependency',
+            unique_together={('blocker', 'blocked')},
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0012_taskdependency'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskinstance',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['project', 'start_date', 'end_date'], name='task_active_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskinstance',
+            index=models.Index(condition=models.Q(('is_closed', False)), fields=['project', 'deadline'], name='task_active_deadline_idx'),
+        ),
+    ]
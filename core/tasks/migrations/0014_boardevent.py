@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_project_version_projectcategory_version'),
+        ('tasks', '0013_taskinstance_timeline_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('created', 'Created'), ('moved', 'Moved'), ('updated', 'Updated')], max_length=10)),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='board_events', to='projects.project')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_project_version_projectcategory_version'),
+        ('tasks', '0014_boardevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectChangeSequence',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='change_sequence', serialize=False, to='projects.project')),
+                ('value', models.BigIntegerField(default=0)),
+                ('reset_below', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='taskinstance',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, help_text='Project change sequence number of the last write; see ProjectChangeSequence.'),
+        ),
+        migrations.AddIndex(
+            model_name='taskinstance',
+            index=models.Index(fields=['project', 'change_seq'], name='task_change_seq_idx'),
+        ),
+    ]
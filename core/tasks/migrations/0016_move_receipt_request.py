@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0015_project_change_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movereceipt',
+            name='category',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='movereceipt',
+            name='stage',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+    ]
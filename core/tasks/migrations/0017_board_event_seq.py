@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0016_move_receipt_request'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='boardevent',
+            options={'ordering': ['seq']},
+        ),
+        migrations.AddField(
+            model_name='boardevent',
+            name='seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='boardevent',
+            index=models.Index(fields=['project', 'seq'], name='board_event_seq_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:27
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0017_board_event_seq'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='taskinstance',
+            name='task_active_dates_idx',
+        ),
+        migrations.AddIndex(
+            model_name='taskinstance',
+            index=models.Index(models.F('project'), django.db.models.functions.comparison.Coalesce('start_date', 'deadline'), django.db.models.functions.comparison.Coalesce('end_date', 'deadline', 'start_date'), condition=models.Q(('is_closed', False)), name='task_active_dates_idx'),
+        ),
+    ]
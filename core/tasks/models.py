@@ -1,7 +1,72 @@
+from datetime import timedelta
+
 from django.conf import settings
-from django.db import models
+from django.db import connections, models, router, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 
+from core.db_functions import DateDiff
+
+
+class TaskInstanceQuerySet(models.QuerySet):
+    """Deadline queries shared by live and archived task instances."""
+
+    def with_due_status(self, today=None):
+        """Annotate ``days_until_due``, ``due_code`` and ``on_time_code``.
+
+        These are the SQL counterparts of ``due_status`` and ``on_time_status``,
+        using the ``TaskInstance.DUE_*`` and ``ON_TIME_*`` codes, so whole
+        boards and timelines can be classified, filtered and sorted without
+        loading every instance. ``days_until_due`` is negative once overdue
+        and NULL without a deadline.
+        """
+        if today is None:
+            today = timezone.now().date()
+        return self.annotate(
+            days_until_due=DateDiff(models.F("deadline"), models.Value(today, output_field=models.DateField())),
+            due_code=models.Case(
+                models.When(deadline__isnull=True, then=models.Value(TaskInstance.DUE_NONE)),
+                models.When(deadline__lt=today, then=models.Value(TaskInstance.DUE_OVERDUE)),
+                models.When(deadline=today, then=models.Value(TaskInstance.DUE_TODAY)),
+                default=models.Value(TaskInstance.DUE_LATER),
+                output_field=models.PositiveSmallIntegerField(),
+            ),
+            on_time_code=models.Case(
+                models.When(
+                    ~models.Q(stage=TaskInstance.DONE) | models.Q(end_date__isnull=True) | models.Q(deadline__isnull=True),
+                    then=models.Value(TaskInstance.ON_TIME_NONE),
+                ),
+                models.When(end_date__lte=models.F("deadline"), then=models.Value(TaskInstance.ON_TIME)),
+                default=models.Value(TaskInstance.ON_TIME_LATE),
+                output_field=models.PositiveSmallIntegerField(),
+            ),
+        )
+
+    def overdue(self, today=None):
+        """Unfinished instances whose deadline has passed."""
+        if today is None:
+            today = timezone.now().date()
+        return self.filter(deadline__lt=today).exclude(stage=TaskInstance.DONE)
+
+    def due_within(self, days, today=None):
+        """Unfinished instances due from today up to, not including, ``days`` days from now."""
+        if today is None:
+            today = timezone.now().date()
+        return self.filter(
+            deadline__gte=today, deadline__lt=today + timedelta(days=days)
+        ).exclude(stage=TaskInstance.DONE)
+
+
+def due_label(days):
+    """'Due in X days', 'Due today' or 'Overdue X days' for a signed day count."""
+    if days > 0:
+        return f"Due in {days} day{'s' if days != 1 else ''}"
+    elif days == 0:
+        return "Due today"
+    else:
+        return f"Overdue {abs(days)} day{'s' if abs(days) != 1 else ''}"
+
 
 class TaskInstance(models.Model):
     """Atomic unit of work. A logical work item may have multiple instances."""
@@ -42,6 +107,46 @@ class TaskInstance(models.Model):
         (REJECT, "Reject"),
     ]
 
+    # ── Badge classes ──
+    STAGE_COLORS = {
+        TODO: "bg-slate-500/30 text-slate-300",
+        IN_PROGRESS: "bg-blue-500/30 text-blue-300",
+        PENDING: "bg-yellow-500/30 text-yellow-300",
+        HAVING_ISSUES: "bg-orange-500/30 text-orange-300",
+        DONE: "bg-emerald-500/30 text-emerald-300",
+        REJECT: "bg-red-500/30 text-red-300",
+    }
+
+    CATEGORY_COLORS = {
+        DEVELOPMENT: "border-blue-400/40",
+        IMPLEMENTATION: "border-purple-400/40",
+        IMPROVEMENT: "border-cyan-400/40",
+        TESTING: "border-amber-400/40",
+        DEPLOYMENT: "border-emerald-400/40",
+        GENERAL: "border-slate-400/40",
+    }
+
+    # Stages that carry their own status badge
+    STAGE_STATUSES = {
+        PENDING: "⏸️ Pending",
+        HAVING_ISSUES: "⚠️ Having Issues",
+    }
+
+    # ── Due status codes (see TaskInstanceQuerySet.with_due_status) ──
+    DUE_NONE = 0
+    DUE_LATER = 1
+    DUE_TODAY = 2
+    DUE_OVERDUE = 3
+
+    ON_TIME_NONE = 0
+    ON_TIME = 1
+    ON_TIME_LATE = 2
+
+    ON_TIME_LABELS = {
+        ON_TIME: "On Time",
+        ON_TIME_LATE: "Late",
+    }
+
     # ── Identity ──
     title = models.CharField(max_length=300)
     description = models.TextField(blank=True)
@@ -107,39 +212,83 @@ class TaskInstance(models.Model):
         blank=True,
         help_text="Original category before cloning to testing.",
     )
+    work_item = models.BigIntegerField(
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="Id of the first instance of this logical work item, shared by all its clones.",
+    )
     is_closed = models.BooleanField(default=False)
 
+    # ── Dependencies ──
+    dependency_rank = models.BigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Position in the project's dependency order; blockers always rank lower.",
+    )
+
     # ── Timestamps ──
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(
+        default=1, editable=False, help_text="Bumped on every write; guards edit forms against lost updates."
+    )
+    change_seq = models.BigIntegerField(
+        default=0,
+        editable=False,
+        help_text="Project change sequence number of the last write; see ProjectChangeSequence.",
+    )
+
+    objects = TaskInstanceQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Nearly every task query is "active tasks of a project" narrowed by
+            # lane/stage (board, task_stats, dashboard) or by project category
+            # (category progress, uncategorized tasks). Closed instances are
+            # never read on those paths, so they are left out of the index.
+            models.Index(
+                fields=["project", "category", "stage"],
+                condition=models.Q(is_closed=False),
+                name="task_active_board_idx",
+            ),
+            models.Index(
+                fields=["project", "project_category"],
+                condition=models.Q(is_closed=False),
+                name="task_active_pcat_idx",
+            ),
+            # Timeline window lookups, on the span_start/span_end expressions
+            # the timeline view filters on
+            models.Index(
+                F("project"),
+                Coalesce("start_date", "deadline"),
+                Coalesce("end_date", "deadline", "start_date"),
+                condition=models.Q(is_closed=False),
+                name="task_active_dates_idx",
+            ),
+            models.Index(
+                fields=["project", "deadline"],
+                condition=models.Q(is_closed=False),
+                name="task_active_deadline_idx",
+            ),
+            # Board delta API: everything written since a client's cursor,
+            # closed instances included
+            models.Index(fields=["project", "change_seq"], name="task_change_seq_idx"),
+        ]
 
     def __str__(self):
         return f"[{self.get_category_display()}] {self.title}"
 
     @property
     def stage_color(self):
-        return {
-            self.TODO: "bg-slate-500/30 text-slate-300",
-            self.IN_PROGRESS: "bg-blue-500/30 text-blue-300",
-            self.PENDING: "bg-yellow-500/30 text-yellow-300",
-            self.HAVING_ISSUES: "bg-orange-500/30 text-orange-300",
-            self.DONE: "bg-emerald-500/30 text-emerald-300",
-            self.REJECT: "bg-red-500/30 text-red-300",
-        }.get(self.stage, "bg-white/10 text-white/70")
+        return self.STAGE_COLORS.get(self.stage, "bg-white/10 text-white/70")
 
     @property
     def category_color(self):
-        return {
-            self.DEVELOPMENT: "border-blue-400/40",
-            self.IMPLEMENTATION: "border-purple-400/40",
-            self.IMPROVEMENT: "border-cyan-400/40",
-            self.TESTING: "border-amber-400/40",
-            self.DEPLOYMENT: "border-emerald-400/40",
-            self.GENERAL: "border-slate-400/40",
-        }.get(self.category, "border-white/20")
+        return self.CATEGORY_COLORS.get(self.category, "border-white/20")
 
     @property
     def get_available_moves(self):
@@ -154,20 +303,16 @@ class TaskInstance(models.Model):
     def due_status(self):
         """Returns 'Due in X days', 'Overdue X days', or None if no deadline.
         
-        Based on deadline vs today.
+        Based on deadline vs today, or on the ``days_until_due`` annotation
+        when the instance was loaded ``with_due_status()``.
         """
         if not self.deadline:
             return None
         
-        today = timezone.now().date()
-        days_diff = (self.deadline - today).days
-        
-        if days_diff > 0:
-            return f"Due in {days_diff} day{'s' if days_diff != 1 else ''}"
-        elif days_diff == 0:
-            return "Due today"
-        else:
-            return f"Overdue {abs(days_diff)} day{'s' if abs(days_diff) != 1 else ''}"
+        days_diff = self.__dict__.get("days_until_due")
+        if days_diff is None:
+            days_diff = (self.deadline - timezone.now().date()).days
+        return due_label(days_diff)
 
     @property
     def on_time_status(self):
@@ -189,38 +334,95 @@ class TaskInstance(models.Model):
         
         Used for PENDING and HAVING_ISSUES stages which have their own status.
         """
-        if self.stage == self.PENDING:
-            return "⏸️ Pending"
-        elif self.stage == self.HAVING_ISSUES:
-            return "⚠️ Having Issues"
-        return None
+        return self.STAGE_STATUSES.get(self.stage)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # What the row held, so save() knows the old stage and what changed
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if value is not models.DEFERRED
+        }
+        return instance
 
     def save(self, *args, **kwargs):
         """Auto-set dates when moving to different stages:
         - Set start_date when moving to IN_PROGRESS
         - Set end_date when moving to DONE
         - Set end_date to +7 days when moving to TESTING (for build categories)
+
+        An update writes only the fields that differ from what was loaded,
+        together with ``version``, ``change_seq`` and ``updated_at``.
         """
+        loaded = getattr(self, "_loaded_values", None)
         if self.pk:
             # Task already exists - check for stage transitions
-            old_instance = TaskInstance.objects.get(pk=self.pk)
+            if loaded is not None and "stage" in loaded:
+                old_stage = loaded["stage"]
+            else:
+                old_stage = TaskInstance.objects.values_list("stage", flat=True).get(pk=self.pk)
             
             # Auto-set start_date when moving to IN_PROGRESS
-            if old_instance.stage != self.IN_PROGRESS and self.stage == self.IN_PROGRESS:
+            if old_stage != self.IN_PROGRESS and self.stage == self.IN_PROGRESS:
                 if not self.start_date:
                     self.start_date = timezone.now().date()
             
             # Auto-set end_date to +7 days when moving to TESTING (for build categories)
-            if old_instance.stage != self.TESTING and self.stage == self.TESTING:
+            if old_stage != self.TESTING and self.stage == self.TESTING:
                 if self.category in self.BUILD_CATEGORIES and not self.end_date:
                     self.end_date = timezone.now().date() + timezone.timedelta(days=7)
             
             # Auto-set end_date when moving to DONE
-            if old_instance.stage != self.DONE and self.stage == self.DONE:
+            if old_stage != self.DONE and self.stage == self.DONE:
                 if not self.end_date:
                     self.end_date = timezone.now().date()
-        
-        super().save(*args, **kwargs)
+
+            # Any write makes edit forms rendered from the previous version stale
+            self.version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "version", "change_seq"}
+            elif loaded is not None:
+                kwargs["update_fields"] = {
+                    "version", "change_seq", "updated_at",
+                    *(f.name for f in self._changed_fields(loaded)),
+                }
+            else:
+                # The rank is only written by tasks.dependencies, under the
+                # project lock; the copy loaded with this instance may be stale
+                kwargs["update_fields"] = [
+                    f.name for f in self._meta.concrete_fields
+                    if not f.primary_key and f.name != "dependency_rank"
+                ]
+
+        with transaction.atomic():
+            # Numbered before the row write: every writer takes the project's
+            # sequence row before task rows (see tasks.views._locked_task)
+            self.change_seq = ProjectChangeSequence.stamp(self.project_id)
+            super().save(*args, **kwargs)
+            if self.work_item is None:
+                # First instance of a new work item: its own id names the work item
+                self.work_item = self.pk
+                TaskInstance.objects.filter(pk=self.pk).update(work_item=self.pk)
+
+        saved = kwargs.get("update_fields")
+        self._loaded_values = {
+            **(loaded or {}),
+            **{
+                f.attname: getattr(self, f.attname) for f in self._meta.concrete_fields
+                if saved is None or f.name in saved
+            },
+        }
+
+    def _changed_fields(self, loaded):
+        """Concrete fields set to something other than what was loaded."""
+        changed = []
+        for f in self._meta.concrete_fields:
+            if f.primary_key or f.attname not in self.__dict__:
+                # Deferred and never set
+                continue
+            if f.attname not in loaded or getattr(self, f.attname) != loaded[f.attname]:
+                changed.append(f)
+        return changed
 
 
 class TaskNote(models.Model):
@@ -239,3 +441,347 @@ class TaskNote(models.Model):
 
     def __str__(self):
         return f"Note by {self.author} on {self.task}"
+
+
+class TaskDependency(models.Model):
+    """``blocker`` must be finished before ``blocked`` can start.
+
+    Edges only join tasks of the same project and never form a cycle; add them
+    through ``tasks.dependencies.add_dependency``, which enforces both.
+    """
+
+    blocker = models.ForeignKey(TaskInstance, on_delete=models.CASCADE, related_name="blocking")
+    blocked = models.ForeignKey(TaskInstance, on_delete=models.CASCADE, related_name="blocked_by")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Task Dependencies"
+        unique_together = ["blocker", "blocked"]
+        constraints = [
+            models.CheckConstraint(
+                check=~models.Q(blocker=models.F("blocked")), name="task_dependency_not_self"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.blocker} blocks {self.blocked}"
+
+
+class ProjectChangeSequence(models.Model):
+    """Per-project counter stamped on every task write (``TaskInstance.change_seq``).
+
+    ``stamp`` advances the row once per transaction, and the row stays
+    locked until that transaction commits, so numbers become visible in
+    order: once a client sees ``value`` every task written at or below it is
+    committed. Everything one transaction writes shares its number. The
+    board delta API serves "tasks changed since N" from this.
+
+    Writes that only need cached fragments dropped (notes, categories,
+    memberships) use ``advance_on_commit`` instead, which bumps the row once
+    after the transaction commits and holds no lock while it runs.
+
+    Archiving deletes task rows without leaving anything to number, so it
+    raises ``reset_below``: cursors older than that get a full reload.
+    """
+
+    project = models.OneToOneField(
+        "projects.Project",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="change_sequence",
+    )
+    value = models.BigIntegerField(default=0)
+    reset_below = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.project_id}: {self.value}"
+
+    @classmethod
+    def advance(cls, project_id):
+        """Bump the project's sequence and return the new value."""
+        connection = connections[router.db_for_write(cls)]
+        if connection.vendor in ("postgresql", "sqlite") and connection.features.can_return_columns_from_insert:
+            # Both also support UPDATE ... RETURNING: one statement
+            qn = connection.ops.quote_name
+            sql = (
+                f"UPDATE {qn(cls._meta.db_table)} SET {qn('value')} = {qn('value')} + 1 "
+                f"WHERE {qn('project_id')} = %s RETURNING {qn('value')}"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [project_id])
+                row = cursor.fetchone()
+                if row is None:
+                    cls.objects.get_or_create(project_id=project_id)
+                    cursor.execute(sql, [project_id])
+                    row = cursor.fetchone()
+            return row[0]
+        rows = cls.objects.filter(project_id=project_id)
+        if not rows.update(value=F("value") + 1):
+            cls.objects.get_or_create(project_id=project_id)
+            rows.update(value=F("value") + 1)
+        return rows.values_list("value", flat=True).get()
+
+    @classmethod
+    def stamp(cls, project_id):
+        """The project's sequence value for the current transaction.
+
+        The first call in a transaction advances the sequence; later calls
+        for the same project return that value without another query.
+        Outside a transaction every call advances.
+        """
+        connection = transaction.get_connection(router.db_for_write(cls))
+        state = _transaction_state(connection)
+        if state is None:
+            return cls.advance(project_id)
+        stamped = state.stamps.get(project_id)
+        if stamped is None or not _pending(connection, stamped[1]):
+            # A stamp taken in a savepoint that was rolled back is gone
+            stamped = state.stamps[project_id] = (cls.advance(project_id), _marker())
+            transaction.on_commit(stamped[1], using=connection.alias)
+        state.deferred.discard(project_id)
+        return stamped[0]
+
+    @classmethod
+    def advance_on_commit(cls, project_ids):
+        """Advance the sequences of ``project_ids`` once the current transaction commits.
+
+        Projects the transaction stamped are skipped: their new number shows
+        up at commit anyway. Outside a transaction they advance at once.
+        """
+        project_ids = {project_id for project_id in project_ids if project_id is not None}
+        connection = transaction.get_connection(router.db_for_write(cls))
+        state = _transaction_state(connection)
+        if state is None:
+            cls._advance_many(project_ids)
+            return
+        for project_id in project_ids:
+            stamped = state.stamps.get(project_id)
+            if stamped is None or not _pending(connection, stamped[1]):
+                state.deferred.add(project_id)
+
+    @classmethod
+    def _advance_many(cls, project_ids):
+        if not project_ids:
+            return
+        rows = cls.objects.filter(project_id__in=project_ids)
+        if rows.update(value=F("value") + 1) < len(project_ids):
+            existing = set(rows.values_list("project_id", flat=True))
+            cls.objects.bulk_create(
+                [cls(project_id=project_id, value=1) for project_id in project_ids - existing],
+                ignore_conflicts=True,
+            )
+
+    @classmethod
+    def current(cls, project_id):
+        """``(value, reset_below)`` of a project; zeros before its first write."""
+        row = cls.objects.filter(project_id=project_id).values_list("value", "reset_below").first()
+        return row or (0, 0)
+
+
+class _TransactionState:
+    """Sequence stamps and deferred advances of one transaction."""
+
+    def __init__(self, key):
+        self.key = key
+        self.stamps = {}
+        self.deferred = set()
+
+    def flush(self):
+        ProjectChangeSequence._advance_many(self.deferred)
+
+
+def _marker():
+    def marker():
+        pass
+    return marker
+
+
+def _pending(connection, callback):
+    """Whether ``callback`` still waits for the transaction to commit.
+
+    Django drops the callbacks of a rolled back transaction or savepoint.
+    """
+    return any(entry[1] == callback for entry in connection.run_on_commit)
+
+
+def _transaction_state(connection):
+    """This transaction's ``_TransactionState``, or None outside a transaction.
+
+    Like ``atomic(durable=True)``, the blocks ``TestCase`` wraps each test
+    in do not count, so every request of a test gets its own state, as it
+    would in production.
+    """
+    for depth, block in enumerate(connection.atomic_blocks):
+        if not block._from_testcase:
+            break
+    else:
+        return None
+    key = connection.savepoint_ids[depth - 1] if depth else None
+    state = getattr(connection, "_change_sequence_state", None)
+    if state is None or state.key != key or not _pending(connection, state.flush):
+        state = connection._change_sequence_state = _TransactionState(key)
+        transaction.on_commit(state.flush, using=connection.alias)
+    return state
+
+
+class BoardEvent(models.Model):
+    """A change to a task on a project board, streamed to open boards.
+
+    ``seq`` is taken from the project's ``ProjectChangeSequence``, so a
+    project's events commit in ``seq`` order and a reader that has seen
+    ``seq`` N has seen every event up to it. See ``tasks.events``. Rows are
+    pruned after ``settings.TASK_EVENTS_RETENTION`` seconds.
+    """
+
+    CREATED = "created"
+    MOVED = "moved"
+    UPDATED = "updated"
+
+    KIND_CHOICES = [
+        (CREATED, "Created"),
+        (MOVED, "Moved"),
+        (UPDATED, "Updated"),
+    ]
+
+    project = models.ForeignKey(
+        "projects.Project", on_delete=models.CASCADE, related_name="board_events"
+    )
+    seq = models.BigIntegerField(default=0)
+    task_id = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["seq"]
+        indexes = [
+            models.Index(fields=["project", "seq"], name="board_event_seq_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} task {self.task_id}"
+
+
+class MoveReceipt(models.Model):
+    """Result of a task move, keyed by the client's idempotency key.
+
+    Retried or double-submitted moves carrying the same key replay the stored
+    response instead of running the transition (and its clones) again. The
+    requested stage and category are kept so a key reused for a different
+    move is rejected rather than replayed. Receipts expire after
+    ``settings.TASK_MOVE_IDEMPOTENCY_TTL`` seconds.
+    """
+
+    key = models.CharField(max_length=64)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="move_receipts"
+    )
+    task = models.ForeignKey(TaskInstance, on_delete=models.CASCADE, related_name="move_receipts")
+    stage = models.CharField(max_length=20, blank=True)
+    category = models.CharField(max_length=20, blank=True)
+    response = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        unique_together = ["user", "key"]
+
+    def __str__(self):
+        return f"Move receipt {self.key} for {self.task}"
+
+    def matches(self, task_id, stage, category):
+        """Whether this receipt is for the same move of the same task."""
+        return (self.task_id, self.stage, self.category) == (task_id, stage or "", category or "")
+
+
+class ArchivedTaskInstance(models.Model):
+    """Closed or long-finished task instance moved out of ``TaskInstance``.
+
+    Rows keep their original primary key so links, audit log entries and
+    lineage pointing at the task still resolve. ``parent_task_id`` is a plain
+    id because the parent may live in either table. See ``tasks.archive``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=300)
+    description = models.TextField(blank=True)
+    project = models.ForeignKey(
+        "projects.Project",
+        on_delete=models.CASCADE,
+        related_name="archived_tasks",
+        null=True,
+        blank=True,
+    )
+    project_category = models.ForeignKey(
+        "projects.ProjectCategory",
+        on_delete=models.SET_NULL,
+        related_name="archived_tasks",
+        null=True,
+        blank=True,
+    )
+    category = models.CharField(max_length=20, choices=TaskInstance.CATEGORY_CHOICES)
+    stage = models.CharField(max_length=20, choices=TaskInstance.STAGE_CHOICES)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    assignees = models.ManyToManyField(
+        settings.AUTH_USER_MODEL, blank=True, related_name="archived_assigned_tasks"
+    )
+    coordinator = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    story_points = models.PositiveIntegerField(default=0)
+    points_earned = models.BooleanField(default=False)
+    deadline = models.DateField(null=True, blank=True)
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    parent_task_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    original_category = models.CharField(max_length=20, choices=TaskInstance.CATEGORY_CHOICES, blank=True)
+    work_item = models.BigIntegerField(null=True, blank=True, db_index=True)
+    is_closed = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    version = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TaskInstanceQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"[{self.get_category_display()}] {self.title} (archived)"
+
+    def as_task(self):
+        """Unsaved ``TaskInstance`` with this row's values, for display only."""
+        task = TaskInstance(**{
+            field.attname: getattr(self, field.attname)
+            for field in TaskInstance._meta.concrete_fields
+            if hasattr(self, field.attname)
+        })
+        for name in ("days_until_due", "due_code", "on_time_code"):
+            if name in self.__dict__:
+                setattr(task, name, self.__dict__[name])
+        return task
+
+
+class ArchivedTaskNote(models.Model):
+    """Note of an archived task, keeping its original primary key."""
+
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTaskInstance, on_delete=models.CASCADE, related_name="notes")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    content = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Note by {self.author} on {self.task}"
@@ -0,0 +1,64 @@
+"""Deleting rows that are only kept for a while.
+
+Board events expire after ``settings.TASK_EVENTS_RETENTION`` seconds and
+move receipts after ``settings.TASK_MOVE_IDEMPOTENCY_TTL``. Code adding
+such rows calls ``prune_soon``: the process then deletes one batch of the
+expired rows after the transaction commits, at most every
+``settings.TASK_PRUNE_INTERVAL`` seconds per kind. ``manage.py
+prune_expired`` deletes all of them, for deployments that schedule it
+instead. Each batch is a short statement of its own, so pruning a large
+backlog never holds many locks at once.
+"""
+
+import itertools
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import BoardEvent, MoveReceipt
+
+BATCH_SIZE = 1000
+
+
+def _expired_events():
+    return BoardEvent.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=settings.TASK_EVENTS_RETENTION)
+    )
+
+
+def _expired_receipts():
+    return MoveReceipt.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=settings.TASK_MOVE_IDEMPOTENCY_TTL)
+    )
+
+
+EXPIRED = {"events": _expired_events, "receipts": _expired_receipts}
+
+
+def prune(kind, batch_size=BATCH_SIZE, max_batches=None):
+    """Delete expired rows of ``kind`` (a key of ``EXPIRED``); return how many."""
+    rows = EXPIRED[kind]().order_by("created_at")
+    deleted = 0
+    for _ in itertools.count() if max_batches is None else range(max_batches):
+        ids = list(rows.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += rows.model.objects.filter(pk__in=ids).delete()[0]
+    return deleted
+
+
+_last_pruned = {}
+
+
+def prune_soon(kind):
+    """Prune a batch of ``kind`` once the current transaction commits, unless done lately."""
+    interval = settings.TASK_PRUNE_INTERVAL
+    now = time.monotonic()
+    last = _last_pruned.get(kind)
+    if not interval or (last is not None and now - last < interval):
+        return
+    _last_pruned[kind] = now
+    transaction.on_commit(lambda: prune(kind, max_batches=1), robust=True)
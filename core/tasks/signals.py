@@ -0,0 +1,83 @@
+"""Advance ``ProjectChangeSequence`` on writes that ``TaskInstance.save`` does not see.
+
+Task saves number themselves. Everything else shown on project pages
+(notes, categories, memberships, the project and organization, task
+deletions and assignee changes) bumps the sequence here, so fragments
+cached under the old value (``projects.fragments``) are never served
+again. The bumps wait for the transaction to commit and a project is
+bumped once however many of its rows changed. The activity feed is keyed
+on its newest audit row instead (see ``projects.views.project_detail``).
+Connected in ``TasksConfig.ready``.
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from organizations.models import Organization
+from projects.models import Project, ProjectCategory, ProjectNote
+
+from .models import ProjectChangeSequence, TaskInstance
+
+
+def _advance(project_ids):
+    ProjectChangeSequence.advance_on_commit(project_ids)
+
+
+@receiver(post_save, sender=ProjectNote)
+@receiver(post_delete, sender=ProjectNote)
+@receiver(post_save, sender=ProjectCategory)
+@receiver(post_delete, sender=ProjectCategory)
+@receiver(post_delete, sender=TaskInstance)
+def project_child_changed(sender, instance, **kwargs):
+    _advance([instance.project_id])
+
+
+@receiver(post_save, sender=Project)
+def project_changed(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        _advance([instance.pk])
+
+
+@receiver(post_save, sender=Organization)
+def organization_changed(sender, instance, created, **kwargs):
+    # Project cards show the organization name
+    if not created:
+        _advance(instance.projects.values_list("pk", flat=True))
+
+
+@receiver(m2m_changed, sender=Project.members.through)
+@receiver(m2m_changed, sender=Project.commenters.through)
+@receiver(m2m_changed, sender=Project.viewers.through)
+def project_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            _advance([instance.pk])
+        return
+    # Changed from the user's side: ``pk_set`` holds projects, except on clear
+    _advance_related(
+        instance, action, pk_set, lambda: sender.objects.filter(user_id=instance.pk).values_list("project_id", flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=TaskInstance.assignees.through)
+def task_assignees_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            _advance([instance.project_id])
+        return
+    _advance_related(
+        instance,
+        action,
+        pk_set and TaskInstance.objects.filter(pk__in=pk_set).values_list("project_id", flat=True),
+        lambda: sender.objects.filter(user_id=instance.pk).values_list("taskinstance__project_id", flat=True),
+    )
+
+
+def _advance_related(instance, action, project_ids, cleared_project_ids):
+    if action == "pre_clear":
+        # Gone by post_clear, so remember them now
+        instance._cleared_project_ids = list(cleared_project_ids())
+    elif action == "post_clear":
+        _advance(instance.__dict__.pop("_cleared_project_ids", []))
+    elif action.startswith("post_"):
+        _advance(project_ids)
@@ -1,3 +1,962 @@
-from django.test import TestCase
+import asyncio
+import json
+import re
+import threading
+import uuid
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Role, User
+from core.testing import QueryBudgetMixin, seed_project
+from organizations.models import Organization
+from projects.models import Project
+from tasks.archive import archive_tasks, restore_project
+from tasks.cards import task_cards
+from tasks.dependencies import add_dependency, critical_path
+from tasks import pruning
+from tasks.events import BoardHub, events_since, publish_task_event
+from tasks.models import (
+    ArchivedTaskInstance,
+    BoardEvent,
+    MoveReceipt,
+    ProjectChangeSequence,
+    TaskDependency,
+    TaskInstance,
+    TaskNote,
+    due_label,
+)
+from tasks.views import _timeline_tasks
+
+
+# Pages are rendered without running collectstatic first
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class ConditionalGetTests(TestCase):
+    """ETags of the board, task API, project page and dashboard."""
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(
+            name=Role.SYSTEM_ADMINISTRATOR,
+            can_manage_projects=True,
+            can_manage_tasks=True,
+            can_move_task_stages=True,
+            can_move_task_categories=True,
+            can_reject_testing=True,
+            can_add_project_notes=True,
+        )
+        cls.user = User.objects.create_user("admin", password="x", role=role)
+        organization = Organization.objects.create(name="Org")
+        organization.members.add(cls.user)
+        cls.project = Project.objects.create(name="Board", organization=organization)
+        cls.project.members.add(cls.user)
+        cls.task = TaskInstance.objects.create(
+            project=cls.project, title="Build it", category=TaskInstance.DEVELOPMENT
+        )
+        cls.task.assignees.add(cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.urls = {
+            "board": reverse("tasks:task_board", args=[self.project.pk]),
+            "task": reverse("tasks:task_api_detail", args=[self.task.pk]),
+            "project": reverse("projects:project_detail", args=[self.project.pk]),
+            "dashboard": reverse("dashboard"),
+        }
+
+    def etags(self):
+        tags = {}
+        for name, url in self.urls.items():
+            response = self.client.get(url)
+            if "ETag" not in response:
+                # A flash message from the last POST was pending; it is shown now
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, name)
+            tags[name] = response["ETag"]
+        return tags
+
+    def assertChanged(self, before, *names):
+        after = self.etags()
+        for name in names:
+            self.assertNotEqual(before[name], after[name], f"{name} ETag did not change")
+        return after
+
+    def move(self, task, stage):
+        response = self.client.post(
+            reverse("tasks:task_move", args=[task.pk]),
+            json.dumps({"stage": stage}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_resources_are_not_modified(self):
+        for name, etag in self.etags().items():
+            response = self.client.get(self.urls[name], HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, name)
+            self.assertEqual(response.content, b"")
+
+    def test_etag_is_per_user(self):
+        etags = self.etags()
+        other = User.objects.create_user("other", role=self.user.role)
+        self.client.force_login(other)
+        response = self.client.get(self.urls["board"], HTTP_IF_NONE_MATCH=etags["board"])
+        self.assertEqual(response.status_code, 200)
+
+    def test_task_create(self):
+        before = self.etags()
+        self.client.post(reverse("tasks:task_create", args=[self.project.pk]), {
+            "title": "New",
+            "category": TaskInstance.DEVELOPMENT,
+            "story_points": 1,
+        })
+        self.assertTrue(TaskInstance.objects.filter(title="New").exists())
+        self.assertChanged(before, "board", "project", "dashboard")
+
+    def test_task_edit(self):
+        before = self.etags()
+        response = self.client.post(reverse("tasks:task_edit", args=[self.task.pk]), {
+            "title": "Renamed",
+            "category": TaskInstance.DEVELOPMENT,
+            "story_points": 3,
+            "version": self.task.version,
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertChanged(before, "board", "task", "project", "dashboard")
+
+    def test_stage_move(self):
+        before = self.etags()
+        self.move(self.task, TaskInstance.IN_PROGRESS)
+        self.assertChanged(before, "board", "task", "project", "dashboard")
+
+    def test_done_clones_and_reject(self):
+        before = self.etags()
+        self.move(self.task, TaskInstance.DONE)
+        before = self.assertChanged(before, "board", "task", "project", "dashboard")
+        clone = TaskInstance.objects.get(parent_task=self.task, category=TaskInstance.TESTING)
+
+        # Rejecting the testing clone closes it and resets the development task
+        self.move(clone, TaskInstance.REJECT)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.stage, TaskInstance.TODO)
+        self.assertChanged(before, "board", "task", "project", "dashboard")
+
+    def test_project_note(self):
+        before = self.etags()
+        self.client.post(self.urls["project"], {"content": "Hello"})
+        self.assertChanged(before, "project")
+
+    def test_member_dashboard_sees_teammates_moves(self):
+        member = User.objects.create_user(
+            "member", role=Role.objects.create(name=Role.DEVELOPER)
+        )
+        self.project.organization.members.add(member)
+        self.project.members.add(member)
+        unassigned = TaskInstance.objects.create(
+            project=self.project, title="Someone else's", category=TaskInstance.DEVELOPMENT
+        )
+        self.client.force_login(member)
+        etag = self.client.get(self.urls["dashboard"])["ETag"]
+
+        # The admin moves a task the member is not assigned to
+        self.client.force_login(self.user)
+        self.move(unassigned, TaskInstance.DONE)
+
+        self.client.force_login(member)
+        response = self.client.get(self.urls["dashboard"], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_dashboard_sees_a_different_set_of_projects(self):
+        member = User.objects.create_user(
+            "member", role=Role.objects.create(name=Role.DEVELOPER)
+        )
+        organizations = []
+        for i in range(4):
+            organizations.append(Organization.objects.create(name=f"Org {i}"))
+            Project.objects.create(name=f"Project {i}", organization=organizations[-1])
+        Project.objects.update(updated_at=timezone.now())
+        # The first and last projects, then the two between them: as many
+        # projects, with the same sum of ids
+        organizations[0].members.add(member)
+        organizations[3].members.add(member)
+        self.client.force_login(member)
+        etag = self.client.get(self.urls["dashboard"])["ETag"]
+
+        organizations[0].members.remove(member)
+        organizations[3].members.remove(member)
+        organizations[1].members.add(member)
+        organizations[2].members.add(member)
+        response = self.client.get(self.urls["dashboard"], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_project_etag_is_one_query(self):
+        etag = self.etags()["project"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.urls["project"], HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        touched = [q["sql"] for q in queries if "projects_projectnote" in q["sql"] or "logs_auditlog" in q["sql"]]
+        self.assertEqual(len(touched), 1, touched)
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class VersionedEditTests(TestCase):
+    """An edit form posted after someone else saved the task is turned away."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            "admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR, can_manage_tasks=True)
+        )
+        organization = Organization.objects.create(name="Org")
+        organization.members.add(cls.admin)
+        cls.project = Project.objects.create(name="Board", organization=organization)
+        cls.project.members.add(cls.admin)
+        cls.task = TaskInstance.objects.create(
+            project=cls.project, title="Before", category=TaskInstance.DEVELOPMENT, story_points=1
+        )
+
+    def test_stale_version_conflicts(self):
+        rendered = self.task.version
+        # Someone else saves the task after the form was rendered
+        TaskInstance.objects.filter(pk=self.task.pk).update(version=rendered + 1)
+        before = TaskInstance.objects.values().get(pk=self.task.pk)
+
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse("tasks:task_edit", args=[self.task.pk]), {
+            "title": "After",
+            "category": TaskInstance.DEVELOPMENT,
+            "story_points": 5,
+            "assignees": [self.admin.pk],
+            "version": rendered,
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(TaskInstance.objects.values().get(pk=self.task.pk), before)
+        self.assertFalse(self.task.assignees.exists())
+        self.assertFalse(BoardEvent.objects.exists())
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class BoardQueryBudgetTests(QueryBudgetMixin, TestCase):
+    """The board runs the same queries for a few cards or many."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            "admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR)
+        )
+        cls.organization = Organization.objects.create(name="Org")
+        cls.organization.members.add(cls.admin)
+        cls.project = seed_project(cls.organization, [cls.admin], categories=1, tasks_per_category=1)
+
+    def add_tasks(self):
+        users = [User.objects.create_user(f"user{i}") for i in range(5)]
+        more = seed_project(self.organization, users, categories=3, tasks_per_category=6)
+        more.categories.update(project=self.project)
+        more.tasks.update(project=self.project)
+        self.project.members.add(*users)
+
+    def test_task_board(self):
+        self.client.force_login(self.admin)
+        url = reverse("tasks:task_board", args=[self.project.pk])
+        self.assertQueriesDoNotGrow(url, self.add_tasks)
+        self.assertQueryBudget(url, 12)
+
+    def test_task_board_list_mode(self):
+        self.client.force_login(self.admin)
+        url = reverse("tasks:task_board", args=[self.project.pk]) + "?view=list"
+        self.assertQueriesDoNotGrow(url, self.add_tasks)
+
+
+# Event pruning is rate limited per process; keep it out of the counts
+@override_settings(TASK_PRUNE_INTERVAL=0)
+class MoveQueryTests(TestCase):
+    """A move numbers its project once, however many rows it writes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            "admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR)
+        )
+        organization = Organization.objects.create(name="Org")
+        organization.members.add(cls.admin)
+        cls.project = Project.objects.create(name="Board", organization=organization)
+        cls.task = TaskInstance.objects.create(
+            project=cls.project, title="Build it", category=TaskInstance.DEVELOPMENT
+        )
+        cls.task.assignees.add(cls.admin)
+
+    def move(self, stage):
+        """Move the task to ``stage``; return the SQL it ran, commit callbacks included."""
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("tasks:task_move", args=[self.task.pk]), {"stage": stage})
+        self.assertEqual(response.status_code, 302)
+        return [query["sql"] for query in queries.captured_queries]
+
+    def bumps(self, statements):
+        table = ProjectChangeSequence._meta.db_table
+        return [sql for sql in statements if sql.startswith(f'UPDATE "{table}"')]
+
+    def test_in_progress(self):
+        before = ProjectChangeSequence.current(self.project.pk)[0]
+        statements = self.move(TaskInstance.IN_PROGRESS)
+        self.assertEqual(len(self.bumps(statements)), 1)
+        self.assertLessEqual(len(statements), 17)
+        self.assertEqual(ProjectChangeSequence.current(self.project.pk)[0], before + 1)
+
+    def test_done_with_clone_and_events(self):
+        statements = self.move(TaskInstance.DONE)
+        self.assertEqual(len(self.bumps(statements)), 1)
+        self.assertLessEqual(len(statements), 31)
+        seq = ProjectChangeSequence.current(self.project.pk)[0]
+        self.assertEqual(set(BoardEvent.objects.values_list("seq", flat=True)), {seq})
+        self.assertEqual(set(self.project.tasks.values_list("change_seq", flat=True)), {seq})
+
+
+class ArchiveTests(TestCase):
+    """Archiving and restoring a project gives back the same rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("dev")
+        organization = Organization.objects.create(name="Org")
+        cls.project = Project.objects.create(name="Old", organization=organization)
+        cls.root = TaskInstance.objects.create(
+            project=cls.project, title="Build it", category=TaskInstance.DEVELOPMENT,
+            stage=TaskInstance.DONE,
+        )
+        cls.clone = TaskInstance.objects.create(
+            project=cls.project, title="Build it", category=TaskInstance.TESTING,
+            parent_task=cls.root, work_item=cls.root.work_item, is_closed=True,
+        )
+        for task in (cls.root, cls.clone):
+            task.assignees.add(cls.user)
+            TaskNote.objects.create(task=task, author=cls.user, content=f"On {task.category}")
+        cls.long_ago = timezone.now() - timedelta(days=200)
+        TaskInstance.objects.update(created_at=cls.long_ago, updated_at=cls.long_ago)
+        TaskNote.objects.update(created_at=cls.long_ago, updated_at=cls.long_ago)
+
+    def round_trip(self, **kwargs):
+        self.assertEqual(archive_tasks(project=self.project), 2)
+        self.assertFalse(TaskInstance.objects.exists())
+        self.assertEqual(ArchivedTaskInstance.objects.count(), 2)
+        self.assertEqual(restore_project(self.project, **kwargs), 2)
+        self.assertFalse(ArchivedTaskInstance.objects.exists())
+
+    def assertRestored(self):
+        root = TaskInstance.objects.get(pk=self.root.pk)
+        clone = TaskInstance.objects.get(pk=self.clone.pk)
+        self.assertEqual(clone.parent_task, root)
+        self.assertEqual(clone.work_item, root.work_item)
+        for task in (root, clone):
+            self.assertEqual(task.created_at, self.long_ago)
+            self.assertEqual(task.updated_at, self.long_ago)
+            self.assertEqual(list(task.assignees.all()), [self.user])
+            note = task.notes.get()
+            self.assertEqual(note.content, f"On {task.category}")
+            self.assertEqual(note.created_at, self.long_ago)
+            self.assertEqual(note.updated_at, self.long_ago)
+
+    def test_round_trip(self):
+        self.round_trip()
+        self.assertRestored()
+
+    def test_round_trip_parent_in_earlier_batch(self):
+        self.round_trip(batch_size=1)
+        self.assertRestored()
+
+
+class WorkItemBackfillTests(TransactionTestCase):
+    """Migration 0011 gives every clone chain, live or archived, one work item."""
+
+    before = [("tasks", "0010_archivedtaskinstance_archivedtasknote")]
+    after = [("tasks", "0011_work_item")]
+
+    def setUp(self):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(self.before)
+        self.executor.loader.build_graph()
+
+    def tearDown(self):
+        self.executor.loader.build_graph()
+        self.executor.migrate(self.executor.loader.graph.leaf_nodes())
+
+    def test_chains_share_a_work_item(self):
+        apps = self.executor.loader.project_state(self.before).apps
+        TaskInstance = apps.get_model("tasks", "TaskInstance")
+        ArchivedTaskInstance = apps.get_model("tasks", "ArchivedTaskInstance")
+        Project = apps.get_model("projects", "Project")
+        Organization = apps.get_model("organizations", "Organization")
+        project = Project.objects.create(name="Old", organization=Organization.objects.create(name="Org"))
+
+        def task(category, parent=None):
+            return TaskInstance.objects.create(
+                project=project, title="Build it", category=category, stage="DONE", parent_task=parent
+            )
+
+        development = task("DEVELOPMENT")
+        testing = task("TESTING", development)
+        deploy = task("DEPLOYMENT", testing)
+        other = task("DEVELOPMENT")
+        other_testing = task("TESTING", other)
+        now = timezone.now()
+        # An archived rework of the deployment, and an orphan whose parent is gone
+        rework = ArchivedTaskInstance.objects.create(
+            id=deploy.pk + 100, title="Build it", category="DEVELOPMENT", stage="TODO",
+            parent_task_id=deploy.pk, created_at=now, updated_at=now,
+        )
+        orphan = ArchivedTaskInstance.objects.create(
+            id=deploy.pk + 101, title="Lost", category="TESTING", stage="TODO",
+            parent_task_id=deploy.pk + 999, created_at=now, updated_at=now,
+        )
+
+        with mock.patch.object(import_module("tasks.migrations.0011_work_item"), "BATCH_SIZE", 2):
+            self.executor.loader.build_graph()
+            self.executor.migrate(self.after)
+        apps = self.executor.loader.project_state(self.after).apps
+        live = dict(apps.get_model("tasks", "TaskInstance").objects.values_list("pk", "work_item"))
+        archived = dict(apps.get_model("tasks", "ArchivedTaskInstance").objects.values_list("pk", "work_item"))
+
+        self.assertEqual(live[development.pk], development.pk)
+        self.assertEqual(live[testing.pk], development.pk)
+        self.assertEqual(live[deploy.pk], development.pk)
+        self.assertEqual(archived[rework.pk], development.pk)
+        self.assertEqual(live[other.pk], other.pk)
+        self.assertEqual(live[other_testing.pk], other.pk)
+        self.assertEqual(archived[orphan.pk], orphan.pk)
+
+
+class BoardDeltaTests(TestCase):
+    """``task_board_delta`` sends what changed after the client's cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            "admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR)
+        )
+        organization = Organization.objects.create(name="Org")
+        organization.members.add(cls.user)
+        cls.project = Project.objects.create(name="Board", organization=organization)
+        cls.first, cls.second = (
+            TaskInstance.objects.create(project=cls.project, title=title, category=TaskInstance.DEVELOPMENT)
+            for title in ("First", "Second")
+        )
+        cls.closed = TaskInstance.objects.create(
+            project=cls.project, title="Closed", category=TaskInstance.GENERAL, is_closed=True
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def delta(self, since=None):
+        url = reverse("tasks:task_board_delta", args=[self.project.pk])
+        response = self.client.get(url, {} if since is None else {"since": since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def ids(self, delta):
+        return [task["id"] for task in delta["tasks"]]
+
+    def test_full_load_without_cursor(self):
+        delta = self.delta()
+        self.assertTrue(delta["reset"])
+        self.assertEqual(self.ids(delta), [self.first.pk, self.second.pk])
+
+    def test_only_tasks_changed_after_cursor(self):
+        version = self.delta()["version"]
+        self.assertEqual(self.delta(version)["tasks"], [])
+
+        task = TaskInstance.objects.get(pk=self.second.pk)
+        task.stage = TaskInstance.IN_PROGRESS
+        task.save()
+        delta = self.delta(version)
+        self.assertFalse(delta["reset"])
+        self.assertEqual(self.ids(delta), [self.second.pk])
+        self.assertEqual(delta["tasks"][0]["stage"], TaskInstance.IN_PROGRESS)
+        self.assertGreater(delta["version"], version)
+        self.assertEqual(self.delta(delta["version"])["tasks"], [])
+
+    def test_cursor_before_archive_run_reloads(self):
+        version = self.delta()["version"]
+        self.assertEqual(archive_tasks(project=self.project), 1)
+        delta = self.delta(version)
+        self.assertTrue(delta["reset"])
+        self.assertEqual(self.ids(delta), [self.first.pk, self.second.pk])
+        self.assertFalse(self.delta(delta["version"])["reset"])
+
+
+class TimelineTests(TestCase):
+    """The timeline lists open tasks overlapping the window and is cached until one changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            "admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR)
+        )
+        cls.today = today = timezone.now().date()
+        cls.project = Project.objects.create(
+            name="Project",
+            organization=Organization.objects.create(name="Org"),
+            planned_start_date=today - timedelta(days=20),
+            planned_end_date=today + timedelta(days=40),
+        )
+
+        def task(title, **dates):
+            return TaskInstance.objects.create(
+                project=cls.project, title=title, category=TaskInstance.GENERAL, **dates
+            )
+
+        cls.inside = task("Inside", start_date=today + timedelta(days=2), end_date=today + timedelta(days=4))
+        cls.spanning = task("Spanning", start_date=today - timedelta(days=5), end_date=today + timedelta(days=30))
+        cls.deadline_only = task("Deadline only", deadline=today + timedelta(days=5))
+        cls.before = task("Before", start_date=today - timedelta(days=10), end_date=today - timedelta(days=5))
+        cls.after = task("After", start_date=today + timedelta(days=20))
+        task("Undated")
+        task("Closed", start_date=today, end_date=today, is_closed=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def timeline(self, **window):
+        response = self.client.get(
+            reverse("tasks:task_timeline", args=[self.project.pk]),
+            {name: day.isoformat() for name, day in window.items()},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def window(self):
+        return self.timeline(start=self.today, end=self.today + timedelta(days=10))
+
+    def test_window_filters_by_span(self):
+        data = self.window()
+        self.assertEqual(
+            set(data["ids"]), {self.inside.pk, self.spanning.pk, self.deadline_only.pk}
+        )
+        inside = data["ids"].index(self.inside.pk)
+        self.assertEqual(data["origin"], self.today.isoformat())
+        self.assertEqual((data["start"][inside], data["end"][inside]), (2, 4))
+
+    def test_window_defaults_to_planned_dates(self):
+        self.assertEqual(
+            set(self.timeline()["ids"]),
+            {self.inside.pk, self.spanning.pk, self.deadline_only.pk, self.before.pk, self.after.pk},
+        )
+
+    def test_bad_date(self):
+        response = self.client.get(
+            reverse("tasks:task_timeline", args=[self.project.pk]), {"start": "yesterday"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_cached_until_an_open_task_changes(self):
+        self.window()
+        # A write that bypasses save() leaves the cached payload in place
+        TaskInstance.objects.filter(pk=self.inside.pk).update(title="Not seen")
+        self.assertNotIn("Not seen", self.window()["titles"])
+
+        self.after.start_date = self.today + timedelta(days=8)
+        self.after.save()
+        data = self.window()
+        self.assertIn(self.after.pk, data["ids"])
+        self.assertIn("Not seen", data["titles"])
+
+        self.spanning.is_closed = True
+        self.spanning.save()
+        self.assertNotIn(self.spanning.pk, self.window()["ids"])
+
+
+class DueStatusTests(TestCase):
+    """``with_due_status()``, the model properties, ``due_label()`` and the cards agree."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = today = timezone.now().date()
+        project = Project.objects.create(name="Project", organization=Organization.objects.create(name="Org"))
+        cls.expected = {}
+        for title, deadline, code, label in [
+            ("Overdue", today - timedelta(days=3), TaskInstance.DUE_OVERDUE, "Overdue 3 days"),
+            ("Due today", today, TaskInstance.DUE_TODAY, "Due today"),
+            ("Due soon", today + timedelta(days=1), TaskInstance.DUE_LATER, "Due in 1 day"),
+            ("No deadline", None, TaskInstance.DUE_NONE, None),
+        ]:
+            task = TaskInstance.objects.create(project=project, title=title, deadline=deadline)
+            cls.expected[task.pk] = (code, label)
+        for title, end_date, code, label in [
+            ("On time", today - timedelta(days=1), TaskInstance.ON_TIME, "On Time"),
+            ("Late", today + timedelta(days=1), TaskInstance.ON_TIME_LATE, "Late"),
+        ]:
+            task = TaskInstance.objects.create(project=project, title=title, deadline=today)
+            TaskInstance.objects.filter(pk=task.pk).update(stage=TaskInstance.DONE, end_date=end_date)
+            cls.expected[task.pk] = (code, label)
+
+    def test_due_status_agrees(self):
+        plain = TaskInstance.objects.in_bulk(self.expected)
+        annotated = TaskInstance.objects.with_due_status(self.today).in_bulk(self.expected)
+        cards = {card.pk: card for card in task_cards(TaskInstance.objects.all(), today=self.today)}
+        for pk, task in plain.items():
+            if task.stage == TaskInstance.DONE:
+                continue
+            code, label = self.expected[pk]
+            with self.subTest(task.title):
+                self.assertEqual(annotated[pk].due_code, code)
+                self.assertEqual(cards[pk].due_code, code)
+                self.assertEqual(task.due_status, label)
+                self.assertEqual(annotated[pk].due_status, label)
+                self.assertEqual(cards[pk].due_status, label)
+                if task.deadline:
+                    self.assertEqual(due_label((task.deadline - self.today).days), label)
+                    self.assertEqual(annotated[pk].days_until_due, (task.deadline - self.today).days)
+                else:
+                    self.assertIsNone(annotated[pk].days_until_due)
+
+    def test_on_time_status_agrees(self):
+        annotated = TaskInstance.objects.with_due_status(self.today).in_bulk(self.expected)
+        cards = {card.pk: card for card in task_cards(TaskInstance.objects.all(), today=self.today)}
+        for pk, task in annotated.items():
+            code, label = self.expected[pk] if task.stage == TaskInstance.DONE else (TaskInstance.ON_TIME_NONE, None)
+            with self.subTest(task.title):
+                self.assertEqual(task.on_time_code, code)
+                self.assertEqual(task.on_time_status, label)
+                self.assertEqual(TaskInstance.ON_TIME_LABELS.get(task.on_time_code), label)
+                self.assertEqual(cards[pk].on_time_status, label)
+
+
+class ConcurrentMoveTests(TransactionTestCase):
+    """Moves of one task racing each other run its transition once."""
+
+    threads = 8
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            "admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR)
+        )
+        organization = Organization.objects.create(name="Org")
+        self.project = Project.objects.create(name="Board", organization=organization)
+        self.task = TaskInstance.objects.create(
+            project=self.project, title="Build it", category=TaskInstance.DEVELOPMENT
+        )
+        self.task.assignees.add(self.user)
+
+    def race(self, keys, stage=TaskInstance.DONE):
+        """POST one move per key from as many threads at once; return the responses."""
+        session = Client()
+        session.force_login(self.user)
+        start = threading.Barrier(len(keys), timeout=10)
+        responses = [None] * len(keys)
+
+        def move(index, key):
+            client = Client()
+            client.cookies = session.cookies
+            start.wait()
+            try:
+                responses[index] = client.post(
+                    reverse("tasks:task_move", args=[self.task.pk]),
+                    json.dumps({"stage": stage}),
+                    content_type="application/json",
+                    HTTP_IDEMPOTENCY_KEY=key,
+                )
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=move, args=(i, key)) for i, key in enumerate(keys)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return responses
+
+    def clones(self):
+        return TaskInstance.objects.filter(parent_task=self.task, category=TaskInstance.TESTING)
+
+    def test_one_clone_per_done_transition(self):
+        responses = self.race([uuid.uuid4().hex for _ in range(self.threads)])
+        self.assertEqual([r.status_code for r in responses], [200] * self.threads)
+        self.assertEqual(self.clones().count(), 1)
+
+    def test_same_key_replays(self):
+        key = uuid.uuid4().hex
+        responses = self.race([key] * self.threads)
+        self.assertEqual({r.content for r in responses}, {responses[0].content})
+        self.assertEqual(self.clones().count(), 1)
+        self.assertEqual(MoveReceipt.objects.get().stage, TaskInstance.DONE)
+
+    def test_each_move_form_has_its_own_key(self):
+        self.client.force_login(self.user)
+        with override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"):
+            response = self.client.get(reverse("tasks:task_detail", args=[self.task.pk]))
+        keys = re.findall(r'name="idempotency_key" value="(\w+)"', response.content.decode())
+        self.assertEqual(len(keys), len(self.task.get_available_moves))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_key_reused_for_another_move_is_rejected(self):
+        key = uuid.uuid4().hex
+        self.race([key], stage=TaskInstance.IN_PROGRESS)
+        response = self.race([key], stage=TaskInstance.DONE)[0]
+        self.assertEqual(response.status_code, 422)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.stage, TaskInstance.IN_PROGRESS)
+        self.assertFalse(self.clones().exists())
+
+
+@override_settings(TASK_EVENTS_BACKEND="db", TASK_EVENTS_POLL_INTERVAL=0.01)
+class BoardEventTests(TransactionTestCase):
+    """Board events are numbered per project and polled from the project's head."""
+
+    def setUp(self):
+        organization = Organization.objects.create(name="Org")
+        self.project = Project.objects.create(name="Board", organization=organization)
+        self.task = TaskInstance.objects.create(
+            project=self.project, title="Build it", category=TaskInstance.DEVELOPMENT
+        )
+
+    def test_events_are_numbered_by_the_project_sequence(self):
+        other = TaskInstance.objects.create(
+            project=Project.objects.create(name="Other", organization=self.project.organization),
+            title="Elsewhere",
+        )
+        first = publish_task_event(self.task, BoardEvent.MOVED)
+        publish_task_event(other, BoardEvent.MOVED)
+        second = publish_task_event(self.task, BoardEvent.UPDATED)
+
+        self.assertEqual(second.seq, ProjectChangeSequence.current(self.project.pk)[0])
+        self.assertEqual([m["id"] for m in events_since(self.project.pk, 0)], [first.seq, second.seq])
+        self.assertEqual([m["id"] for m in events_since(self.project.pk, first.seq)], [second.seq])
+
+    async def test_poller_starts_at_the_head(self):
+        publish = sync_to_async(publish_task_event)
+        await publish(self.task, BoardEvent.MOVED)
+        hub = BoardHub()
+        queue = await hub.subscribe(self.project.pk)
+        try:
+            # Already committed: the stream replays it from its own cursor
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(queue.get(), 0.2)
+            event = await publish(self.task, BoardEvent.UPDATED)
+            message = await asyncio.wait_for(queue.get(), 5)
+            self.assertEqual(message["id"], event.seq)
+        finally:
+            hub.unsubscribe(self.project.pk, queue)
+
+
+@override_settings(TASK_EVENTS_RETENTION=60, TASK_MOVE_IDEMPOTENCY_TTL=60)
+class PruningTests(TransactionTestCase):
+    """Expired board events and move receipts are deleted in batches."""
+
+    def setUp(self):
+        organization = Organization.objects.create(name="Org")
+        self.project = Project.objects.create(name="Board", organization=organization)
+        self.task = TaskInstance.objects.create(project=self.project, title="Build it")
+        self.user = User.objects.create_user("dev")
+        pruning._last_pruned.clear()
+
+    def age(self, model):
+        model.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+
+    def receipt(self, key):
+        return MoveReceipt.objects.create(user=self.user, key=key, task=self.task)
+
+    @override_settings(TASK_PRUNE_INTERVAL=0)
+    def test_prune_in_batches(self):
+        for _ in range(3):
+            publish_task_event(self.task, BoardEvent.MOVED)
+            self.receipt(uuid.uuid4().hex)
+        self.age(BoardEvent)
+        self.age(MoveReceipt)
+        event = publish_task_event(self.task, BoardEvent.UPDATED)
+        receipt = self.receipt("fresh")
+
+        self.assertEqual(pruning.prune("events", batch_size=2), 3)
+        self.assertEqual(pruning.prune("receipts", batch_size=2), 3)
+        self.assertEqual(list(BoardEvent.objects.all()), [event])
+        self.assertEqual(list(MoveReceipt.objects.all()), [receipt])
+
+    @override_settings(TASK_PRUNE_INTERVAL=3600)
+    def test_publishing_prunes_at_most_once_per_interval(self):
+        publish_task_event(self.task, BoardEvent.MOVED)
+        self.age(BoardEvent)
+        pruning._last_pruned.clear()
+        publish_task_event(self.task, BoardEvent.MOVED)
+        self.assertEqual(BoardEvent.objects.count(), 1)
+
+        self.age(BoardEvent)
+        publish_task_event(self.task, BoardEvent.MOVED)
+        self.assertEqual(BoardEvent.objects.count(), 2)
+
+    @override_settings(TASK_PRUNE_INTERVAL=0)
+    def test_command(self):
+        publish_task_event(self.task, BoardEvent.MOVED)
+        self.receipt("old")
+        self.age(BoardEvent)
+        self.age(MoveReceipt)
+        call_command("prune_expired", stdout=StringIO())
+        self.assertFalse(BoardEvent.objects.exists())
+        self.assertFalse(MoveReceipt.objects.exists())
+
+
+class DependencyTests(TestCase):
+    """The dependency order and the critical path built on it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        organization = Organization.objects.create(name="Org")
+        cls.project = Project.objects.create(name="Plan", organization=organization)
+
+    def setUp(self):
+        cache.clear()
+
+    def task(self, title, story_points=1, **kwargs):
+        return TaskInstance.objects.create(
+            project=self.project, title=title, story_points=story_points, **kwargs
+        )
+
+    def assertTopological(self):
+        ranks = dict(TaskInstance.objects.values_list("pk", "dependency_rank"))
+        for blocker_id, blocked_id in TaskDependency.objects.values_list("blocker_id", "blocked_id"):
+            self.assertLess(ranks[blocker_id], ranks[blocked_id])
+
+    def test_edge_against_the_order_reorders(self):
+        x, y, z, w = (self.task(name) for name in "xyzw")
+        add_dependency(x, y)
+        add_dependency(z, w)
+        # w ranks after x; the edge moves z and w ahead of x and y
+        add_dependency(w, x)
+        self.assertTopological()
+        ranks = dict(TaskInstance.objects.values_list("title", "dependency_rank"))
+        self.assertEqual(sorted(ranks, key=ranks.get), ["z", "w", "x", "y"])
+
+    def test_cycles_are_rejected(self):
+        a, b, c = (self.task(name) for name in "abc")
+        add_dependency(a, b)
+        add_dependency(b, c)
+        for blocker, blocked in ((c, a), (b, a), (a, a)):
+            with self.assertRaises(ValidationError):
+                add_dependency(blocker, blocked)
+        with self.assertRaises(ValidationError):
+            add_dependency(a, b)
+        self.assertEqual(TaskDependency.objects.count(), 2)
+        self.assertTopological()
+
+    def test_saving_a_stale_instance_keeps_the_rank(self):
+        x, y, z, w = (self.task(name) for name in "xyzw")
+        add_dependency(x, y)
+        add_dependency(z, w)
+        stale = TaskInstance.objects.get(pk=x.pk)
+        add_dependency(w, x)
+
+        stale.title = "x, renamed"
+        stale.save()
+        self.assertTopological()
+
+    def add_view(self, user, blocker):
+        self.client.force_login(user)
+        return self.client.post(
+            reverse("tasks:task_dependency_add", args=[self.blocked.pk]), {"blocker": blocker}, follow=True
+        )
+
+    def test_add_view_rejects_a_malformed_blocker(self):
+        self.blocked = self.task("blocked")
+        admin = User.objects.create_user("admin", role=Role.objects.create(name=Role.SYSTEM_ADMINISTRATOR))
+        with override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"):
+            for blocker in ("", "abc", "1.5", str(self.blocked.pk + 100)):
+                response = self.add_view(admin, blocker)
+                self.assertContains(response, "Choose the task that blocks this one.")
+        self.assertFalse(TaskDependency.objects.exists())
+
+    def test_add_view_needs_access_to_the_project(self):
+        self.blocked, blocker = self.task("blocked"), self.task("blocker")
+        outsider = User.objects.create_user(
+            "outsider", role=Role.objects.create(name=Role.DEVELOPER, can_manage_tasks=True)
+        )
+        with override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"):
+            response = self.add_view(outsider, str(blocker.pk))
+        self.assertContains(response, "Permission denied.")
+        self.assertFalse(TaskDependency.objects.exists())
+
+    def test_critical_path(self):
+        today = timezone.localdate()
+        design = self.task("design", story_points=3)
+        build = self.task("build", story_points=2, deadline=today + timedelta(days=3))
+        docs = self.task("docs", story_points=1)
+        add_dependency(design, build)
+
+        result = critical_path(self.project)
+        self.assertEqual(result["path"], [design.pk, build.pk])
+        self.assertEqual(result["finish"], today + timedelta(days=5))
+        self.assertEqual(result["tasks"][build.pk]["earliest_start"], today + timedelta(days=3))
+        # The deadline is a day short, and the blocker inherits the delay
+        self.assertEqual(result["tasks"][build.pk]["slack"], -1)
+        self.assertEqual(result["tasks"][design.pk]["slack"], -1)
+        self.assertEqual(result["tasks"][docs.pk]["slack"], 4)
+
+
+class ActiveIndexTests(TestCase):
+    """The board, deadline and timeline queries are served by the partial indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # A long-running project: mostly closed instances, and each filter
+        # matches a small slice of the open ones. With statistics gathered,
+        # both planners then choose the plan they choose on a large table.
+        today = timezone.now().date()
+        cls.project = Project.objects.create(
+            name="Project", organization=Organization.objects.create(name="Org")
+        )
+        closed = [
+            TaskInstance(
+                project=cls.project,
+                title=f"Closed {i}",
+                category=TaskInstance.GENERAL,
+                is_closed=True,
+                deadline=today,
+                start_date=today,
+            )
+            for i in range(1500)
+        ]
+        later = today + timedelta(days=300)
+        active = [
+            TaskInstance(
+                project=cls.project,
+                title=f"Task {i}",
+                category=TaskInstance.DEVELOPMENT if i % 20 == 0 else TaskInstance.IMPLEMENTATION,
+                deadline={1: today - timedelta(days=3), 2: today + timedelta(days=3)}.get(i % 20, later),
+                start_date=today if i % 20 == 3 else later,
+            )
+            for i in range(600)
+        ]
+        TaskInstance.objects.bulk_create(closed + active)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def active_tasks(self):
+        return TaskInstance.objects.filter(project=self.project, is_closed=False).with_due_status()
+
+    def assertUsesIndex(self, queryset, index):
+        # EXPLAIN QUERY PLAN on SQLite, EXPLAIN on PostgreSQL
+        plan = queryset.explain()
+        self.assertIn(index, plan, f"{queryset.query}\n{plan}")
+
+    def test_board_lane(self):
+        tasks = self.active_tasks().filter(category=TaskInstance.DEVELOPMENT)
+        self.assertUsesIndex(tasks, "task_active_board_idx")
+
+    def test_board_deadline_filters(self):
+        self.assertUsesIndex(self.active_tasks().overdue(), "task_active_deadline_idx")
+        self.assertUsesIndex(self.active_tasks().due_within(7), "task_active_deadline_idx")
+
+    def test_timeline_window(self):
+        today = timezone.now().date()
+        tasks = _timeline_tasks(self.project, today - timedelta(days=30), today + timedelta(days=30))
+        self.assertUsesIndex(tasks, "task_active_dates_idx")
@@ -12,4 +12,15 @@ urlpatterns = [
     path("<int:pk>/api-detail/", views.task_api_detail, name="task_api_detail"),
     path("<int:pk>/edit/", views.task_edit, name="task_edit"),
     path("<int:pk>/move/", views.task_move, name="task_move"),
+    path("<int:pk>/card/", views.task_card, name="task_card"),
+    path("<int:pk>/dependencies/add/", views.task_dependency_add, name="task_dependency_add"),
+    path(
+        "<int:pk>/dependencies/<int:blocker_pk>/remove/",
+        views.task_dependency_remove,
+        name="task_dependency_remove",
+    ),
+    path("timeline/<int:project_pk>/", views.task_timeline, name="task_timeline"),
+    path("delta/<int:project_pk>/", views.task_board_delta, name="task_board_delta"),
+    path("events/<int:project_pk>/", views.task_events, name="task_events"),
+    path("critical-path/<int:project_pk>/", views.task_critical_path, name="task_critical_path"),
 ]
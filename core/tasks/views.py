@@ -1,21 +1,64 @@
+import asyncio
 import json
+import uuid
+from datetime import date, timedelta
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
 from django.views.decorators.http import require_POST
 
+from core.conditional import conditional_page, private_etag
+from core.replicas import read_from_replica
+from logs import metrics, tracing
 from logs.utils import log_action
 
+from .archive import find_task
+from .cards import task_cards
+from .cache import open_tasks_key
+from .dependencies import add_dependency, critical_path, remove_dependency
+from .events import events_since, hub, publish_task_event
 from .forms import TaskInstanceForm
-from .models import TaskInstance
+from .models import (
+    ArchivedTaskInstance,
+    BoardEvent,
+    MoveReceipt,
+    ProjectChangeSequence,
+    TaskInstance,
+)
+from .pruning import prune_soon
 
 User = get_user_model()
 
+TIMELINE_CACHE_TIMEOUT = 10 * 60
 
+
+def _board_etag(request, project_pk):
+    from projects.models import Project
+
+    version = Project.objects.filter(pk=project_pk).values_list("version", flat=True).first()
+    if version is None:
+        return None
+    change_seq, _ = ProjectChangeSequence.current(project_pk)
+    return private_etag(
+        request, "board", project_pk, version, change_seq, timezone.now().date(), request.get_full_path()
+    )
+
+
+@read_from_replica
 @login_required
+@conditional_page(_board_etag)
 def task_board(request, project_pk):
     """Kanban board: rows = stages, columns = single category (selectable)."""
     from projects.models import Project
@@ -23,7 +66,10 @@ def task_board(request, project_pk):
     project = get_object_or_404(Project, pk=project_pk)
     user = request.user
 
-    tasks = TaskInstance.objects.filter(project=project, is_closed=False)
+    # Read before the tasks: the live feed resumes from here, so a change
+    # racing this render is replayed rather than lost.
+    event_cursor = ProjectChangeSequence.current(project.pk)[0]
+    tasks = TaskInstance.objects.filter(project=project, is_closed=False).with_due_status()
 
     stages = TaskInstance.STAGE_CHOICES
     categories = TaskInstance.CATEGORY_CHOICES
@@ -36,13 +82,29 @@ def task_board(request, project_pk):
     if selected_category not in valid_categories:
         selected_category = TaskInstance.DEVELOPMENT
 
-    # Build board data: {stage: [tasks]} for the selected category
+    # Optional deadline filter, applied in SQL on the deadline index
+    due_filter = request.GET.get("due", "")
+    if due_filter == "overdue":
+        tasks = tasks.overdue()
+    elif due_filter == "week":
+        tasks = tasks.due_within(7)
+    else:
+        due_filter = ""
+
+    # List mode: every lane at once, most urgent first
+    list_mode = request.GET.get("view") == "list"
+    task_list = []
     board = {}
-    for stg_key, stg_label in stages:
-        board[stg_key] = {
-            "label": stg_label,
-            "tasks": list(tasks.filter(category=selected_category, stage=stg_key))
-        }
+    if list_mode:
+        task_list = task_cards(
+            tasks.order_by(F("days_until_due").asc(nulls_last=True), "pk")
+        )
+    else:
+        # Build board data: {stage: [cards]} for the selected category
+        for stg_key, stg_label in stages:
+            board[stg_key] = {"label": stg_label, "tasks": []}
+        for card in task_cards(tasks.filter(category=selected_category)):
+            board[card.stage]["tasks"].append(card)
 
     can_move = user.is_system_admin() or user.has_perm_move_task_stages()
     can_manage = user.is_system_admin() or user.has_perm_manage_tasks()
@@ -50,14 +112,122 @@ def task_board(request, project_pk):
     return render(request, "tasks/task_board.html", {
         "project": project,
         "board": board,
+        "task_list": task_list,
+        "list_mode": list_mode,
+        "due_filter": due_filter,
+        "due_choices": [("", "All"), ("overdue", "Overdue"), ("week", "Due this week")],
         "stages": stages,
         "categories": categories,
         "selected_category": selected_category,
         "can_move": can_move,
         "can_manage": can_manage,
+        "event_cursor": event_cursor,
+    })
+
+
+@login_required
+def task_card(request, pk):
+    """One open task rendered as its board card, for live board updates."""
+    task = get_object_or_404(TaskInstance.objects.select_related("project"), pk=pk)
+    if not task.project.user_has_any_access(request.user):
+        return HttpResponse(status=403)
+    cards = task_cards(TaskInstance.objects.filter(pk=pk, is_closed=False))
+    if not cards:
+        raise Http404("Task is closed.")
+    user = request.user
+    return render(request, "tasks/_task_card.html", {
+        "task": cards[0],
+        "can_move": user.is_system_admin() or user.has_perm_move_task_stages(),
     })
 
 
+EVENT_STREAM_KEEPALIVE = 15
+EVENT_STREAM_LIFETIME = 5 * 60
+
+
+async def task_events(request, project_pk):
+    """Server-Sent Events stream of task changes on a project's board.
+
+    Each event carries the task id, its stage, category and whether it is
+    closed; the board fetches the card itself from ``task_card``. Streams end
+    after ``EVENT_STREAM_LIFETIME`` seconds and the browser reconnects with
+    ``Last-Event-ID``, so a stream whose client went away unnoticed does not
+    linger. Needs an ASGI server: under WSGI every open board holds a worker.
+    """
+    from projects.models import Project
+
+    last_id = request.headers.get("Last-Event-ID") or request.GET.get("after") or ""
+    last_id = int(last_id) if last_id.isdigit() else None
+
+    def authorize():
+        # ``login_required`` cannot wrap async views before Django 5.0.
+        user = request.user
+        if not user.is_authenticated:
+            return None, 0
+        project = Project.objects.filter(pk=project_pk).first()
+        if project is None or not project.user_has_any_access(user):
+            return None, 0
+        head, _ = ProjectChangeSequence.current(project.pk)
+        return project, head
+
+    project, head = await sync_to_async(authorize)()
+    if project is None:
+        return HttpResponse(status=403)
+    if last_id is not None and last_id > head:
+        # An id from before events were numbered per project; resuming
+        # from it would drop every event up to it
+        last_id = head
+
+    async def stream():
+        # Subscribe before reading the backlog, so nothing falls in between
+        queue = await hub.subscribe(project.pk)
+        sent = [last_id or 0, set()]
+        deadline = asyncio.get_running_loop().time() + EVENT_STREAM_LIFETIME
+        try:
+            yield "retry: 3000\n\n"
+            if last_id is not None:
+                for message in await sync_to_async(events_since)(project.pk, last_id):
+                    _not_sent_yet(message, sent)
+                    yield _sse_frame(message)
+            while asyncio.get_running_loop().time() < deadline:
+                try:
+                    message = await asyncio.wait_for(queue.get(), EVENT_STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break
+                if _not_sent_yet(message, sent):
+                    yield _sse_frame(message)
+        finally:
+            hub.unsubscribe(project.pk, queue)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _not_sent_yet(message, sent):
+    """Record ``message`` in ``sent`` (the last id and what went out with it).
+
+    Returns False for a message the stream already sent. The events of one
+    transaction share their id.
+    """
+    key = (message["task"], message["kind"])
+    if message["id"] > sent[0]:
+        sent[:] = [message["id"], {key}]
+        return True
+    if message["id"] == sent[0] and key not in sent[1]:
+        sent[1].add(key)
+        return True
+    return False
+
+
+def _sse_frame(message):
+    return f"id: {message['id']}\nevent: task\ndata: {json.dumps(message)}\n\n"
+
+
 @login_required
 def task_create(request, project_pk):
     from projects.models import Project, ProjectCategory
@@ -82,8 +252,11 @@ def task_create(request, project_pk):
         task = form.save(commit=False)
         task.project = project
         task.created_by = request.user
-        task.save()
-        form.save_m2m()
+        with transaction.atomic():
+            # Assignees commit with the task's change number, for the delta API
+            task.save()
+            form.save_m2m()
+            publish_task_event(task, BoardEvent.CREATED)
         log_action(
             actor=request.user,
             action="TASK_CREATED",
@@ -103,17 +276,27 @@ def task_create(request, project_pk):
 
 @login_required
 def task_detail(request, pk):
-    task = get_object_or_404(
-        TaskInstance.objects.select_related("project", "created_by", "parent_task")
-        .prefetch_related("assignees", "children"),
-        pk=pk,
+    task = (
+        TaskInstance.objects.with_due_status()
+        .select_related("project", "created_by", "parent_task")
+        .prefetch_related("assignees", "children")
+        .filter(pk=pk)
+        .first()
     )
+    if task is None:
+        return _archived_task_detail(request, pk)
     user = request.user
     from logs.models import AuditLog
     from .forms import TaskNoteForm
 
     notes = task.notes.select_related("author").all()
     note_form = TaskNoteForm()
+    # One key per move form: a double-submitted form replays instead of
+    # re-moving, and picking another stage afterwards is a new move
+    move_forms = [
+        (stage_key, stage_label, uuid.uuid4().hex)
+        for stage_key, stage_label in task.get_available_moves
+    ]
 
     # Members and commenters can add notes to the task
     can_add_notes = (
@@ -135,6 +318,19 @@ def task_detail(request, pk):
         target_type="TaskInstance", target_id=task.pk
     ).order_by("-timestamp")
 
+    can_manage_dependencies = user.is_system_admin() or user.has_perm_manage_tasks()
+    blocked_by = task.blocked_by.select_related("blocker")
+    blocking = task.blocking.select_related("blocked")
+    blocker_choices = []
+    if can_manage_dependencies and not task.is_closed:
+        blocker_choices = (
+            TaskInstance.objects.filter(project=task.project, is_closed=False)
+            .exclude(pk=task.pk)
+            .exclude(blocking__blocked=task)
+            .order_by("title")
+            .only("pk", "title", "category")
+        )
+
     return render(request, "tasks/task_detail.html", {
         "task": task,
         "logs": logs,
@@ -142,14 +338,100 @@ def task_detail(request, pk):
         "notes": notes,
         "note_form": note_form,
         "can_add_notes": can_add_notes,
+        "move_forms": move_forms,
+        "assignees": task.assignees.all(),
+        "parent": task.parent_task,
+        "children": [*task.children.all(), *ArchivedTaskInstance.objects.filter(parent_task_id=task.pk)],
+        "history": _work_item_history(task.work_item),
+        "blocked_by": blocked_by,
+        "blocking": blocking,
+        "blocker_choices": blocker_choices,
+        "can_manage_dependencies": can_manage_dependencies,
+        "archived": False,
+    })
+
+
+def _work_item_history(work_item):
+    """Every instance of a work item, live or archived, oldest first."""
+    if work_item is None:
+        return []
+    steps = [
+        *TaskInstance.objects.filter(work_item=work_item),
+        *ArchivedTaskInstance.objects.filter(work_item=work_item),
+    ]
+    return sorted(steps, key=lambda step: (step.created_at, step.pk))
+
+
+def _archived_task_detail(request, pk):
+    """Read-only detail page for a task that has been moved to the archive."""
+    from logs.models import AuditLog
+
+    archived = get_object_or_404(
+        ArchivedTaskInstance.objects.with_due_status()
+        .select_related("project")
+        .prefetch_related("assignees"),
+        pk=pk,
+    )
+    parent = None
+    if archived.parent_task_id:
+        parent, _ = find_task(archived.parent_task_id)
+
+    logs = AuditLog.objects.filter(
+        target_type="TaskInstance", target_id=pk
+    ).order_by("-timestamp")
+
+    return render(request, "tasks/task_detail.html", {
+        "task": archived.as_task(),
+        "logs": logs,
+        "project": archived.project,
+        "notes": archived.notes.select_related("author").all(),
+        "note_form": None,
+        "can_add_notes": False,
+        "assignees": archived.assignees.all(),
+        "parent": parent,
+        "children": [
+            *TaskInstance.objects.filter(parent_task_id=pk),
+            *ArchivedTaskInstance.objects.filter(parent_task_id=pk),
+        ],
+        "history": _work_item_history(archived.work_item),
+        "archived": True,
     })
 
 
+def _task_validators(request, pk):
+    # Shared by the ETag and Last-Modified functions: one query per request
+    if not hasattr(request, "_task_validators"):
+        request._task_validators = (
+            TaskInstance.objects.filter(pk=pk)
+            .values_list("change_seq", "updated_at", "project_category__updated_at", "coordinator__username")
+            .first()
+        )
+    return request._task_validators
+
+
+def _task_api_etag(request, pk):
+    row = _task_validators(request, pk)
+    if row is None:
+        return None
+    # Due fields count days from today
+    return private_etag(request, "task", pk, *row, timezone.now().date())
+
+
+def _task_api_last_modified(request, pk):
+    row = _task_validators(request, pk)
+    if row is None:
+        return None
+    return max(filter(None, row[1:3]))
+
+
+@read_from_replica
 @login_required
+@conditional_page(_task_api_etag, _task_api_last_modified)
 def task_api_detail(request, pk):
     """API endpoint to get task details as JSON for modal display."""
     task = get_object_or_404(
-        TaskInstance.objects.select_related("project", "created_by", "parent_task", "project_category")
+        TaskInstance.objects.with_due_status()
+        .select_related("project", "created_by", "parent_task", "project_category")
         .prefetch_related("assignees", "children"),
         pk=pk,
     )
@@ -172,7 +454,10 @@ def task_api_detail(request, pk):
         "start_date": task.start_date.isoformat() if task.start_date else None,
         "end_date": task.end_date.isoformat() if task.end_date else None,
         "due_status": task.due_status,
+        "due_code": task.due_code,
+        "days_until_due": task.days_until_due,
         "on_time_status": task.on_time_status,
+        "on_time_code": task.on_time_code,
         "stage_status": task.stage_status,
         "is_closed": task.is_closed,
         "created_by": task.created_by.username if task.created_by else "System",
@@ -194,7 +479,23 @@ def task_edit(request, pk):
 
     form = TaskInstanceForm(request.POST or None, instance=task, project=task.project)
     if request.method == "POST" and form.is_valid():
-        form.save()
+        with transaction.atomic():
+            saved = form.save_versioned()
+            if saved:
+                publish_task_event(task, BoardEvent.UPDATED)
+        if not saved:
+            # Someone saved the task after this form was rendered: show their version
+            task = get_object_or_404(TaskInstance, pk=pk)
+            messages.error(
+                request,
+                "This task was changed by someone else while you were editing. "
+                "Review the current values and apply your changes again.",
+            )
+            return render(request, "tasks/task_form.html", {
+                "form": TaskInstanceForm(instance=task, project=task.project),
+                "project": task.project,
+                "title": f"Edit — {task.title}",
+            }, status=409)
         log_action(
             actor=request.user,
             action="TASK_UPDATED",
@@ -212,13 +513,266 @@ def task_edit(request, pk):
     })
 
 
+# ── Board delta ──
+
+@read_from_replica
+@login_required
+def task_board_delta(request, project_pk):
+    """Tasks of a project written since the client's cursor, as JSON.
+
+    ``?since=`` is the ``version`` of the previous response. The reply holds
+    every task created, moved, edited or closed after it (``closed`` tells the
+    client to drop the card) and the new ``version`` to send next time.
+    Without a cursor, or when the cursor predates an archive run, ``reset`` is
+    true and ``tasks`` is the complete set of open tasks.
+    """
+    from projects.models import Project
+
+    project = get_object_or_404(Project, pk=project_pk)
+    if not project.user_has_any_access(request.user):
+        return JsonResponse({"error": "Permission denied."}, status=403)
+    since = request.GET.get("since")
+    if since is not None and not since.isdigit():
+        return JsonResponse({"error": "since must be a change number."}, status=400)
+
+    # Everything numbered up to ``version`` is committed; see ProjectChangeSequence
+    version, reset_below = ProjectChangeSequence.current(project.pk)
+    tasks = TaskInstance.objects.filter(project=project, change_seq__lte=version)
+    reset = since is None or not reset_below <= int(since) <= version
+    if reset:
+        tasks = tasks.filter(is_closed=False)
+    else:
+        tasks = tasks.filter(change_seq__gt=int(since))
+
+    return JsonResponse({
+        "project": project.pk,
+        "version": version,
+        "reset": reset,
+        "tasks": [_delta_entry(card) for card in task_cards(tasks.order_by("pk"))],
+    })
+
+
+def _delta_entry(card):
+    return {
+        "id": card.pk,
+        "title": card.title,
+        "category": card.category,
+        "stage": card.stage,
+        "closed": card.is_closed,
+        "story_points": card.story_points,
+        "deadline": card.deadline,
+        "start_date": card.start_date,
+        "end_date": card.end_date,
+        "due_code": card.due_code,
+        "days_until_due": card.days_until_due,
+        "on_time_code": card.on_time_code,
+        "assignees": card.assignee_names,
+    }
+
+
+# ── Timeline ──
+
+@login_required
+def task_timeline(request, project_pk):
+    """Gantt data for the open tasks of a project, as parallel arrays.
+
+    ``?start=`` and ``?end=`` (ISO dates) bound the window and default to the
+    project's planned dates. A task is placed from its start date (or its
+    deadline) to its end date (or its deadline, or its start date). It is
+    included when that span overlaps the window. Dates are day offsets from
+    ``origin``. Lanes and stages are indexes into ``lanes``/``stages``.
+    ``due``/``on_time`` hold the ``TaskInstance.DUE_*``/``ON_TIME_*`` codes.
+    """
+    from projects.models import Project
+
+    project = get_object_or_404(Project, pk=project_pk)
+    if not project.user_has_any_access(request.user):
+        return JsonResponse({"error": "Permission denied."}, status=403)
+    try:
+        start = _parse_date(request.GET.get("start")) or project.planned_start_date
+        end = _parse_date(request.GET.get("end")) or project.planned_end_date
+    except ValueError:
+        return JsonResponse({"error": "start and end must be ISO dates (YYYY-MM-DD)."}, status=400)
+
+    today = timezone.now().date()
+    key = (
+        f"tasks:timeline:{project.pk}:{project.version}:{today}:{start}:{end}:"
+        f"{open_tasks_key(project)}"
+    )
+    content = cache.get(key)
+    if content is None:
+        content = json.dumps(_timeline_payload(project, start, end, today), cls=DjangoJSONEncoder)
+        cache.set(key, content, TIMELINE_CACHE_TIMEOUT)
+    return HttpResponse(content, content_type="application/json")
+
+
+def _parse_date(value):
+    return date.fromisoformat(value) if value else None
+
+
+def _timeline_tasks(project, start, end):
+    """Open tasks of ``project`` whose span overlaps ``start``..``end``."""
+    tasks = (
+        TaskInstance.objects.filter(project=project, is_closed=False)
+        .annotate(
+            span_start=Coalesce("start_date", "deadline"),
+            span_end=Coalesce("end_date", "deadline", "start_date"),
+        )
+        .filter(span_start__isnull=False)
+    )
+    if start:
+        tasks = tasks.filter(span_end__gte=start)
+    if end:
+        tasks = tasks.filter(span_start__lte=end)
+    return tasks
+
+
+def _timeline_payload(project, start, end, today):
+    rows = list(
+        _timeline_tasks(project, start, end).with_due_status(today)
+        .order_by("span_start", "pk")
+        .values_list(
+            "pk", "title", "category", "stage", "span_start", "span_end", "deadline",
+            "due_code", "on_time_code",
+        )
+    )
+
+    origin = start or (rows[0][4] if rows else today)
+    lane_index = {key: i for i, (key, _) in enumerate(TaskInstance.CATEGORY_CHOICES)}
+    stage_index = {key: i for i, (key, _) in enumerate(TaskInstance.STAGE_CHOICES)}
+
+    def offset(day):
+        return (day - origin).days if day else None
+
+    ids, titles, lanes, stages, starts, ends, deadlines, due, on_time = ([] for _ in range(9))
+    for pk, title, category, stage, span_start, span_end, deadline, due_code, on_time_code in rows:
+        ids.append(pk)
+        titles.append(title)
+        lanes.append(lane_index[category])
+        stages.append(stage_index[stage])
+        starts.append(offset(span_start))
+        ends.append(offset(span_end))
+        deadlines.append(offset(deadline))
+        due.append(due_code)
+        on_time.append(on_time_code)
+
+    return {
+        "project": project.pk,
+        "origin": origin,
+        "window": [start, end],
+        "lanes": [label for _, label in TaskInstance.CATEGORY_CHOICES],
+        "stages": [label for _, label in TaskInstance.STAGE_CHOICES],
+        "ids": ids,
+        "titles": titles,
+        "lane": lanes,
+        "stage": stages,
+        "start": starts,
+        "end": ends,
+        "deadline": deadlines,
+        "due": due,
+        "on_time": on_time,
+    }
+
+
+# ── Dependencies ──
+
+@login_required
 @require_POST
+def task_dependency_add(request, pk):
+    """Mark the task chosen in the form as blocking task ``pk``."""
+    task = get_object_or_404(TaskInstance.objects.select_related("project"), pk=pk)
+    if not (request.user.is_system_admin() or request.user.has_perm_manage_tasks()):
+        messages.error(request, "Permission denied.")
+        return redirect("tasks:task_detail", pk=pk)
+    if not task.project.user_has_any_access(request.user):
+        messages.error(request, "Permission denied.")
+        return redirect("projects:project_list")
+
+    blocker_pk = request.POST.get("blocker", "")
+    blocker = TaskInstance.objects.filter(pk=blocker_pk).first() if blocker_pk.isdigit() else None
+    if blocker is None:
+        messages.error(request, "Choose the task that blocks this one.")
+        return redirect("tasks:task_detail", pk=pk)
+    try:
+        add_dependency(blocker, task, user=request.user)
+    except ValidationError as e:
+        messages.error(request, e.messages[0])
+        return redirect("tasks:task_detail", pk=pk)
+
+    log_action(
+        actor=request.user,
+        action="DEPENDENCY_ADDED",
+        target_type="TaskInstance",
+        target_id=task.pk,
+        detail=f"'{blocker.title}' now blocks '{task.title}'.",
+        project=task.project,
+    )
+    messages.success(request, f"'{blocker.title}' now blocks this task.")
+    return redirect("tasks:task_detail", pk=pk)
+
+
 @login_required
+@require_POST
+def task_dependency_remove(request, pk, blocker_pk):
+    task = get_object_or_404(TaskInstance.objects.select_related("project"), pk=pk)
+    if not (request.user.is_system_admin() or request.user.has_perm_manage_tasks()):
+        messages.error(request, "Permission denied.")
+        return redirect("tasks:task_detail", pk=pk)
+    if not task.project.user_has_any_access(request.user):
+        messages.error(request, "Permission denied.")
+        return redirect("projects:project_list")
+
+    blocker = get_object_or_404(TaskInstance, pk=blocker_pk)
+    if remove_dependency(blocker, task):
+        log_action(
+            actor=request.user,
+            action="DEPENDENCY_REMOVED",
+            target_type="TaskInstance",
+            target_id=task.pk,
+            detail=f"'{blocker.title}' no longer blocks '{task.title}'.",
+            project=task.project,
+        )
+        messages.success(request, f"'{blocker.title}' no longer blocks this task.")
+    return redirect("tasks:task_detail", pk=pk)
+
+
+@login_required
+def task_critical_path(request, project_pk):
+    """Critical path and per-task slack of a project's open tasks, as JSON."""
+    from projects.models import Project
+
+    project = get_object_or_404(Project, pk=project_pk)
+    if not project.user_has_any_access(request.user):
+        return JsonResponse({"error": "Permission denied."}, status=403)
+
+    result = critical_path(project)
+    return JsonResponse({
+        "project": project.pk,
+        "finish": result["finish"].isoformat() if result["finish"] else None,
+        "path": result["path"],
+        "tasks": {
+            pk: {
+                "earliest_start": entry["earliest_start"].isoformat(),
+                "earliest_finish": entry["earliest_finish"].isoformat(),
+                "latest_finish": entry["latest_finish"].isoformat(),
+                "slack": entry["slack"],
+            }
+            for pk, entry in result["tasks"].items()
+        },
+    })
+
+
 @login_required
 @require_POST
 def task_move(request, pk):
-    """Drag-and-drop handler: move task to a new stage (and optionally category)."""
-    task = get_object_or_404(TaskInstance, pk=pk)
+    """Drag-and-drop handler: move task to a new stage (and optionally category).
+
+    The task row is locked for the duration of the move so two concurrent
+    moves cannot both see the old stage and both run the DONE/REJECT
+    transition. Clients may send an ``Idempotency-Key`` header (or an
+    ``idempotency_key`` field); a retry with the same key replays the
+    original result instead of moving the task again.
+    """
     user = request.user
 
     # Handle both JSON (from board) and form data (from detail page)
@@ -233,114 +787,190 @@ def task_move(request, pk):
 
     new_stage = data.get("stage")
     new_category = data.get("category")  # optional, for category moves
+    idempotency_key = (request.headers.get("Idempotency-Key") or data.get("idempotency_key") or "").strip()
 
-    if task.is_closed:
-        if request.content_type == 'application/json':
-            return JsonResponse({"error": "Task is closed."}, status=403)
-        else:
-            messages.error(request, "Task is closed and cannot be moved.")
-            return redirect("tasks:task_detail", pk=pk)
-
-    # ── Permission checks ──
-    if new_category and new_category != task.category:
-        if not (user.is_system_admin() or user.has_perm_move_task_categories()):
-            error_msg = "No permission to move categories."
-            if request.content_type == 'application/json':
-                return JsonResponse({"error": error_msg}, status=403)
-            messages.error(request, error_msg)
-            return redirect("tasks:task_detail", pk=pk)
-
-    if new_stage and new_stage != task.stage:
-        if not (user.is_system_admin() or user.has_perm_move_task_stages()):
-            error_msg = "No permission to move stages."
-            if request.content_type == 'application/json':
-                return JsonResponse({"error": error_msg}, status=403)
-            messages.error(request, error_msg)
-            return redirect("tasks:task_detail", pk=pk)
-
-    # ── Validate stage ──
-    valid_stages = [s[0] for s in TaskInstance.STAGE_CHOICES]
-    if new_stage and new_stage not in valid_stages:
-        error_msg = "Invalid stage."
-        if request.content_type == 'application/json':
-            return JsonResponse({"error": error_msg}, status=400)
-        messages.error(request, error_msg)
-        return redirect("tasks:task_detail", pk=pk)
-
-    valid_cats = [c[0] for c in TaskInstance.CATEGORY_CHOICES]
-    if new_category and new_category not in valid_cats:
-        error_msg = "Invalid category."
+    if len(idempotency_key) > 64:
+        error_msg = "Invalid idempotency key."
         if request.content_type == 'application/json':
             return JsonResponse({"error": error_msg}, status=400)
         messages.error(request, error_msg)
         return redirect("tasks:task_detail", pk=pk)
 
-    old_stage = task.stage
-    old_category = task.category
-
-    # ── REJECT can only occur in TESTING ──
-    if new_stage == TaskInstance.REJECT:
-        if task.category != TaskInstance.TESTING:
-            error_msg = "REJECT only allowed in TESTING."
+    with transaction.atomic():
+        task = _locked_task(pk)
+
+        # ── Replay a move we already performed for this key ──
+        if idempotency_key:
+            receipt = _find_move_receipt(user, idempotency_key)
+            if receipt is not None:
+                if not receipt.matches(task.pk, new_stage, new_category):
+                    error_msg = "Idempotency key was already used for a different move."
+                    if request.content_type == 'application/json':
+                        return JsonResponse({"error": error_msg}, status=422)
+                    messages.error(request, error_msg)
+                    return redirect("tasks:task_detail", pk=pk)
+                if request.content_type == 'application/json':
+                    return JsonResponse(receipt.response)
+                return redirect("tasks:task_detail", pk=receipt.task_id)
+
+        if task.is_closed:
+            if request.content_type == 'application/json':
+                return JsonResponse({"error": "Task is closed."}, status=403)
+            else:
+                messages.error(request, "Task is closed and cannot be moved.")
+                return redirect("tasks:task_detail", pk=pk)
+
+        # ── Permission checks ──
+        if new_category and new_category != task.category:
+            if not (user.is_system_admin() or user.has_perm_move_task_categories()):
+                error_msg = "No permission to move categories."
+                if request.content_type == 'application/json':
+                    return JsonResponse({"error": error_msg}, status=403)
+                messages.error(request, error_msg)
+                return redirect("tasks:task_detail", pk=pk)
+
+        if new_stage and new_stage != task.stage:
+            if not (user.is_system_admin() or user.has_perm_move_task_stages()):
+                error_msg = "No permission to move stages."
+                if request.content_type == 'application/json':
+                    return JsonResponse({"error": error_msg}, status=403)
+                messages.error(request, error_msg)
+                return redirect("tasks:task_detail", pk=pk)
+
+        # ── Validate stage ──
+        valid_stages = [s[0] for s in TaskInstance.STAGE_CHOICES]
+        if new_stage and new_stage not in valid_stages:
+            error_msg = "Invalid stage."
             if request.content_type == 'application/json':
                 return JsonResponse({"error": error_msg}, status=400)
             messages.error(request, error_msg)
             return redirect("tasks:task_detail", pk=pk)
-        if not (user.is_system_admin() or user.has_perm_reject_testing()):
-            error_msg = "No permission to reject."
+
+        valid_cats = [c[0] for c in TaskInstance.CATEGORY_CHOICES]
+        if new_category and new_category not in valid_cats:
+            error_msg = "Invalid category."
             if request.content_type == 'application/json':
-                return JsonResponse({"error": error_msg}, status=403)
+                return JsonResponse({"error": error_msg}, status=400)
             messages.error(request, error_msg)
             return redirect("tasks:task_detail", pk=pk)
 
-    # Apply category change
-    if new_category and new_category != task.category:
-        task.category = new_category
+        old_stage = task.stage
+        old_category = task.category
+
+        # ── REJECT can only occur in TESTING ──
+        if new_stage == TaskInstance.REJECT:
+            if task.category != TaskInstance.TESTING:
+                error_msg = "REJECT only allowed in TESTING."
+                if request.content_type == 'application/json':
+                    return JsonResponse({"error": error_msg}, status=400)
+                messages.error(request, error_msg)
+                return redirect("tasks:task_detail", pk=pk)
+            if not (user.is_system_admin() or user.has_perm_reject_testing()):
+                error_msg = "No permission to reject."
+                if request.content_type == 'application/json':
+                    return JsonResponse({"error": error_msg}, status=403)
+                messages.error(request, error_msg)
+                return redirect("tasks:task_detail", pk=pk)
+
+        # Apply category change
+        if new_category and new_category != task.category:
+            task.category = new_category
+
+        # Apply stage change
+        if new_stage and new_stage != old_stage:
+            task.stage = new_stage
+
+        with tracing.span("task.save"):
+            task.save()
+
+        detail_parts = []
+        if new_stage and new_stage != old_stage:
+            detail_parts.append(f"Stage: {old_stage} → {new_stage}")
+        if new_category and new_category != old_category:
+            detail_parts.append(f"Category: {old_category} → {new_category}")
 
-    # Apply stage change
-    if new_stage and new_stage != old_stage:
-        task.stage = new_stage
+        log_action(
+            actor=user,
+            action="STAGE_CHANGE",
+            target_type="TaskInstance",
+            target_id=task.pk,
+            detail=f"Task '{task.title}' moved. {'; '.join(detail_parts)}",
+            project=task.project,
+        )
 
-    task.save()
+        # ── Handle stage transitions with cloning ──
+        if new_stage == TaskInstance.DONE and old_stage != TaskInstance.DONE:
+            if task.category in TaskInstance.BUILD_CATEGORIES:
+                _handle_build_done(task, user)
+            elif task.category == TaskInstance.TESTING:
+                _handle_testing_done(task, user)
+            elif task.category == TaskInstance.DEPLOYMENT:
+                _handle_deployment_done(task, user)
+            elif task.category == TaskInstance.GENERAL:
+                _handle_general_done(task, user)
 
-    detail_parts = []
-    if new_stage and new_stage != old_stage:
-        detail_parts.append(f"Stage: {old_stage} → {new_stage}")
-    if new_category and new_category != old_category:
-        detail_parts.append(f"Category: {old_category} → {new_category}")
+        # ── REJECT in TESTING: close + clone back ──
+        if new_stage == TaskInstance.REJECT and task.category == TaskInstance.TESTING:
+            _handle_testing_reject(task, user)
 
-    log_action(
-        actor=user,
-        action="STAGE_CHANGE",
-        target_type="TaskInstance",
-        target_id=task.pk,
-        detail=f"Task '{task.title}' moved. {'; '.join(detail_parts)}",
-        project=task.project,
-    )
+        publish_task_event(task, BoardEvent.MOVED)
+        metrics.inc("pms_task_moves_total", stage=new_stage or old_stage)
 
-    # ── Handle stage transitions with cloning ──
-    if new_stage == TaskInstance.DONE and old_stage != TaskInstance.DONE:
-        if task.category in TaskInstance.BUILD_CATEGORIES:
-            _handle_build_done(task, user)
-        elif task.category == TaskInstance.TESTING:
-            _handle_testing_done(task, user)
-        elif task.category == TaskInstance.DEPLOYMENT:
-            _handle_deployment_done(task, user)
-        elif task.category == TaskInstance.GENERAL:
-            _handle_general_done(task, user)
-
-    # ── REJECT in TESTING: close + clone back ──
-    if new_stage == TaskInstance.REJECT and task.category == TaskInstance.TESTING:
-        _handle_testing_reject(task, user)
+        result = {"ok": True, "stage": task.stage, "category": task.category}
+        if idempotency_key:
+            _store_move_receipt(user, idempotency_key, task, new_stage, new_category, result)
 
     # For form submissions, redirect back to detail page
     if request.content_type != 'application/json':
         messages.success(request, f"Task moved to {dict(TaskInstance.STAGE_CHOICES).get(new_stage, new_stage)}")
         return redirect("tasks:task_detail", pk=pk)
 
-    return JsonResponse({"ok": True, "stage": task.stage, "category": task.category})
+    return JsonResponse(result)
+
+
+def _locked_task(pk):
+    """The task, its row locked until the current transaction ends."""
+    if not connection.features.has_select_for_update:
+        # SQLite has no row locks. Writing first takes the database write
+        # lock before anything is read, so concurrent moves wait for each
+        # other instead of failing to upgrade their read locks.
+        TaskInstance.objects.filter(pk=pk).update(version=F("version"))
+    else:
+        # Task writers lock the project's sequence row before task rows
+        # (TaskInstance.save numbers a row before writing it), so the move
+        # takes its number before the task lock
+        project_id = TaskInstance.objects.filter(pk=pk).values_list("project_id", flat=True).first()
+        if project_id is not None:
+            ProjectChangeSequence.stamp(project_id)
+    return get_object_or_404(TaskInstance.objects.select_for_update(), pk=pk)
+
 
+def _move_receipt_cutoff():
+    return timezone.now() - timedelta(seconds=settings.TASK_MOVE_IDEMPOTENCY_TTL)
 
+
+def _find_move_receipt(user, key):
+    """Return the unexpired receipt for this user's idempotency key, if any."""
+    return MoveReceipt.objects.filter(
+        user=user, key=key, created_at__gte=_move_receipt_cutoff()
+    ).first()
+
+
+def _store_move_receipt(user, key, task, stage, category, response):
+    """Remember a move result under its idempotency key.
+
+    An expired receipt under the same key is overwritten; others are left
+    to ``tasks.pruning``.
+    """
+    MoveReceipt.objects.update_or_create(
+        user=user,
+        key=key,
+        defaults={"task": task, "stage": stage or "", "category": category or "", "response": response},
+    )
+    prune_soon("receipts")
+
+
+@tracing.traced("task.build_done")
 def _handle_build_done(task, user):
     """Build phase DONE: earn points once, clone to TESTING. Task stays visible."""
     if not task.points_earned:
@@ -348,19 +978,24 @@ def _handle_build_done(task, user):
         task.save()
 
     # Clone to TESTING
-    testing_task = TaskInstance.objects.create(
-        title=task.title,
-        description=task.description,
-        project=task.project,
-        category=TaskInstance.TESTING,
-        stage=TaskInstance.TODO,
-        created_by=user,
-        story_points=task.story_points,
-        deadline=task.deadline,
-        parent_task=task,
-        original_category=task.category,
-    )
-    testing_task.assignees.set(task.assignees.all())
+    with tracing.span("task.clone"):
+        testing_task = TaskInstance.objects.create(
+            title=task.title,
+            description=task.description,
+            project=task.project,
+            category=TaskInstance.TESTING,
+            stage=TaskInstance.TODO,
+            created_by=user,
+            story_points=task.story_points,
+            deadline=task.deadline,
+            parent_task=task,
+            work_item=task.work_item,
+            original_category=task.category,
+        )
+    with tracing.span("task.copy_assignees"):
+        testing_task.assignees.set(task.assignees.all())
+    publish_task_event(testing_task, BoardEvent.CREATED)
+    metrics.inc("pms_task_clones_total", category=testing_task.category)
 
     log_action(
         actor=user,
@@ -372,6 +1007,7 @@ def _handle_build_done(task, user):
     )
 
 
+@tracing.traced("task.testing_done")
 def _handle_testing_done(task, user):
     """Testing DONE: earn points, clone to DEPLOYMENT. Task stays visible."""
     if not task.points_earned:
@@ -379,19 +1015,24 @@ def _handle_testing_done(task, user):
         task.save()
 
     # Clone to DEPLOYMENT
-    deployment_task = TaskInstance.objects.create(
-        title=task.title,
-        description=task.description,
-        project=task.project,
-        category=TaskInstance.DEPLOYMENT,
-        stage=TaskInstance.TODO,
-        created_by=user,
-        story_points=task.story_points,
-        deadline=task.deadline,
-        parent_task=task,
-        original_category=task.original_category or TaskInstance.TESTING,
-    )
-    deployment_task.assignees.set(task.assignees.all())
+    with tracing.span("task.clone"):
+        deployment_task = TaskInstance.objects.create(
+            title=task.title,
+            description=task.description,
+            project=task.project,
+            category=TaskInstance.DEPLOYMENT,
+            stage=TaskInstance.TODO,
+            created_by=user,
+            story_points=task.story_points,
+            deadline=task.deadline,
+            parent_task=task,
+            work_item=task.work_item,
+            original_category=task.original_category or TaskInstance.TESTING,
+        )
+    with tracing.span("task.copy_assignees"):
+        deployment_task.assignees.set(task.assignees.all())
+    publish_task_event(deployment_task, BoardEvent.CREATED)
+    metrics.inc("pms_task_clones_total", category=deployment_task.category)
 
     log_action(
         actor=user,
@@ -403,6 +1044,7 @@ def _handle_testing_done(task, user):
     )
 
 
+@tracing.traced("task.deployment_done")
 def _handle_deployment_done(task, user):
     """Deployment DONE is FINAL: earn points. Task stays visible."""
     if not task.points_earned:
@@ -419,6 +1061,7 @@ def _handle_deployment_done(task, user):
     )
 
 
+@tracing.traced("task.general_done")
 def _handle_general_done(task, user):
     """General task DONE: earn contribution points. Task stays visible as completed."""
     if not task.points_earned:
@@ -435,6 +1078,7 @@ def _handle_general_done(task, user):
     )
 
 
+@tracing.traced("task.testing_reject")
 def _handle_testing_reject(task, user):
     """REJECT in TESTING: close testing task, reset parent dev task back to TODO."""
     task.is_closed = True
@@ -447,6 +1091,7 @@ def _handle_testing_reject(task, user):
         parent.end_date = None
         parent.points_earned = False
         parent.save()
+        publish_task_event(parent, BoardEvent.MOVED)
         log_action(
             actor=user,
             action="TESTING_REJECTED",
@@ -458,19 +1103,24 @@ def _handle_testing_reject(task, user):
     else:
         # No accessible parent task — create a rework clone
         rework_cat = task.original_category or TaskInstance.DEVELOPMENT
-        rework_task = TaskInstance.objects.create(
-            title=task.title,
-            description=task.description,
-            project=task.project,
-            category=rework_cat,
-            stage=TaskInstance.TODO,
-            created_by=user,
-            story_points=0,
-            deadline=task.deadline,
-            parent_task=task,
-            original_category=rework_cat,
-        )
-        rework_task.assignees.set(task.assignees.all())
+        with tracing.span("task.clone"):
+            rework_task = TaskInstance.objects.create(
+                title=task.title,
+                description=task.description,
+                project=task.project,
+                category=rework_cat,
+                stage=TaskInstance.TODO,
+                created_by=user,
+                story_points=0,
+                deadline=task.deadline,
+                parent_task=task,
+                work_item=task.work_item,
+                original_category=rework_cat,
+            )
+        with tracing.span("task.copy_assignees"):
+            rework_task.assignees.set(task.assignees.all())
+        publish_task_event(rework_task, BoardEvent.CREATED)
+        metrics.inc("pms_task_clones_total", category=rework_task.category)
         log_action(
             actor=user,
             action="TESTING_REJECTED",